@@ -8,11 +8,69 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     SECRET_KEY: str = "insecure_default_key"
     DATABASE_URL: str = "sqlite:///./navigator.db"
+    DATABASE_ECHO: bool = False
+    DATABASE_ASYNC: bool = True
+    ASYNC_DATABASE_URL: str = ""
+    DATABASE_POOL_SIZE: int = 20
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: int = 30
+    SQLITE_PROFILE_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -65536
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SQLITE_TEMP_STORE: str = "MEMORY"
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     GOOGLE_SEARCH_URL: str = "https://www.google.com/search"
     INITIAL_ADMIN_USERNAME: str = "admin"
     INITIAL_ADMIN_PASSWORD: str = "admin123"
+    NAVIGATION_CACHE_MAX_AGE: int = 30
+    CACHE_VERSION_POLL_INTERVAL: float = 1.0
+    NAVIGATION_STALE_WHILE_REVALIDATE: int = 600
+    SSR_HOMEPAGE: bool = True
+    TAILWIND_CLI: str = "tailwindcss"
+    TAILWIND_BUILD_TIMEOUT: int = 120
+    STATIC_PRECOMPRESS_ON_STARTUP: bool = False
+    STATIC_RETIRED_GRACE: int = 3600
+    PRINCIPAL_CACHE_TTL: int = 30
+    AUTH_EMBED_CLAIMS: bool = False
+    AUTH_CLAIMS_MAX_AGE: int = 300
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    STARTUP_PREFLIGHT: bool = True
+    STARTUP_WARM_CACHES: bool = True
+    HEALTH_CACHE_TTL: float = 2.0
+    HEALTH_DB_TIMEOUT: float = 1.0
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_INTERVAL: float = 1.0
+    METRICS_TOKEN: str = ""
+    PROMETHEUS_MULTIPROC_DIR: str = ""
+    CLICK_TRACKING_ENABLED: bool = True
+    CLICK_FLUSH_INTERVAL: float = 10.0
+    CLICK_FLUSH_THRESHOLD: int = 500
+    CLICK_POPULAR_DAYS: int = 30
+    CLICK_POPULAR_LIMIT: int = 8
+    CLICK_POPULAR_REFRESH_INTERVAL: float = 60.0
+    CLICK_ORDER_BY_POPULARITY: bool = False
+    LINK_CHECK_ENABLED: bool = False
+    LINK_CHECK_INTERVAL: float = 300.0
+    LINK_CHECK_MAX_AGE: int = 21600
+    LINK_CHECK_CONCURRENCY: int = 32
+    LINK_CHECK_PER_HOST: int = 2
+    LINK_CHECK_RATE: float = 50.0
+    LINK_CHECK_TIMEOUT: float = 10.0
+    LINK_CHECK_BROKEN_AFTER: int = 2
+    FAVICONS_ENABLED: bool = False
+    FAVICON_CACHE_DIR: str = ".cache/favicons"
+    FAVICON_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+    FAVICON_SIZE: int = 32
+    FAVICON_MAX_AGE: int = 604800
+    FAVICON_FETCH_TIMEOUT: float = 5.0
+    FAVICON_FETCH_CONCURRENCY: int = 8
+    FAVICON_BUNDLE_WAIT: float = 2.0
+    FAVICON_BROWSER_MAX_AGE: int = 86400
 
     class Config:
         env_file = ".env"
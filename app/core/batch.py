@@ -0,0 +1,57 @@
+"""Shared plumbing for the batch endpoints of the cards and categories routers.
+
+Batch endpoints validate every item up front with one query per kind of
+check, report an outcome per item and apply the valid items in a single
+transaction. With ``atomic=true`` any failed item rejects the whole batch.
+"""
+from datetime import datetime
+from typing import Dict, List, Sequence, Set, Type
+
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlmodel import SQLModel, select
+
+from app.database import DBSession
+from app.models.batch import BatchItemResult
+
+
+def raise_if_failed(results: Sequence[BatchItemResult], atomic: bool) -> None:
+    failed = [result.model_dump(mode="json", exclude_none=True) for result in results if not result.ok]
+    if atomic and failed:
+        raise HTTPException(status_code=400, detail=failed)
+
+
+async def existing_ids(session: DBSession, model: Type[SQLModel], ids: Set[int]) -> Set[int]:
+    if not ids:
+        return set()
+    rows = (await session.exec(select(model.id).where(model.id.in_(ids)))).all()
+    return set(rows)
+
+
+async def reorder(
+    session: DBSession, model: Type[SQLModel], ids: List[int], atomic: bool, missing: str
+) -> List[BatchItemResult]:
+    """Set ``order`` to each row's position in ``ids`` with one executemany.
+
+    Positions are taken from the full list, so a skipped item leaves a gap
+    rather than shifting the rows after it.
+    """
+    known = await existing_ids(session, model, set(ids))
+    seen: Set[int] = set()
+    results: List[BatchItemResult] = []
+    params: List[Dict] = []
+    now = datetime.utcnow()
+    for index, item_id in enumerate(ids):
+        if item_id not in known:
+            results.append(BatchItemResult(index=index, id=item_id, ok=False, detail=missing))
+        elif item_id in seen:
+            results.append(BatchItemResult(index=index, id=item_id, ok=False, detail="Duplicate id"))
+        else:
+            seen.add(item_id)
+            params.append({"id": item_id, "order": index, "updated_at": now})
+            results.append(BatchItemResult(index=index, id=item_id, ok=True))
+
+    raise_if_failed(results, atomic)
+    if params:
+        await session.execute(update(model), params)
+    return results
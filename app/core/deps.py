@@ -1,20 +1,50 @@
+import time
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlmodel import Session, select
+from sqlmodel import select
 
-from app.database import get_session
+from app.database import DBSession, get_session
 from app.models.user import User
+from app.core.principals import Principal, PrincipalCache
 from app.core.security import ALGORITHM, settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
+principal_cache = PrincipalCache(ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def _principal_from_claims(payload: dict) -> Optional[Principal]:
+    """Trust role claims embedded in a recently issued token.
+
+    Claims are only honoured for AUTH_CLAIMS_MAX_AGE seconds after issue and
+    never for a user revoked in this process since then, which bounds how
+    long a demoted or deleted user keeps access without a lookup.
+    """
+    if not settings.AUTH_EMBED_CLAIMS:
+        return None
+    issued_at = payload.get("iat")
+    if not isinstance(issued_at, (int, float)) or "su" not in payload or "act" not in payload:
+        return None
+    if time.time() - issued_at > settings.AUTH_CLAIMS_MAX_AGE:
+        return None
+    if principal_cache.revoked_since(payload["sub"], issued_at):
+        return None
+    return Principal(
+        id=payload.get("uid"),
+        username=payload["sub"],
+        is_active=bool(payload["act"]),
+        is_superuser=bool(payload["su"]),
+        stamp=payload.get("ver", ""),
+    )
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session)
-) -> User:
+    session: DBSession = Depends(get_session)
+) -> Principal:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
         token_data = payload.get("sub")
@@ -30,19 +60,39 @@ async def get_current_user(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = session.exec(select(User).where(User.username == token_data)).first()
+
+    principal = _principal_from_claims(payload)
+    if principal is not None:
+        return principal
+
+    stamp = payload.get("ver")
+    principal = principal_cache.get(token_data, stamp)
+    if principal is not None:
+        return principal
+
+    user = (await session.exec(select(User).where(User.username == token_data))).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    principal = Principal.from_user(user)
+    # Tokens issued before a password or role change carry a stale stamp.
+    if stamp is not None and principal.stamp != stamp:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal_cache.put(principal)
+    return principal
 
 async def get_current_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    if not current_user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges"
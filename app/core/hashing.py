@@ -0,0 +1,76 @@
+"""Bounded worker pool for bcrypt.
+
+bcrypt at 12 rounds costs about a quarter of a second of CPU. Running it on
+the event loop stalls every other request on the worker, and running it on
+Starlette's shared threadpool lets a login burst starve the sync endpoints.
+All hashing and verification goes through a small dedicated pool instead.
+At most PASSWORD_HASH_MAX_PENDING operations may be queued or running; past
+that, ``PasswordPoolSaturated`` is raised so callers can shed load.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from app.core.security import get_password_hash, settings, verify_password
+
+T = TypeVar("T")
+
+
+class PasswordPoolSaturated(Exception):
+    pass
+
+
+class PasswordHasherPool:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _submit(self, fn: Callable[..., T], *args) -> "Future[T]":
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordPoolSaturated()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            executor = self._executor
+        future = executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit(verify_password, plain_password, hashed_password)
+        )
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(get_password_hash, password))
+
+    def hash_blocking(self, password: str) -> str:
+        """Hash from sync code (threadpool endpoints, startup) via the pool."""
+        return self._submit(get_password_hash, password).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_pool = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,219 @@
+"""Prometheus metrics for requests, database queries and the threadpools.
+
+``MetricsMiddleware`` times every HTTP request and labels it with the route
+template (``/api/cards/{card_id}``) rather than the raw path, so the number
+of series stays bounded. SQLAlchemy cursor events on the instrumented
+engines count the queries a request issues and the time spent in them; the
+counts travel in a context variable that is copied into threadpool calls
+and SQLAlchemy's async greenlets alike.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set, every uvicorn worker writes its
+samples to files in that directory and ``/metrics`` aggregates all of them,
+so any worker can answer a scrape. The directory must exist and should be
+emptied before the server starts.
+"""
+import asyncio
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import anyio
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# prometheus_client picks its storage backend on import.
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Latency buckets from 1ms to 10s; most reads are served from memory.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code.", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served.", ["method"],
+    multiprocess_mode="livesum",
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request.", ["method", "route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in database queries per HTTP request.", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Latency of single database queries.", buckets=LATENCY_BUCKETS
+)
+THREADPOOL_IN_USE = Gauge(
+    "threadpool_threads_in_use", "Busy threads of the request threadpool.",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_CAPACITY = Gauge(
+    "threadpool_threads_total", "Size of the request threadpool.", multiprocess_mode="livesum"
+)
+THREADPOOL_WAITING = Gauge(
+    "threadpool_tasks_waiting", "Calls waiting for a free threadpool thread.",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_SATURATED = Counter(
+    "threadpool_saturated_seconds_total",
+    "Sampled time during which every threadpool thread was busy.",
+)
+STARTUP_SECONDS = Gauge(
+    "app_startup_seconds", "Duration of each startup phase of a worker.", ["phase"],
+    multiprocess_mode="liveall",
+)
+PASSWORD_POOL_PENDING = Gauge(
+    "password_hash_pending", "Password hashing operations queued or running.",
+    multiprocess_mode="livesum",
+)
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    QUERY_LATENCY.observe(elapsed)
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record every query run on ``engine`` (pass ``sync_engine`` for async engines)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; avoids the per-request task of BaseHTTPMiddleware."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self._routes: Optional[Dict[object, str]] = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is not None:
+            if self._routes is None:
+                self._routes = {
+                    route.endpoint: route.path
+                    for route in scope["app"].routes
+                    if hasattr(route, "endpoint")
+                }
+            route = self._routes.get(endpoint)
+            if route is not None:
+                return route
+        if scope["path"].startswith("/static/"):
+            return "/static"
+        # Unmatched paths (404s) share one label to keep cardinality bounded.
+        return "<unmatched>"
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            _query_stats.reset(token)
+            route = self._route(scope)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUEST_QUERIES.labels(method, route).observe(stats.count)
+            REQUEST_DB_TIME.labels(method, route).observe(stats.seconds)
+
+
+def sample_threadpools(password_pool) -> None:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    THREADPOOL_IN_USE.set(statistics.borrowed_tokens)
+    THREADPOOL_CAPACITY.set(statistics.total_tokens)
+    THREADPOOL_WAITING.set(statistics.tasks_waiting)
+    PASSWORD_POOL_PENDING.set(password_pool.pending)
+    if statistics.borrowed_tokens >= statistics.total_tokens:
+        THREADPOOL_SATURATED.inc(settings.METRICS_SAMPLE_INTERVAL)
+
+
+async def run_sampler(password_pool) -> None:
+    """Sample the threadpools of this worker every METRICS_SAMPLE_INTERVAL seconds."""
+    while True:
+        sample_threadpools(password_pool)
+        await asyncio.sleep(settings.METRICS_SAMPLE_INTERVAL)
+
+
+def record_startup(timings: Dict[str, float]) -> None:
+    for phase, seconds in timings.items():
+        STARTUP_SECONDS.labels(phase).set(seconds)
+
+
+def render() -> bytes:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
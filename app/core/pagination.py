@@ -0,0 +1,29 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor encodes the sort key of the last row of a page; the next page is
+everything strictly after it, so deep pages cost the same as the first.
+"""
+import base64
+import json
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*key: int) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Optional[Tuple[int, ...]]:
+    """Decode a cursor into its sort key; an empty cursor means the first page."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list) or len(key) != size or not all(type(value) is int for value in key):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return tuple(key)
@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from app.core.security import security_stamp
+from app.models.user import User
+
+
+class Principal(NamedTuple):
+    """The authenticated identity handed to endpoints.
+
+    A detached snapshot of the user row, so it can be cached across requests
+    and rebuilt from signed token claims without a session.
+    """
+
+    id: Optional[int]
+    username: str
+    is_active: bool
+    is_superuser: bool
+    stamp: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            stamp=security_stamp(user),
+        )
+
+
+class PrincipalCache:
+    """Short-lived, process-local cache of principals keyed by username.
+
+    Entries are only returned for a token carrying the same security stamp,
+    so a password or role change made by another worker is picked up as soon
+    as the entry expires. ``revoke`` drops the entry and records the time so
+    that claim-only authorization stops trusting tokens issued before it.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Principal, float]] = {}
+        self._revoked_at: Dict[str, float] = {}
+
+    def get(self, username: str, stamp: Optional[str]) -> Optional[Principal]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at < time.monotonic() or principal.stamp != stamp:
+            return None
+        return principal
+
+    def put(self, principal: Principal) -> None:
+        with self._lock:
+            self._entries[principal.username] = (principal, time.monotonic() + self.ttl)
+
+    def revoke(self, username: str) -> None:
+        with self._lock:
+            self._entries.pop(username, None)
+            self._revoked_at[username] = time.time()
+
+    def revoked_since(self, username: str, issued_at: float) -> bool:
+        revoked_at = self._revoked_at.get(username)
+        return revoked_at is not None and issued_at <= revoked_at
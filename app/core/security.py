@@ -1,9 +1,14 @@
+import hashlib
+import hmac
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.config import get_settings
 
+if TYPE_CHECKING:
+    from app.models.user import User
+
 settings = get_settings()
 
 # Password hashing context
@@ -20,13 +25,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def security_stamp(user: "User") -> str:
+    """Fingerprint of the fields that must revoke a token when they change.
+
+    Changing the password, the active flag or the superuser flag yields a new
+    stamp, so tokens carrying the old one stop resolving to a principal.
+    """
+    message = f"{user.id}:{user.hashed_password}:{user.is_active}:{user.is_superuser}"
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"), message.encode("utf-8"), hashlib.sha256
+    ).hexdigest()[:16]
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": now})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -0,0 +1,60 @@
+"""JSON for the hot read endpoints, without the response-model round trip.
+
+List endpoints select plain column tuples instead of ORM entities, turn
+them into dicts once and encode them directly, skipping FastAPI's
+validate-then-serialize pass over the response model. That is only sound for
+trusted values (rows read from our own tables), so write endpoints keep their
+response models.
+
+Encoding uses orjson when it is installed (the ``speedups`` extra) and the
+stdlib encoder otherwise. Both emit compact UTF-8 JSON with datetimes in ISO
+8601, as the response models would.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple, Type
+
+from fastapi import Response
+from sqlalchemy import Column
+from sqlmodel import SQLModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class Columns(NamedTuple):
+    """The table columns behind a read model's fields, in field order."""
+
+    names: Tuple[str, ...]
+    columns: Tuple[Column, ...]
+
+    def dicts(self, rows: Iterable[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        names = self.names
+        return [dict(zip(names, row)) for row in rows]
+
+
+def columns_of(table_model: Type[SQLModel], read_model: Type[SQLModel]) -> Columns:
+    table = table_model.__table__
+    names = tuple(read_model.model_fields)
+    return Columns(names, tuple(table.c[name] for name in names))
@@ -1,14 +1,199 @@
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
 from app.config import get_settings
 
 settings = get_settings()
 
-connect_args = {"check_same_thread": False}
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG, connect_args=connect_args)
+T = TypeVar("T")
+
+
+def sqlite_pragmas() -> List[Tuple[str, Any]]:
+    """PRAGMAs applied to every new SQLite connection.
+
+    WAL lets the public read path proceed while an admin write is in
+    progress; NORMAL synchronous is durable across application crashes in
+    WAL mode; mmap and a larger page cache keep the hot tables in memory.
+    """
+    return [
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+        ("temp_store", settings.SQLITE_TEMP_STORE),
+    ]
+
+
+def apply_sqlite_profile(engine: Engine, pragmas: List[Tuple[str, Any]]) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def _engine_options(parsed: URL) -> Dict[str, Any]:
+    is_sqlite = parsed.get_backend_name() == "sqlite"
+    kwargs: Dict[str, Any] = {"echo": settings.DATABASE_ECHO}
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not is_sqlite or parsed.database not in (None, "", ":memory:"):
+        # One connection per threadpool worker that can be inside a sync
+        # endpoint at once, so requests do not queue on the pool.
+        kwargs.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+    return kwargs
+
+
+def create_app_engine(url: Optional[str] = None, sqlite_profile: Optional[bool] = None) -> Engine:
+    url = url or settings.DATABASE_URL
+    if sqlite_profile is None:
+        sqlite_profile = settings.SQLITE_PROFILE_ENABLED
+
+    parsed = make_url(url)
+    engine = create_engine(url, **_engine_options(parsed))
+    if parsed.get_backend_name() == "sqlite" and sqlite_profile:
+        apply_sqlite_profile(engine, sqlite_pragmas())
+    return engine
+
+
+def async_database_url(url: Optional[str] = None) -> str:
+    """The async driver URL for DATABASE_URL, e.g. ``sqlite+aiosqlite://``."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    parsed = make_url(url or settings.DATABASE_URL)
+    if parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_app_async_engine(url: Optional[str] = None, sqlite_profile: Optional[bool] = None) -> AsyncEngine:
+    url = url or async_database_url()
+    if sqlite_profile is None:
+        sqlite_profile = settings.SQLITE_PROFILE_ENABLED
+
+    parsed = make_url(url)
+    async_engine = create_async_engine(url, **_engine_options(parsed))
+    if parsed.get_backend_name() == "sqlite" and sqlite_profile:
+        apply_sqlite_profile(async_engine.sync_engine, sqlite_pragmas())
+    return async_engine
+
+
+# The sync engine always exists: CLIs, startup tasks and background jobs use
+# it directly. Requests go through the async engine unless DATABASE_ASYNC is
+# off.
+engine = create_app_engine()
+async_engine: Optional[AsyncEngine] = create_app_async_engine() if settings.DATABASE_ASYNC else None
+
+
+class DBSession:
+    """Awaitable session facade used by the routers.
+
+    Wraps an ``AsyncSession`` when DATABASE_ASYNC is on, or a sync
+    ``Session`` whose I/O is pushed to the threadpool otherwise, so endpoint
+    code is the same ``async def`` either way and never blocks the loop.
+    ``add`` does no I/O and stays synchronous. ``run_sync`` hands a sync
+    ``Session`` to helpers shared with the CLIs and services.
+    """
+
+    def __init__(self, session: Union[Session, AsyncSession]) -> None:
+        self.session = session
+        self.is_async = isinstance(session, AsyncSession)
+
+    async def _call(self, name: str, *args, **kwargs):
+        method = getattr(self.session, name)
+        if self.is_async:
+            return await method(*args, **kwargs)
+        return await run_in_threadpool(method, *args, **kwargs)
+
+    async def exec(self, statement, **kwargs):
+        return await self._call("exec", statement, **kwargs)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await self._call("execute", statement, params, **kwargs)
+
+    async def get(self, model, ident):
+        return await self._call("get", model, ident)
+
+    def add(self, instance) -> None:
+        self.session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.session.add_all(instances)
+
+    async def delete(self, instance) -> None:
+        await self._call("delete", instance)
+
+    async def flush(self) -> None:
+        await self._call("flush")
+
+    async def commit(self) -> None:
+        await self._call("commit")
+
+    async def rollback(self) -> None:
+        await self._call("rollback")
+
+    async def refresh(self, instance) -> None:
+        await self._call("refresh", instance)
+
+    async def close(self) -> None:
+        await self._call("close")
+
+    async def run_sync(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+def ensure_indexes(bind: Optional[Engine] = None) -> List[str]:
+    """Create indexes declared on the models but missing from the database.
+
+    ``create_all`` only creates indexes together with a new table, so an
+    index added to an existing model is created here instead. Safe to run
+    on every start; returns the names of the indexes it created.
+    """
+    bind = bind or engine
+    created = []
+    with bind.begin() as connection:
+        existing = {
+            table.name: {index["name"] for index in inspect(connection).get_indexes(table.name)}
+            for table in SQLModel.metadata.sorted_tables
+        }
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing[table.name]:
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    ensure_indexes()
 
-def get_session():
-    with Session(engine) as session:
-        yield session
+async def get_session() -> AsyncIterator[DBSession]:
+    # expire_on_commit=False: reading attributes after a commit must not
+    # trigger a lazy refresh, which would be hidden I/O on the event loop.
+    if async_engine is not None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield DBSession(session)
+    else:
+        db = DBSession(Session(engine, expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
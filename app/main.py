@@ -1,62 +1,114 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+import anyio
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
 
 from app.config import get_settings
-from app.core.security import get_password_hash
-from app.database import create_db_and_tables, engine
-from app.models import User
-from app.routers import navigation, status, auth, categories, cards, users, configs
+from app.core import metrics
+from app.core.hashing import PasswordPoolSaturated, password_pool
+from app.core.http_cache import cache_headers, is_not_modified
+from app.database import DBSession, async_engine, engine, get_session
+from app.routers import admin, navigation, status, auth, categories, cards, users, configs, dataset, search
+from app.routers import clicks as clicks_router
+from app.routers import favicons as favicons_router
+from app.routers import metrics as metrics_router
+from app.services import cache_versions, clicks, favicons, fonts, health, link_health, startup, static_assets, tailwind
+from app.services.homepage import homepage_cache
+from app.services.navigation import navigation_snapshot
 
 settings = get_settings()
 
 
-def ensure_default_admin():
-    with Session(engine) as session:
-        username = settings.INITIAL_ADMIN_USERNAME
-        user = session.exec(select(User).where(User.username == username)).first()
-        if not user:
-            admin_user = User(
-                username=username,
-                hashed_password=get_password_hash(settings.INITIAL_ADMIN_PASSWORD),
-                is_superuser=True,
-                is_active=True,
-            )
-            session.add(admin_user)
-            session.commit()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    create_db_and_tables()
-    ensure_default_admin()
-    # Optional: Run seed here if we wanted, but better to use CLI command
+    # Startup. Schema, search index and admin bootstrap run under a file
+    # lock here unless a preflight already ran before the workers.
+    if settings.STARTUP_PREFLIGHT:
+        await anyio.to_thread.run_sync(startup.preflight)
+    if settings.STATIC_PRECOMPRESS_ON_STARTUP:
+        with startup.timed("precompress"):
+            await anyio.to_thread.run_sync(static_assets.precompress)
+    await startup.open_connections()
+    # First readiness check, so the first navigation snapshot carries a real status.
+    await health.checker.report()
+    if settings.STARTUP_WARM_CACHES:
+        await anyio.to_thread.run_sync(startup.warm_caches, templates.env)
+    startup.mark_ready()
+    sampler = None
+    if settings.METRICS_ENABLED:
+        metrics.record_startup(startup.timings)
+        sampler = asyncio.create_task(metrics.run_sampler(password_pool))
+    flusher = None
+    if settings.CLICK_TRACKING_ENABLED:
+        flusher = asyncio.create_task(clicks.run_flusher())
+    sweeper = None
+    if settings.LINK_CHECK_ENABLED:
+        sweeper = asyncio.create_task(link_health.run_sweeper())
     yield
     # Shutdown
+    if sweeper is not None:
+        sweeper.cancel()
+    if flusher is not None:
+        flusher.cancel()
+        await anyio.to_thread.run_sync(clicks.recorder.flush)
+    await favicons.fetcher.close()
+    if sampler is not None:
+        sampler.cancel()
+        metrics.mark_process_dead()
+    password_pool.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 app = FastAPI(
     title=settings.APP_NAME,
     lifespan=lifespan
 )
 
+if settings.METRICS_ENABLED:
+    # Per-route latency, status codes and database queries per request.
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+    if async_engine is not None:
+        metrics.instrument_engine(async_engine.sync_engine)
+
+@app.exception_handler(PasswordPoolSaturated)
+async def password_pool_saturated_handler(request: Request, exc: PasswordPoolSaturated):
+    # Shed password work instead of queueing it without bound.
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "请求过多，请稍后重试"},
+        headers={"Retry-After": "1"},
+    )
+
 # Mount Static Files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", static_assets.AssetFiles(directory="static"), name="static")
 
 # Setup Templates
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["tailwind_stylesheet"] = tailwind.stylesheet_url
+templates.env.globals["fonts_stylesheet"] = fonts.stylesheet_url
+templates.env.globals["asset_url"] = static_assets.asset_url
+templates.env.globals["favicons_enabled"] = settings.FAVICONS_ENABLED
 
 # Include Routers
 app.include_router(navigation.router, prefix="/api", tags=["navigation"])
 app.include_router(status.router, prefix="/api", tags=["status"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(categories.router, prefix="/api/categories", tags=["categories"])
 app.include_router(cards.router, prefix="/api/cards", tags=["cards"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(configs.router, prefix="/api/configs", tags=["configs"])
+app.include_router(dataset.router, prefix="/api/dataset", tags=["dataset"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(clicks_router.router, prefix="/api", tags=["clicks"])
+app.include_router(favicons_router.router, prefix="/api", tags=["favicons"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router.router, tags=["metrics"])
 
 # Root Endpoint serving HTML
 @app.get("/login", response_class=HTMLResponse)
@@ -72,5 +124,23 @@ async def admin_page(request: Request):
     )
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+async def read_root(request: Request, session: DBSession = Depends(get_session)):
+    if not settings.SSR_HOMEPAGE:
+        return templates.TemplateResponse("index.html", {"request": request})
+
+    # Render the sidebar, active section and cards on the server from the
+    # navigation snapshot; the document is cached per data version.
+    await cache_versions.refresh(session)
+    navigation_entry = navigation_snapshot.current or await session.run_sync(navigation_snapshot.get)
+    page = homepage_cache.current(navigation_entry) or await run_in_threadpool(
+        homepage_cache.render, templates.env, navigation_entry
+    )
+    headers = cache_headers(
+        page.etag,
+        navigation_entry.last_modified,
+        settings.NAVIGATION_CACHE_MAX_AGE,
+        settings.NAVIGATION_STALE_WHILE_REVALIDATE,
+    )
+    if is_not_modified(request, page.etag, navigation_entry.last_modified):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=page.body, headers=headers)
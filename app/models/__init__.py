@@ -1,25 +1,44 @@
+from .batch import BatchIds, BatchItemResult
+from .cache_version import CacheVersion
+from .click import CardClickDaily
 from .category import (
     Category,
+    CategoryBatchResult,
+    CategoryBatchUpdate,
     CategoryCreate,
     CategoryRead,
     CategoryUpdate,
 )
 from .card import (
     NavigationCard,
+    NavigationCardBatchResult,
+    NavigationCardBatchUpdate,
     NavigationCardCreate,
+    NavigationCardPage,
     NavigationCardRead,
     NavigationCardUpdate,
 )
 from .config import SiteConfig
+from .link_status import LinkStatus
 from .user import User, UserCreate, UserRead, UserUpdate
 
 __all__ = [
+    "BatchIds",
+    "BatchItemResult",
+    "CacheVersion",
+    "CardClickDaily",
     "Category",
+    "CategoryBatchResult",
+    "CategoryBatchUpdate",
     "CategoryCreate",
     "CategoryRead",
     "CategoryUpdate",
+    "LinkStatus",
     "NavigationCard",
+    "NavigationCardBatchResult",
+    "NavigationCardBatchUpdate",
     "NavigationCardCreate",
+    "NavigationCardPage",
     "NavigationCardRead",
     "NavigationCardUpdate",
     "SiteConfig",
@@ -0,0 +1,15 @@
+from typing import List, Optional
+from sqlmodel import SQLModel
+
+
+class BatchItemResult(SQLModel):
+    """Outcome of one item of a batch request, in request order."""
+
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    detail: Optional[str] = None
+
+
+class BatchIds(SQLModel):
+    ids: List[int]
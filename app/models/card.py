@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
+from app.models.batch import BatchItemResult
 from app.models.category import Category
 
 
@@ -17,6 +19,14 @@ class NavigationCardBase(SQLModel):
 
 
 class NavigationCard(NavigationCardBase, table=True):
+    __table_args__ = (
+        # Keyset pagination walks (category_id, order, id), filtered or not.
+        Index("ix_navigationcard_category_order", "category_id", "order", "id"),
+        Index("ix_navigationcard_order", "order", "id"),
+        # Natural key used by the dataset import to upsert cards.
+        Index("ix_navigationcard_category_href", "category_id", "href"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -35,6 +45,13 @@ class NavigationCardRead(NavigationCardBase):
     updated_at: datetime
 
 
+class NavigationCardPage(SQLModel):
+    items: List[NavigationCardRead]
+    next_cursor: Optional[str] = None
+    # Number of cards matching the filters; only computed when requested.
+    total: Optional[int] = None
+
+
 class NavigationCardUpdate(SQLModel):
     category_id: Optional[int] = None
     title: Optional[str] = None
@@ -45,3 +62,11 @@ class NavigationCardUpdate(SQLModel):
     icon_color_class: Optional[str] = None
     href: Optional[str] = None
     order: Optional[int] = None
+
+
+class NavigationCardBatchUpdate(NavigationCardUpdate):
+    id: int
+
+
+class NavigationCardBatchResult(BatchItemResult):
+    card: Optional[NavigationCardRead] = None
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
+from app.models.batch import BatchItemResult
 
 
 class CategoryBase(SQLModel):
@@ -36,3 +37,11 @@ class CategoryUpdate(SQLModel):
     icon: Optional[str] = None
     order: Optional[int] = None
     active: Optional[bool] = None
+
+
+class CategoryBatchUpdate(CategoryUpdate):
+    id: int
+
+
+class CategoryBatchResult(BatchItemResult):
+    category: Optional[CategoryRead] = None
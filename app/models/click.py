@@ -0,0 +1,11 @@
+from datetime import date
+from sqlmodel import SQLModel, Field
+
+
+class CardClickDaily(SQLModel, table=True):
+    """Clicks per card per UTC day, written in batches by the click recorder."""
+
+    card_id: int = Field(foreign_key="navigationcard.id", primary_key=True)
+    # The popularity window is read as ``day >= since`` across all cards.
+    day: date = Field(primary_key=True, index=True)
+    clicks: int = Field(default=0)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class LinkStatus(SQLModel, table=True):
+    """Result of the last check of one card href, written by the link checker."""
+
+    url: str = Field(primary_key=True)
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    # Consecutive failed checks; the link counts as broken from
+    # LINK_CHECK_BROKEN_AFTER on.
+    failures: int = Field(default=0, index=True)
+    # Validators from the last full response, sent back on the next check.
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    elapsed_ms: Optional[float] = None
+    checked_at: datetime = Field(default_factory=datetime.utcnow)
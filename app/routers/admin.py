@@ -0,0 +1,65 @@
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlmodel import func, select
+
+from app.core.deps import get_current_superuser
+from app.core.serialization import FastJSONResponse, columns_of
+from app.database import DBSession, get_session
+from app.models import Category, CategoryRead, NavigationCard, NavigationCardPage, User, UserRead
+from app.routers.cards import card_page
+from app.routers.categories import CATEGORY_COLUMNS
+from app.routers.configs import (
+    BrandingConfigResponse,
+    SearchConfigResponse,
+    build_branding_config,
+    build_search_config,
+)
+from app.services.site_config import get_site_config
+
+router = APIRouter()
+USER_COLUMNS = columns_of(User, UserRead)
+
+
+class AdminBootstrap(BaseModel):
+    username: str
+    categories: List[CategoryRead]
+    # Cards per category id, for the filter menu.
+    card_counts: Dict[int, int]
+    cards: NavigationCardPage
+    users: List[UserRead]
+    search: SearchConfigResponse
+    branding: BrandingConfigResponse
+
+
+@router.get("/bootstrap", response_model=AdminBootstrap)
+async def admin_bootstrap(
+    card_limit: int = Query(100, ge=1, le=500),
+    category_id: Optional[int] = None,
+    session: DBSession = Depends(get_session),
+    current_user=Depends(get_current_superuser),
+):
+    """Everything the admin console shows on load, with one auth check and session.
+
+    Cards come as the first keyset page with the total count; the console
+    fetches the rest from ``/api/cards/`` with ``next_cursor`` as it scrolls.
+    Rows are encoded directly; the response model documents the shape.
+    """
+    categories = (await session.exec(
+        select(*CATEGORY_COLUMNS.columns).order_by(Category.order, Category.id)
+    )).all()
+    counts = (await session.exec(
+        select(NavigationCard.category_id, func.count()).group_by(NavigationCard.category_id)
+    )).all()
+    users = (await session.exec(select(*USER_COLUMNS.columns).order_by(User.id))).all()
+    config = await get_site_config(session)
+    return FastJSONResponse({
+        "username": current_user.username,
+        "categories": CATEGORY_COLUMNS.dicts(categories),
+        "card_counts": {category: count for category, count in counts},
+        "cards": await card_page(session, limit=card_limit, category_id=category_id, with_total=True),
+        "users": USER_COLUMNS.dicts(users),
+        "search": build_search_config(config).model_dump(),
+        "branding": build_branding_config(config).model_dump(),
+    })
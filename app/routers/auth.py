@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel import select
+from app.database import DBSession, get_session
 from app.models.user import User
-from app.core.security import verify_password, create_access_token
+from app.core.hashing import password_pool
+from app.core.security import create_access_token, security_stamp, settings
 from datetime import timedelta
 
 router = APIRouter()
@@ -11,14 +12,14 @@ router = APIRouter()
 @router.post("/token")
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
     # 1. Find user by username
     statement = select(User).where(User.username == form_data.username)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     
-    # 2. Verify user and password
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # 2. Verify user and password (bcrypt runs in the bounded hashing pool)
+    if not user or not await password_pool.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -27,8 +28,11 @@ async def login_for_access_token(
     
     # 3. Create Access Token
     access_token_expires = timedelta(minutes=60) # 1 hour for demo
+    claims = {"sub": user.username, "ver": security_stamp(user)}
+    if settings.AUTH_EMBED_CLAIMS:
+        claims.update({"uid": user.id, "su": user.is_superuser, "act": user.is_active})
     access_token = create_access_token(
-        data={"sub": user.username},
+        data=claims,
         expires_delta=access_token_expires
     )
     
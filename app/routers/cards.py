@@ -1,83 +1,313 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.database import get_session
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy import delete, or_, tuple_
+from sqlmodel import func, select
+from app.database import DBSession, get_session
+from app.models.batch import BatchIds, BatchItemResult
 from app.models.card import (
     NavigationCard,
+    NavigationCardBatchResult,
+    NavigationCardBatchUpdate,
     NavigationCardCreate,
+    NavigationCardPage,
     NavigationCardRead,
     NavigationCardUpdate,
 )
 from app.models.category import Category
+from app.core import batch
 from app.core.deps import get_current_superuser
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.serialization import FastJSONResponse, columns_of
+from app.services import cache_versions, clicks, fonts, search, tailwind
+from app.services.navigation import navigation_snapshot
 
 router = APIRouter()
+CARD_COLUMNS = columns_of(NavigationCard, NavigationCardRead)
 
-@router.get("/", response_model=List[NavigationCardRead])
-def read_cards(
-    category_id: Optional[int] = None,
-    skip: int = 0,
+def _card_filters(category_id: Optional[int], q: Optional[str]) -> list:
+    filters = []
+    if category_id:
+        filters.append(NavigationCard.category_id == category_id)
+    if q:
+        filters.append(or_(
+            NavigationCard.title.contains(q, autoescape=True),
+            NavigationCard.subtitle.contains(q, autoescape=True),
+            NavigationCard.description.contains(q, autoescape=True),
+            NavigationCard.href.contains(q, autoescape=True),
+        ))
+    return filters
+
+
+async def card_page(
+    session: DBSession,
+    cursor: str = "",
     limit: int = 100,
-    session: Session = Depends(get_session)
-):
-    query = select(NavigationCard)
+    category_id: Optional[int] = None,
+    q: Optional[str] = None,
+    with_total: bool = False,
+) -> Dict[str, Any]:
+    """One keyset page over ``(category_id, order, id)``, optionally filtered.
+
+    Shaped like ``NavigationCardPage`` but built from column tuples and not
+    validated, for ``FastJSONResponse``.
+    """
+    after = decode_cursor(cursor, 3)
+    filters = _card_filters(category_id, q)
+    query = select(*CARD_COLUMNS.columns).where(*filters)
     if category_id:
-        query = query.where(NavigationCard.category_id == category_id)
-    
-    query = query.order_by(NavigationCard.order).offset(skip).limit(limit)
-    cards = session.exec(query).all()
-    return cards
+        if after:
+            query = query.where(tuple_(NavigationCard.order, NavigationCard.id) > after[1:])
+    elif after:
+        query = query.where(
+            tuple_(NavigationCard.category_id, NavigationCard.order, NavigationCard.id) > after
+        )
+    query = query.order_by(NavigationCard.category_id, NavigationCard.order, NavigationCard.id)
+    cards = CARD_COLUMNS.dicts((await session.exec(query.limit(limit + 1))).all())
+
+    next_cursor = None
+    if len(cards) > limit:
+        cards = cards[:limit]
+        last = cards[-1]
+        next_cursor = encode_cursor(last["category_id"], last["order"], last["id"])
+    total = None
+    if with_total:
+        total = (await session.exec(
+            select(func.count()).select_from(NavigationCard).where(*filters)
+        )).one()
+    return {"items": cards, "next_cursor": next_cursor, "total": total}
+
+
+@router.get("/", response_model=Union[NavigationCardPage, List[NavigationCardRead]])
+async def read_cards(
+    category_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    with_total: bool = False,
+    session: DBSession = Depends(get_session)
+):
+    """List cards in display order.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination over ``(category_id, order, id)`` and returns a page with a
+    ``next_cursor`` (and the match count with ``with_total=true``); without
+    it the plain ``skip``/``limit`` list is returned. ``q`` keeps cards whose
+    title, subtitle, description or link contains it.
+
+    The response model documents the shape; rows are encoded directly.
+    """
+    if cursor is None:
+        query = select(*CARD_COLUMNS.columns).where(*_card_filters(category_id, q))
+        query = query.order_by(NavigationCard.order, NavigationCard.id).offset(skip).limit(limit)
+        return FastJSONResponse(CARD_COLUMNS.dicts((await session.exec(query)).all()))
+    return FastJSONResponse(await card_page(session, cursor, limit, category_id, q, with_total))
 
 @router.post("/", response_model=NavigationCardRead)
-def create_card(
+async def create_card(
     card: NavigationCardCreate,
-    session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
+    session: DBSession = Depends(get_session),
     current_user = Depends(get_current_superuser)
 ):
-    category = session.get(Category, card.category_id)
+    category = await session.get(Category, card.category_id)
     if not category:
         raise HTTPException(status_code=400, detail="Category not found")
 
     db_card = NavigationCard(**card.model_dump())
     session.add(db_card)
-    session.commit()
-    session.refresh(db_card)
+    await session.flush()
+    await session.run_sync(search.sync_cards, [db_card.id])
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    navigation_snapshot.invalidate()
+    await session.refresh(db_card)
+    background_tasks.add_task(
+        tailwind.ensure_classes, [db_card.icon_bg_class, db_card.icon_color_class]
+    )
+    background_tasks.add_task(fonts.ensure_icons, [db_card.icon])
     return db_card
 
+async def _commit_cards(
+    session: DBSession, background_tasks: BackgroundTasks, cards: List[NavigationCard]
+) -> None:
+    """Commit a batch and refresh derived caches and assets once for all of it."""
+    await session.flush()
+    await session.run_sync(search.sync_cards, [card.id for card in cards])
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    navigation_snapshot.invalidate()
+    if cards:
+        classes = [cls for card in cards for cls in (card.icon_bg_class, card.icon_color_class)]
+        background_tasks.add_task(tailwind.ensure_classes, classes)
+        background_tasks.add_task(fonts.ensure_icons, [card.icon for card in cards])
+
+
+def _card_results(
+    failed: List[NavigationCardBatchResult], applied: List[Tuple[int, NavigationCard]]
+) -> List[NavigationCardBatchResult]:
+    results = failed + [
+        NavigationCardBatchResult(
+            index=index, id=card.id, ok=True, card=NavigationCardRead.model_validate(card)
+        )
+        for index, card in applied
+    ]
+    return sorted(results, key=lambda result: result.index)
+
+
+@router.post("/batch", response_model=List[NavigationCardBatchResult])
+async def create_cards(
+    cards: List[NavigationCardCreate],
+    background_tasks: BackgroundTasks,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    known = await batch.existing_ids(session, Category, {card.category_id for card in cards})
+    failed: List[NavigationCardBatchResult] = []
+    applied: List[Tuple[int, NavigationCard]] = []
+    for index, card in enumerate(cards):
+        if card.category_id not in known:
+            failed.append(NavigationCardBatchResult(index=index, ok=False, detail="Category not found"))
+        else:
+            applied.append((index, NavigationCard(**card.model_dump())))
+
+    batch.raise_if_failed(failed, atomic)
+    if applied:
+        session.add_all([card for _, card in applied])
+        await _commit_cards(session, background_tasks, [card for _, card in applied])
+    return _card_results(failed, applied)
+
+
+@router.put("/batch", response_model=List[NavigationCardBatchResult])
+async def update_cards(
+    items: List[NavigationCardBatchUpdate],
+    background_tasks: BackgroundTasks,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    ids = {item.id for item in items}
+    cards = {
+        card.id: card
+        for card in (await session.exec(select(NavigationCard).where(NavigationCard.id.in_(ids)))).all()
+    }
+    known = await batch.existing_ids(
+        session, Category, {item.category_id for item in items if item.category_id is not None}
+    )
+
+    failed: List[NavigationCardBatchResult] = []
+    changes: List[Tuple[int, NavigationCard, dict]] = []
+    for index, item in enumerate(items):
+        card = cards.get(item.id)
+        data = item.model_dump(exclude_unset=True, exclude={"id"})
+        if card is None:
+            failed.append(NavigationCardBatchResult(index=index, id=item.id, ok=False, detail="Card not found"))
+        elif "category_id" in data and data["category_id"] not in known:
+            failed.append(NavigationCardBatchResult(index=index, id=item.id, ok=False, detail="Category not found"))
+        else:
+            changes.append((index, card, data))
+
+    batch.raise_if_failed(failed, atomic)
+    now = datetime.utcnow()
+    for _, card, data in changes:
+        for key, value in data.items():
+            setattr(card, key, value)
+        card.updated_at = now
+    if changes:
+        await _commit_cards(session, background_tasks, [card for _, card, _ in changes])
+    return _card_results(failed, [(index, card) for index, card, _ in changes])
+
+
+@router.post("/batch/delete", response_model=List[BatchItemResult])
+async def delete_cards(
+    payload: BatchIds,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    known = await batch.existing_ids(session, NavigationCard, set(payload.ids))
+    results = [
+        BatchItemResult(index=index, id=card_id, ok=card_id in known,
+                        detail=None if card_id in known else "Card not found")
+        for index, card_id in enumerate(payload.ids)
+    ]
+    batch.raise_if_failed(results, atomic)
+    if known:
+        await session.execute(clicks.forget_statement(known))
+        await session.execute(delete(NavigationCard).where(NavigationCard.id.in_(known)))
+        await session.run_sync(search.sync_cards, known)
+        await cache_versions.bump(session, cache_versions.NAVIGATION)
+        await session.commit()
+        clicks.recorder.forget(known)
+        navigation_snapshot.invalidate()
+    return results
+
+
+@router.put("/reorder", response_model=List[BatchItemResult])
+async def reorder_cards(
+    payload: BatchIds,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    """Set each card's ``order`` to its position in ``ids``."""
+    results = await batch.reorder(session, NavigationCard, payload.ids, atomic, "Card not found")
+    if any(result.ok for result in results):
+        await cache_versions.bump(session, cache_versions.NAVIGATION)
+        await session.commit()
+        navigation_snapshot.invalidate()
+    return results
+
 @router.put("/{card_id}", response_model=NavigationCardRead)
-def update_card(
+async def update_card(
     card_id: int,
     card_data: NavigationCardUpdate,
-    session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
+    session: DBSession = Depends(get_session),
     current_user = Depends(get_current_superuser)
 ):
-    card = session.get(NavigationCard, card_id)
+    card = await session.get(NavigationCard, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
     card_data_dict = card_data.model_dump(exclude_unset=True)
     if "category_id" in card_data_dict:
-        category = session.get(Category, card_data_dict["category_id"])
+        category = await session.get(Category, card_data_dict["category_id"])
         if not category:
             raise HTTPException(status_code=400, detail="Category not found")
 
     for key, value in card_data_dict.items():
         setattr(card, key, value)
+    card.updated_at = datetime.utcnow()
             
     session.add(card)
-    session.commit()
-    session.refresh(card)
+    await session.run_sync(search.sync_cards, [card.id])
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    navigation_snapshot.invalidate()
+    await session.refresh(card)
+    background_tasks.add_task(
+        tailwind.ensure_classes, [card.icon_bg_class, card.icon_color_class]
+    )
+    background_tasks.add_task(fonts.ensure_icons, [card.icon])
     return card
 
 @router.delete("/{card_id}")
-def delete_card(
+async def delete_card(
     card_id: int,
-    session: Session = Depends(get_session),
+    session: DBSession = Depends(get_session),
     current_user = Depends(get_current_superuser)
 ):
-    card = session.get(NavigationCard, card_id)
+    card = await session.get(NavigationCard, card_id)
     if not card:
         raise HTTPException(status_code=404, detail="Card not found")
-    session.delete(card)
-    session.commit()
+    await session.execute(clicks.forget_statement([card_id]))
+    await session.delete(card)
+    await session.run_sync(search.sync_cards, [card_id])
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    clicks.recorder.forget([card_id])
+    navigation_snapshot.invalidate()
     return {"ok": True}
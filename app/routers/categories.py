@@ -1,80 +1,252 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from app.database import get_session
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import delete
+from sqlmodel import select
+from app.database import DBSession, get_session
+from app.models.batch import BatchIds, BatchItemResult
 from app.models.category import (
     Category,
+    CategoryBatchResult,
+    CategoryBatchUpdate,
     CategoryCreate,
     CategoryRead,
     CategoryUpdate,
 )
 from app.models.card import NavigationCard
+from app.core import batch
 from app.core.deps import get_current_superuser
+from app.core.serialization import FastJSONResponse, columns_of
+from app.services import cache_versions, clicks, fonts, search
+from app.services.navigation import navigation_snapshot
 
 router = APIRouter()
+CATEGORY_COLUMNS = columns_of(Category, CategoryRead)
 
 @router.get("/", response_model=List[CategoryRead])
-def read_categories(
+async def read_categories(
     skip: int = 0,
     limit: int = 100,
-    session: Session = Depends(get_session)
+    session: DBSession = Depends(get_session)
 ):
-    categories = session.exec(select(Category).order_by(Category.order).offset(skip).limit(limit)).all()
-    return categories
+    query = select(*CATEGORY_COLUMNS.columns).order_by(Category.order).offset(skip).limit(limit)
+    return FastJSONResponse(CATEGORY_COLUMNS.dicts((await session.exec(query)).all()))
 
 @router.post("/", response_model=CategoryRead)
-def create_category(
+async def create_category(
     category: CategoryCreate,
-    session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
+    session: DBSession = Depends(get_session),
     current_user = Depends(get_current_superuser)
 ):
     db_category = Category(**category.model_dump())
     session.add(db_category)
-    session.commit()
-    session.refresh(db_category)
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    navigation_snapshot.invalidate()
+    await session.refresh(db_category)
+    background_tasks.add_task(fonts.ensure_icons, [db_category.icon])
     return db_category
 
+async def _commit_categories(
+    session: DBSession, background_tasks: BackgroundTasks, categories: List[Category]
+) -> None:
+    """Commit a batch and refresh derived caches and assets once for all of it."""
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    navigation_snapshot.invalidate()
+    if categories:
+        background_tasks.add_task(fonts.ensure_icons, [category.icon for category in categories])
+
+
+def _category_results(
+    failed: List[CategoryBatchResult], applied: List[Tuple[int, Category]]
+) -> List[CategoryBatchResult]:
+    results = failed + [
+        CategoryBatchResult(
+            index=index, id=category.id, ok=True, category=CategoryRead.model_validate(category)
+        )
+        for index, category in applied
+    ]
+    return sorted(results, key=lambda result: result.index)
+
+
+async def _taken_slugs(session: DBSession, slugs: Set[str]) -> Dict[str, int]:
+    if not slugs:
+        return {}
+    rows = (await session.exec(select(Category.slug, Category.id).where(Category.slug.in_(slugs)))).all()
+    return {slug: category_id for slug, category_id in rows}
+
+
+@router.post("/batch", response_model=List[CategoryBatchResult])
+async def create_categories(
+    categories: List[CategoryCreate],
+    background_tasks: BackgroundTasks,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    taken = set(await _taken_slugs(session, {category.slug for category in categories}))
+    failed: List[CategoryBatchResult] = []
+    applied: List[Tuple[int, Category]] = []
+    for index, category in enumerate(categories):
+        if category.slug in taken:
+            failed.append(CategoryBatchResult(index=index, ok=False, detail="Slug already exists"))
+        else:
+            taken.add(category.slug)
+            applied.append((index, Category(**category.model_dump())))
+
+    batch.raise_if_failed(failed, atomic)
+    if applied:
+        session.add_all([category for _, category in applied])
+        await _commit_categories(session, background_tasks, [category for _, category in applied])
+    return _category_results(failed, applied)
+
+
+@router.put("/batch", response_model=List[CategoryBatchResult])
+async def update_categories(
+    items: List[CategoryBatchUpdate],
+    background_tasks: BackgroundTasks,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    ids = {item.id for item in items}
+    categories = {
+        category.id: category
+        for category in (await session.exec(select(Category).where(Category.id.in_(ids)))).all()
+    }
+    owners = await _taken_slugs(session, {item.slug for item in items if item.slug is not None})
+
+    failed: List[CategoryBatchResult] = []
+    changes: List[Tuple[int, Category, dict]] = []
+    for index, item in enumerate(items):
+        category = categories.get(item.id)
+        data = item.model_dump(exclude_unset=True, exclude={"id"})
+        if category is None:
+            failed.append(CategoryBatchResult(index=index, id=item.id, ok=False, detail="Category not found"))
+            continue
+        slug = data.get("slug")
+        if slug is not None and owners.get(slug, category.id) != category.id:
+            failed.append(CategoryBatchResult(index=index, id=item.id, ok=False, detail="Slug already exists"))
+            continue
+        if slug is not None:
+            owners[slug] = category.id
+        changes.append((index, category, data))
+
+    batch.raise_if_failed(failed, atomic)
+    now = datetime.utcnow()
+    for _, category, data in changes:
+        for key, value in data.items():
+            setattr(category, key, value)
+        category.updated_at = now
+    if changes:
+        await session.run_sync(
+            search.sync_categories, [category.id for _, category, data in changes if "label" in data]
+        )
+        await _commit_categories(session, background_tasks, [category for _, category, _ in changes])
+    return _category_results(failed, [(index, category) for index, category, _ in changes])
+
+
+@router.post("/batch/delete", response_model=List[BatchItemResult])
+async def delete_categories(
+    payload: BatchIds,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    known = await batch.existing_ids(session, Category, set(payload.ids))
+    results = [
+        BatchItemResult(index=index, id=category_id, ok=category_id in known,
+                        detail=None if category_id in known else "Category not found")
+        for index, category_id in enumerate(payload.ids)
+    ]
+    batch.raise_if_failed(results, atomic)
+    if known:
+        # Remove related cards and their clicks first to prevent orphan foreign keys
+        card_ids = (await session.exec(
+            select(NavigationCard.id).where(NavigationCard.category_id.in_(known))
+        )).all()
+        await session.run_sync(search.remove_categories, known)
+        await session.execute(clicks.forget_statement(card_ids))
+        await session.execute(delete(NavigationCard).where(NavigationCard.category_id.in_(known)))
+        await session.execute(delete(Category).where(Category.id.in_(known)))
+        await cache_versions.bump(session, cache_versions.NAVIGATION)
+        await session.commit()
+        clicks.recorder.forget(card_ids)
+        navigation_snapshot.invalidate()
+    return results
+
+
+@router.put("/reorder", response_model=List[BatchItemResult])
+async def reorder_categories(
+    payload: BatchIds,
+    atomic: bool = False,
+    session: DBSession = Depends(get_session),
+    current_user = Depends(get_current_superuser)
+):
+    """Set each category's ``order`` to its position in ``ids``."""
+    results = await batch.reorder(session, Category, payload.ids, atomic, "Category not found")
+    if any(result.ok for result in results):
+        await cache_versions.bump(session, cache_versions.NAVIGATION)
+        await session.commit()
+        navigation_snapshot.invalidate()
+    return results
+
 @router.put("/{category_id}", response_model=CategoryRead)
-def update_category(
+async def update_category(
     category_id: int,
     category_data: CategoryUpdate,
-    session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
+    session: DBSession = Depends(get_session),
     current_user = Depends(get_current_superuser)
 ):
-    category = session.get(Category, category_id)
+    category = await session.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
     category_data_dict = category_data.model_dump(exclude_unset=True)
 
     if "slug" in category_data_dict and category_data_dict["slug"] != category.slug:
-        exists = session.exec(select(Category).where(Category.slug == category_data_dict["slug"]))
+        exists = await session.exec(select(Category).where(Category.slug == category_data_dict["slug"]))
         if exists.first():
             raise HTTPException(status_code=400, detail="Slug already exists")
 
     for key, value in category_data_dict.items():
         setattr(category, key, value)
+    category.updated_at = datetime.utcnow()
             
     session.add(category)
-    session.commit()
-    session.refresh(category)
+    if "label" in category_data_dict:
+        await session.run_sync(search.sync_categories, [category.id])
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    navigation_snapshot.invalidate()
+    await session.refresh(category)
+    background_tasks.add_task(fonts.ensure_icons, [category.icon])
     return category
 
 @router.delete("/{category_id}")
-def delete_category(
+async def delete_category(
     category_id: int,
-    session: Session = Depends(get_session),
+    session: DBSession = Depends(get_session),
     current_user = Depends(get_current_superuser)
 ):
-    category = session.get(Category, category_id)
+    category = await session.get(Category, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    # Remove related cards first to prevent orphan foreign keys
-    cards = session.exec(select(NavigationCard).where(NavigationCard.category_id == category_id)).all()
+    # Remove related cards and their clicks first to prevent orphan foreign keys
+    await session.run_sync(search.remove_categories, [category_id])
+    cards = (await session.exec(select(NavigationCard).where(NavigationCard.category_id == category_id))).all()
+    card_ids = [card.id for card in cards]
+    await session.execute(clicks.forget_statement(card_ids))
     for card in cards:
-        session.delete(card)
+        await session.delete(card)
 
-    session.delete(category)
-    session.commit()
+    await session.delete(category)
+    await cache_versions.bump(session, cache_versions.NAVIGATION)
+    await session.commit()
+    clicks.recorder.forget(card_ids)
+    navigation_snapshot.invalidate()
     return {"ok": True}
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Response
+
+from app.config import get_settings
+from app.database import DBSession, get_session
+from app.services import cache_versions
+from app.services.clicks import recorder
+from app.services.navigation import navigation_snapshot
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.post("/clicks/{card_id}", status_code=204)
+async def record_click(
+    card_id: int, background_tasks: BackgroundTasks, session: DBSession = Depends(get_session)
+):
+    """Click beacon: counted in memory, written to the database in batches.
+
+    Only cards in the current navigation are counted, so made-up ids cannot
+    fill the counters or the aggregate table.
+    """
+    if not settings.CLICK_TRACKING_ENABLED:
+        return Response(status_code=204)
+    await cache_versions.refresh(session)
+    entry = navigation_snapshot.current or await session.run_sync(navigation_snapshot.get)
+    if card_id in entry.card_ids and recorder.record(card_id):
+        background_tasks.add_task(recorder.flush)
+    return Response(status_code=204)
@@ -1,29 +1,27 @@
-from typing import Optional
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Dict, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends
 from pydantic import BaseModel
-from sqlmodel import Session, select
+from sqlmodel import select
 
-from app.database import get_session
+from app.database import DBSession, get_session
 from app.models import SiteConfig
 from app.core.deps import get_current_superuser
-from app.config import get_settings
+from app.services import cache_versions, fonts
+from app.services.navigation import navigation_snapshot
+from app.services.site_config import (
+    BRANDING_ICON_KEY,
+    BRANDING_TITLE_KEY,
+    SEARCH_ENGINE_NAME_KEY,
+    SEARCH_ENGINE_URL_KEY,
+    SEARCH_PLACEHOLDER_KEY,
+    SiteConfigCache,
+    get_site_config,
+    site_config_cache,
+)
 
 router = APIRouter()
 
-settings = get_settings()
-
-SEARCH_PLACEHOLDER_KEY = "hero_search_placeholder"
-SEARCH_ENGINE_NAME_KEY = "search_engine_name"
-SEARCH_ENGINE_URL_KEY = "search_engine_url"
-BRANDING_TITLE_KEY = "branding_title"
-BRANDING_ICON_KEY = "branding_icon"
-DEFAULT_PLACEHOLDER = "搜索工具、资源..."
-DEFAULT_ENGINE_NAME = "Google"
-DEFAULT_ENGINE_URL = settings.GOOGLE_SEARCH_URL or "https://www.google.com/search?q={query}"
-DEFAULT_BRANDING_TITLE = settings.APP_NAME or "个人导航网站"
-DEFAULT_BRANDING_ICON = "hub"
-
-
 class SearchConfigResponse(BaseModel):
     placeholder: str
     engine_name: str
@@ -46,14 +44,15 @@ class BrandingConfigUpdate(BaseModel):
     icon: Optional[str] = None
 
 
-def _get_config_value(session: Session, key: str) -> Optional[SiteConfig]:
-    return session.exec(select(SiteConfig).where(SiteConfig.key == key)).first()
+async def _get_config_value(session: DBSession, key: str) -> Optional[SiteConfig]:
+    return (await session.exec(select(SiteConfig).where(SiteConfig.key == key))).first()
 
 
-def _upsert_config(session: Session, key: str, value: str) -> SiteConfig:
-    config = _get_config_value(session, key)
+async def _upsert_config(session: DBSession, key: str, value: str) -> SiteConfig:
+    config = await _get_config_value(session, key)
     if config:
         config.value = value
+        config.updated_at = datetime.utcnow()
     else:
         config = SiteConfig(key=key, value=value)
         session.add(config)
@@ -61,77 +60,84 @@ def _upsert_config(session: Session, key: str, value: str) -> SiteConfig:
     return config
 
 
-def _build_search_config(session: Session) -> SearchConfigResponse:
-    placeholder = _get_config_value(session, SEARCH_PLACEHOLDER_KEY)
-    engine_name = _get_config_value(session, SEARCH_ENGINE_NAME_KEY)
-    engine_url = _get_config_value(session, SEARCH_ENGINE_URL_KEY)
-
+def build_search_config(config: SiteConfigCache) -> SearchConfigResponse:
     return SearchConfigResponse(
-        placeholder=placeholder.value if placeholder else DEFAULT_PLACEHOLDER,
-        engine_name=engine_name.value if engine_name else DEFAULT_ENGINE_NAME,
-        engine_url=engine_url.value if engine_url else DEFAULT_ENGINE_URL,
+        placeholder=config.search_placeholder,
+        engine_name=config.search_engine_name,
+        engine_url=config.search_engine_url,
     )
 
 
-def _build_branding_config(session: Session) -> BrandingConfigResponse:
-    title = _get_config_value(session, BRANDING_TITLE_KEY)
-    icon = _get_config_value(session, BRANDING_ICON_KEY)
-
+def build_branding_config(config: SiteConfigCache) -> BrandingConfigResponse:
     return BrandingConfigResponse(
-        title=title.value if title else DEFAULT_BRANDING_TITLE,
-        icon=icon.value if icon else DEFAULT_BRANDING_ICON,
+        title=config.branding_title,
+        icon=config.branding_icon,
     )
 
 
+async def _commit_configs(session: DBSession, values: Dict[str, str]) -> None:
+    """Commit upserted keys and write them through to the config cache."""
+    await cache_versions.bump(session, cache_versions.SITE_CONFIG, cache_versions.NAVIGATION)
+    await session.commit()
+    for key, value in values.items():
+        site_config_cache.set(key, value)
+    navigation_snapshot.invalidate()
+
+
 @router.get("/search", response_model=SearchConfigResponse)
-def get_search_config(
-    session: Session = Depends(get_session),
+async def get_search_config(
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
-    return _build_search_config(session)
+    return build_search_config(await get_site_config(session))
 
 
 @router.put("/search", response_model=SearchConfigResponse)
-def update_search_config(
+async def update_search_config(
     payload: SearchConfigUpdate,
-    session: Session = Depends(get_session),
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
     data = payload.model_dump(exclude_unset=True)
+    fields = {
+        "placeholder": SEARCH_PLACEHOLDER_KEY,
+        "engine_name": SEARCH_ENGINE_NAME_KEY,
+        "engine_url": SEARCH_ENGINE_URL_KEY,
+    }
+    values = {fields[name]: value for name, value in data.items() if name in fields}
 
-    if "placeholder" in data:
-        _upsert_config(session, SEARCH_PLACEHOLDER_KEY, data["placeholder"])
-    if "engine_name" in data:
-        _upsert_config(session, SEARCH_ENGINE_NAME_KEY, data["engine_name"])
-    if "engine_url" in data:
-        _upsert_config(session, SEARCH_ENGINE_URL_KEY, data["engine_url"])
+    for key, value in values.items():
+        await _upsert_config(session, key, value)
 
-    session.commit()
+    await _commit_configs(session, values)
 
-    return _build_search_config(session)
+    return build_search_config(await get_site_config(session))
 
 
 @router.get("/branding", response_model=BrandingConfigResponse)
-def get_branding_config(
-    session: Session = Depends(get_session),
+async def get_branding_config(
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
-    return _build_branding_config(session)
+    return build_branding_config(await get_site_config(session))
 
 
 @router.put("/branding", response_model=BrandingConfigResponse)
-def update_branding_config(
+async def update_branding_config(
     payload: BrandingConfigUpdate,
-    session: Session = Depends(get_session),
+    background_tasks: BackgroundTasks,
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
     data = payload.model_dump(exclude_unset=True)
+    fields = {"title": BRANDING_TITLE_KEY, "icon": BRANDING_ICON_KEY}
+    values = {fields[name]: value for name, value in data.items() if name in fields}
 
-    if "title" in data:
-        _upsert_config(session, BRANDING_TITLE_KEY, data["title"])
-    if "icon" in data:
-        _upsert_config(session, BRANDING_ICON_KEY, data["icon"])
+    for key, value in values.items():
+        await _upsert_config(session, key, value)
 
-    session.commit()
+    await _commit_configs(session, values)
+    if "icon" in data:
+        background_tasks.add_task(fonts.ensure_icons, [data["icon"]])
 
-    return _build_branding_config(session)
+    return build_branding_config(await get_site_config(session))
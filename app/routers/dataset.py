@@ -0,0 +1,36 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.deps import get_current_superuser
+from app.services import dataset, fonts, tailwind
+
+router = APIRouter()
+
+
+@router.get("/export")
+async def export_dataset(current_user = Depends(get_current_superuser)):
+    # The generator streams rows from the sync engine; Starlette iterates it
+    # in the threadpool.
+    return StreamingResponse(
+        dataset.export_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="navigation.ndjson"'},
+    )
+
+
+@router.post("/import")
+async def import_dataset(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_superuser)
+):
+    """Upsert a JSON or NDJSON dataset; the format follows the file name."""
+    try:
+        importer = await run_in_threadpool(
+            dataset.import_file, file.file, dataset.format_for(file.filename)
+        )
+    except dataset.DatasetError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    background_tasks.add_task(tailwind.ensure_classes, importer.classes)
+    background_tasks.add_task(fonts.ensure_icons, importer.icons)
+    return importer.stats
@@ -0,0 +1,78 @@
+import hashlib
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from app.config import get_settings
+from app.core.http_cache import cache_headers, is_not_modified
+from app.database import DBSession, get_session
+from app.services import cache_versions
+from app.services.favicons import fetcher
+from app.services.navigation import NavigationEntry, navigation_snapshot
+
+router = APIRouter()
+settings = get_settings()
+
+
+async def _snapshot(session: DBSession) -> NavigationEntry:
+    if not settings.FAVICONS_ENABLED:
+        raise HTTPException(status_code=404, detail="Favicons are disabled")
+    await cache_versions.refresh(session)
+    return navigation_snapshot.current or await session.run_sync(navigation_snapshot.get)
+
+
+@router.get("/favicons/sections/{slug}")
+async def get_section_favicons(slug: str, request: Request, session: DBSession = Depends(get_session)):
+    """The icons of one section's cards as data URIs, so a section costs one request.
+
+    Returns ``{"cards": {card id: host}, "icons": {host: data URI}, "pending": [host]}``.
+    Hosts not fetched within FAVICON_BUNDLE_WAIT seconds are listed as pending
+    and the bundle is not cached, so the page picks them up next time.
+    """
+    entry = await _snapshot(session)
+    origins, sections = fetcher.hosts(entry)
+    cards = sections.get(slug)
+    if cards is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    hosts = {host: origins[host] for host in cards.values()}
+    ready, pending = await fetcher.bundle(hosts, settings.FAVICON_BUNDLE_WAIT)
+    icons = {host: icon.data_uri() for host, icon in sorted(ready.items()) if icon.body is not None}
+    body = json.dumps(
+        {
+            "cards": {card_id: host for card_id, host in cards.items() if host in icons},
+            "icons": icons,
+            "pending": sorted(pending),
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    if pending:
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    else:
+        headers = cache_headers(etag, entry.last_modified, settings.FAVICON_BROWSER_MAX_AGE, 0)
+    if is_not_modified(request, etag, entry.last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/favicons/{host}")
+async def get_favicon(host: str, request: Request, session: DBSession = Depends(get_session)):
+    """The icon of a host some card links to, fetched on first use."""
+    entry = await _snapshot(session)
+    origins, _ = fetcher.hosts(entry)
+    origin = origins.get(host.lower())
+    if origin is None:
+        raise HTTPException(status_code=404, detail="Unknown host")
+    icon = await fetcher.get(host.lower(), origin)
+    if icon.body is None:
+        # Remembered misses are cached by the browser too.
+        return Response(
+            status_code=404,
+            headers={"Cache-Control": f"public, max-age={settings.FAVICON_BROWSER_MAX_AGE}"},
+        )
+    fetched_at = datetime.utcfromtimestamp(icon.fetched_at)
+    headers = cache_headers(icon.etag, fetched_at, settings.FAVICON_BROWSER_MAX_AGE, 0)
+    if is_not_modified(request, icon.etag, fetched_at):
+        return Response(status_code=304, headers=headers)
+    return Response(content=icon.body, media_type=icon.content_type, headers=headers)
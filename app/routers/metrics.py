@@ -0,0 +1,28 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+
+from app.config import get_settings
+from app.core import metrics
+
+router = APIRouter()
+settings = get_settings()
+
+
+def require_metrics_token(authorization: str = Header("")) -> None:
+    """``/metrics`` shares the public port, so it is only served with METRICS_TOKEN as a bearer token."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not secrets.compare_digest(authorization.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+def get_metrics():
+    # Rendering reads every worker's files in multiprocess mode; keep it off
+    # the event loop.
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
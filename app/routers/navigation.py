@@ -1,106 +1,55 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from app.database import get_session
-from app.models import Category, NavigationCard, SiteConfig
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app.config import get_settings
+from app.core.http_cache import cache_headers, is_not_modified
+from app.database import DBSession, get_session
+from app.services import cache_versions
+from app.services.navigation import NavigationEntry, navigation_snapshot
 
 router = APIRouter()
 settings = get_settings()
 
 
-def _ensure_query_placeholder(url: str) -> str:
-    if not url:
-        return "https://www.google.com/search?q={query}"
-    if "{query}" in url:
-        return url
-    separator = "&" if "?" in url else "?"
-    return f"{url}{separator}q={{query}}"
+async def _snapshot(session: DBSession) -> NavigationEntry:
+    # The payload is served from a pre-serialized snapshot that is rebuilt
+    # only after a category, card or config write invalidates it. While the
+    # snapshot is warm, conditional requests are answered without a query
+    # apart from the periodic cache version poll.
+    await cache_versions.refresh(session)
+    return navigation_snapshot.current or await session.run_sync(navigation_snapshot.get)
+
+
+def _respond(request: Request, body: bytes, etag: str, last_modified: datetime) -> Response:
+    headers = cache_headers(
+        etag,
+        last_modified,
+        settings.NAVIGATION_CACHE_MAX_AGE,
+        settings.NAVIGATION_STALE_WHILE_REVALIDATE,
+    )
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.get("/navigation")
-def get_navigation_data(session: Session = Depends(get_session)):
-    # Fetch Categories (ordered)
-    categories = session.exec(select(Category).order_by(Category.order)).all()
-    
-    # Fetch Configs
-    configs = session.exec(select(SiteConfig)).all()
-    config_dict = {c.key: c.value for c in configs}
-    
-    # Construct Menu Items
-    menu_items = []
-    sections = []
-    
-    for cat in categories:
-        # Menu Item
-        menu_items.append({
-            "id": cat.slug,
-            "label": cat.label,
-            "icon": cat.icon,
-            "href": "#",
-            "active": cat.active
-        })
-        
-        # Section with Cards
-        # Efficiently fetching cards for this category (N+1 problem here but fine for small scale)
-        # For better performance, we could join or fetch all cards and map in memory.
-        # Let's use the relationship.
-        cards = sorted(cat.cards, key=lambda x: x.order)
-        
-        card_list = []
-        for card in cards:
-            card_list.append({
-                "title": card.title,
-                "subtitle": card.subtitle,
-                "description": card.description,
-                "icon": card.icon,
-                "iconBgClass": card.icon_bg_class,
-                "iconColorClass": card.icon_color_class,
-                "href": card.href
-            })
-            
-        sections.append({
-            "id": cat.slug,
-            "type": "grid",
-            "title": cat.label,
-            "cards": card_list
-        })
+async def get_navigation_data(request: Request, session: DBSession = Depends(get_session)):
+    entry = await _snapshot(session)
+    return _respond(request, entry.body, entry.etag, entry.last_modified)
+
+
+@router.get("/navigation/shell")
+async def get_navigation_shell(request: Request, session: DBSession = Depends(get_session)):
+    """Branding, menu (with card counts per section), header and hero, without cards."""
+    entry = await _snapshot(session)
+    return _respond(request, entry.shell.body, entry.shell.etag, entry.last_modified)
+
 
-    # Construct Final JSON
-    return {
-        "branding": {
-            "icon": config_dict.get("branding_icon", "hub"),
-            "title": config_dict.get("branding_title", "个人导航网站")
-        },
-        "sidebar": {
-            "menuItems": menu_items,
-            "status": {
-                "indicator": {
-                    "icon": "circle",
-                    "colorClass": "text-green-500",
-                    "text": "状态: 正常",
-                    "tooltip": "所有系统运行正常"
-                },
-                "refresh": {
-                    "icon": "sync",
-                    "tooltip": "刚刚更新"
-                }
-            }
-        },
-        "header": {
-            "links": [
-                {
-                    "label": "主站",
-                    "href": "/"
-                }
-            ]
-        },
-        "hero": {
-            "searchPlaceholder": config_dict.get("hero_search_placeholder", "搜索工具、资源..."),
-            "searchEngine": {
-                "name": config_dict.get("search_engine_name", "Google"),
-                "url": _ensure_query_placeholder(
-                    config_dict.get("search_engine_url", settings.GOOGLE_SEARCH_URL)
-                )
-            }
-        },
-        "sections": sections
-    }
+@router.get("/navigation/sections/{slug}")
+async def get_navigation_section(slug: str, request: Request, session: DBSession = Depends(get_session)):
+    """One section with its cards, revalidated by its own ETag."""
+    entry = await _snapshot(session)
+    section = entry.sections.get(slug)
+    if section is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    return _respond(request, section.body, section.etag, entry.last_modified)
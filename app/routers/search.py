@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from app.core.serialization import FastJSONResponse
+from app.database import DBSession, get_session
+from app.services import search
+
+router = APIRouter()
+
+
+@router.get("/search")
+async def search_cards(
+    q: str = Query("", max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    session: DBSession = Depends(get_session)
+):
+    results = await session.run_sync(search.search_cards, q, limit)
+    return FastJSONResponse({"query": q, "results": results})
@@ -1,12 +1,26 @@
 from fastapi import APIRouter
-from datetime import datetime
+from fastapi.responses import JSONResponse
+
+from app.services import health
 
 router = APIRouter()
 
+# Probes must see the live state, never a proxy's copy.
+_NO_STORE = {"Cache-Control": "no-store"}
+
+
 @router.get("/status")
-def get_status():
-    return {
-        "status": "ok",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": "0.1.0"
-    }
+async def get_status():
+    """Readiness report; always 200 so the page can show a degraded state."""
+    return JSONResponse(await health.checker.report(), headers=_NO_STORE)
+
+
+@router.get("/status/live")
+async def get_liveness():
+    return JSONResponse(health.checker.liveness(), headers=_NO_STORE)
+
+
+@router.get("/status/ready")
+async def get_readiness():
+    report = await health.checker.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503, headers=_NO_STORE)
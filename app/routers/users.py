@@ -1,11 +1,11 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from sqlmodel import select
 
-from app.database import get_session
+from app.database import DBSession, get_session
 from app.models.user import User, UserCreate, UserRead, UserUpdate
-from app.core.deps import get_current_superuser
-from app.core.security import get_password_hash
+from app.core.deps import get_current_superuser, principal_cache
+from app.core.hashing import password_pool
 from app.config import get_settings
 
 router = APIRouter()
@@ -13,44 +13,44 @@ settings = get_settings()
 
 
 @router.get("/", response_model=List[UserRead])
-def read_users(
-    session: Session = Depends(get_session),
+async def read_users(
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
-    users = session.exec(select(User).order_by(User.id)).all()
+    users = (await session.exec(select(User).order_by(User.id))).all()
     return users
 
 
 @router.post("/", response_model=UserRead)
-def create_user(
+async def create_user(
     user_in: UserCreate,
-    session: Session = Depends(get_session),
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
-    existing = session.exec(select(User).where(User.username == user_in.username)).first()
+    existing = (await session.exec(select(User).where(User.username == user_in.username))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Username already exists")
 
     db_user = User(
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await password_pool.hash(user_in.password),
         is_active=user_in.is_active,
         is_superuser=user_in.is_superuser,
     )
     session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    await session.commit()
+    await session.refresh(db_user)
     return db_user
 
 
 @router.put("/{user_id}", response_model=UserRead)
-def update_user(
+async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    session: Session = Depends(get_session),
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -60,7 +60,7 @@ def update_user(
 
     new_username = update_data.get("username")
     if new_username and new_username != user.username:
-        existing = session.exec(select(User).where(User.username == new_username)).first()
+        existing = (await session.exec(select(User).where(User.username == new_username))).first()
         if existing:
             raise HTTPException(status_code=400, detail="Username already exists")
 
@@ -70,30 +70,34 @@ def update_user(
         if attempted:
             raise HTTPException(status_code=400, detail="Default admin username/role/state cannot be changed")
 
+    previous_username = user.username
+
     if "password" in update_data:
         password = update_data.pop("password")
         if password:
-            user.hashed_password = get_password_hash(password)
+            user.hashed_password = await password_pool.hash(password)
 
     for key, value in update_data.items():
         setattr(user, key, value)
 
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    principal_cache.revoke(previous_username)
+    await session.refresh(user)
     return user
 
 
 @router.delete("/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: int,
-    session: Session = Depends(get_session),
+    session: DBSession = Depends(get_session),
     current_user=Depends(get_current_superuser)
 ):
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    session.delete(user)
-    session.commit()
+    await session.delete(user)
+    await session.commit()
+    principal_cache.revoke(user.username)
     return {"ok": True}
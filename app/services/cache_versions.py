@@ -0,0 +1,121 @@
+"""Cross-worker invalidation for the in-process caches.
+
+Each cache has a row in ``cacheversion``. Writers bump it inside their own
+transaction; every worker polls the table at most once per
+CACHE_VERSION_POLL_INTERVAL seconds and invalidates the caches whose version
+moved. Caches therefore stay consistent across uvicorn workers with a
+bounded delay, and the hot read paths only touch the database once per
+interval.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.database import DBSession, engine
+from app.models import CacheVersion
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+NAVIGATION = "navigation"
+SITE_CONFIG = "site_config"
+# Compiled stylesheets and font subsets; bumped after every asset build.
+ASSETS = "assets"
+# Click aggregates; bumped by every flush that wrote or pruned rows.
+POPULARITY = "popularity"
+
+
+def bump_statement(name: str):
+    """Statement that increments a cache version, creating the row if needed.
+
+    ``updated_at`` never moves backwards, even if the writer's clock is behind
+    the previous one's: it is used as a Last-Modified time.
+    """
+    stmt = sqlite_insert(CacheVersion).values(name=name, version=1, updated_at=datetime.utcnow())
+    return stmt.on_conflict_do_update(
+        index_elements=[CacheVersion.name],
+        set_={
+            "version": CacheVersion.version + 1,
+            "updated_at": func.max(CacheVersion.updated_at, stmt.excluded.updated_at),
+        },
+    )
+
+
+async def bump(session: DBSession, *names: str) -> None:
+    for name in names:
+        await session.execute(bump_statement(name))
+
+
+def current(session: Session, name: str) -> Tuple[int, Optional[datetime]]:
+    """Version and last bump time of one cache; ``(0, None)`` before the first bump."""
+    row = session.exec(
+        select(CacheVersion.version, CacheVersion.updated_at).where(CacheVersion.name == name)
+    ).first()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def bump_now(name: str) -> None:
+    """Bump a version in a transaction of its own, for writes outside the database.
+
+    The write has already happened by then, so a failure is only logged; the
+    other workers then pick it up when they restart.
+    """
+    try:
+        with Session(engine) as session:
+            session.execute(bump_statement(name))
+            session.commit()
+    except SQLAlchemyError:
+        logger.exception("Could not bump cache version %r", name)
+
+
+class VersionWatcher:
+    def __init__(self, poll_interval: float) -> None:
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._checked_at = float("-inf")
+        self._initialized = False
+
+    def register(self, name: str, callback: Callable[[], None]) -> None:
+        self._callbacks.setdefault(name, []).append(callback)
+
+    def due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.poll_interval
+
+    def poll(self, session: Session) -> None:
+        self._checked_at = time.monotonic()
+        rows = session.exec(select(CacheVersion.name, CacheVersion.version)).all()
+        current = {name: version for name, version in rows}
+        with self._lock:
+            if self._initialized:
+                changed = [
+                    name for name in self._callbacks
+                    if current.get(name, 0) != self._versions.get(name, 0)
+                ]
+            else:
+                # Anything cached before the first poll may predate a write
+                # made by another worker.
+                changed = list(self._callbacks)
+                self._initialized = True
+            self._versions = current
+        for name in changed:
+            for callback in self._callbacks[name]:
+                callback()
+
+
+watcher = VersionWatcher(poll_interval=settings.CACHE_VERSION_POLL_INTERVAL)
+
+
+async def refresh(session: DBSession) -> None:
+    """Poll the version table if the interval has elapsed."""
+    if watcher.due():
+        await session.run_sync(watcher.poll)
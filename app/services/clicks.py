@@ -0,0 +1,215 @@
+"""Click counts per card, buffered in memory and written behind in batches.
+
+The click beacon only increments a counter in this worker. The counters are
+written to the daily aggregate table (``CardClickDaily``) as one batched
+upsert every CLICK_FLUSH_INTERVAL seconds, or as soon as
+CLICK_FLUSH_THRESHOLD clicks are pending, so a click never costs a write on
+the request path. Clicks still buffered when a worker is killed are lost;
+shutdown flushes them.
+
+Popularity, the clicks per card over the last CLICK_POPULAR_DAYS days, is
+only ever read from the aggregates, never from a worker's own counts, so
+every worker composes the same navigation payload. A flush that writes rows
+bumps the ``popularity`` cache version in the same transaction; each worker's
+flusher checks that version every CLICK_FLUSH_INTERVAL seconds and reloads
+popularity when it moved, and at least every CLICK_POPULAR_REFRESH_INTERVAL
+seconds for the sliding window. The result goes to the navigation snapshot,
+which reorders only what changed. List the most used cards with
+
+    python -m app.services.clicks [--limit 20]
+"""
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+import anyio
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, func, select
+
+from app.config import get_settings
+from app.database import engine
+from app.models import CardClickDaily, NavigationCard
+from app.services import cache_versions, health
+from app.services.navigation import navigation_snapshot
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def forget_statement(card_ids: Iterable[int]):
+    """Statement deleting the aggregates of cards being deleted.
+
+    Run it in the same transaction as the card delete: SQLite does not
+    enforce the foreign key, and card ids are reused, so a later card could
+    otherwise inherit the clicks.
+    """
+    return delete(CardClickDaily).where(CardClickDaily.card_id.in_(list(card_ids)))
+
+
+def window_start():
+    """First day counted towards popularity."""
+    return datetime.utcnow().date() - timedelta(days=settings.CLICK_POPULAR_DAYS - 1)
+
+
+class ClickRecorder:
+    def __init__(self, threshold: int) -> None:
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._pending = 0
+        self._popularity: Dict[int, int] = {}
+        self._popularity_version: Optional[int] = None
+        self.flushed = 0
+        self.last_flush: Optional[datetime] = None
+
+    def record(self, card_id: int) -> bool:
+        """Count one click; True exactly when the pending count reaches the threshold."""
+        with self._lock:
+            self._counts[card_id] += 1
+            self._pending += 1
+            return self._pending == self.threshold
+
+    def _drain(self) -> Counter:
+        with self._lock:
+            counts, self._counts, self._pending = self._counts, Counter(), 0
+        return counts
+
+    def forget(self, card_ids: Iterable[int]) -> None:
+        """Drop this worker's buffered clicks for deleted cards."""
+        with self._lock:
+            for card_id in card_ids:
+                self._pending -= self._counts.pop(card_id, 0)
+
+    def _restore(self, counts: Counter) -> None:
+        with self._lock:
+            self._counts.update(counts)
+            self._pending += sum(counts.values())
+
+    def flush(self) -> int:
+        """Upsert the pending counts into today's aggregates; returns the clicks written.
+
+        Clicks on cards that no longer exist are dropped. On a database
+        error the counts are put back for the next flush.
+        """
+        counts = self._drain()
+        if not counts:
+            return 0
+        day = datetime.utcnow().date()
+        try:
+            with Session(engine) as session:
+                known = set(session.exec(
+                    select(NavigationCard.id).where(NavigationCard.id.in_(list(counts)))
+                ).all())
+                rows = [
+                    {"card_id": card_id, "day": day, "clicks": clicks}
+                    for card_id, clicks in counts.items()
+                    if card_id in known
+                ]
+                if rows:
+                    table = CardClickDaily.__table__
+                    stmt = sqlite_insert(table)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["card_id", "day"],
+                        set_={"clicks": table.c.clicks + stmt.excluded.clicks},
+                    )
+                    session.execute(stmt, rows)
+                    session.execute(cache_versions.bump_statement(cache_versions.POPULARITY))
+                    session.commit()
+        except Exception:
+            self._restore(counts)
+            raise
+        written = sum(row["clicks"] for row in rows)
+        self.flushed += written
+        self.last_flush = datetime.utcnow()
+        return written
+
+    def refresh_popularity(self, session: Session, force: bool = True) -> None:
+        """Reload popularity from the aggregates; unless ``force``, only if a flush bumped it."""
+        version, updated_at = cache_versions.current(session, cache_versions.POPULARITY)
+        if not force and version == self._popularity_version:
+            return
+        rows = session.exec(
+            select(CardClickDaily.card_id, func.sum(CardClickDaily.clicks))
+            .where(CardClickDaily.day >= window_start())
+            .group_by(CardClickDaily.card_id)
+        ).all()
+        self._popularity = {card_id: int(clicks) for card_id, clicks in rows}
+        self._popularity_version = version
+        navigation_snapshot.set_popularity(self._popularity, updated_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._pending,
+            "flushed": self.flushed,
+            "last_flush": self.last_flush.isoformat() if self.last_flush else None,
+            "popular_cards": len(self._popularity),
+        }
+
+
+recorder = ClickRecorder(settings.CLICK_FLUSH_THRESHOLD)
+health.checker.register_cache("clicks", recorder.stats)
+
+
+def refresh_popularity(force: bool = True) -> None:
+    with Session(engine) as session:
+        recorder.refresh_popularity(session, force)
+
+
+def prune_orphans() -> int:
+    """Delete aggregates of cards that no longer exist (e.g. removed by hand)."""
+    with Session(engine) as session:
+        removed = session.execute(
+            delete(CardClickDaily).where(CardClickDaily.card_id.not_in(select(NavigationCard.id)))
+        ).rowcount
+        if removed:
+            session.execute(cache_versions.bump_statement(cache_versions.POPULARITY))
+        session.commit()
+    return removed
+
+
+async def run_flusher() -> None:
+    """Flush every CLICK_FLUSH_INTERVAL seconds and reload popularity when it changed or is due."""
+    refreshed = 0.0
+    while True:
+        await asyncio.sleep(settings.CLICK_FLUSH_INTERVAL)
+        try:
+            await anyio.to_thread.run_sync(recorder.flush)
+            due = time.monotonic() - refreshed >= settings.CLICK_POPULAR_REFRESH_INTERVAL
+            if due:
+                refreshed = time.monotonic()
+                await anyio.to_thread.run_sync(prune_orphans)
+            await anyio.to_thread.run_sync(refresh_popularity, due)
+        except Exception:
+            logger.exception("Click flush failed; retrying in %ss", settings.CLICK_FLUSH_INTERVAL)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="List the most used cards.")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    since = window_start()
+    total = func.sum(CardClickDaily.clicks)
+    with Session(engine) as session:
+        rows = session.exec(
+            select(NavigationCard.title, NavigationCard.href, total)
+            .select_from(CardClickDaily)
+            .join(NavigationCard, NavigationCard.id == CardClickDaily.card_id)
+            .where(CardClickDaily.day >= since)
+            .group_by(NavigationCard.id)
+            .order_by(total.desc())
+            .limit(args.limit)
+        ).all()
+    print(f"Clicks since {since}:")
+    for title, href, clicks in rows:
+        print(f"{clicks:>8}  {title}  {href}")
+
+
+if __name__ == "__main__":
+    main()
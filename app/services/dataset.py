@@ -0,0 +1,448 @@
+"""Streaming import and export of the navigation dataset.
+
+The dataset is a stream of records, one JSON object each::
+
+    {"type": "config", "key": "branding_title", "value": "个人导航网站"}
+    {"type": "category", "slug": "ai", "label": "AI", "icon": "smart_toy", "order": 0, "active": true}
+    {"type": "card", "category": "ai", "title": "GitHub", "href": "https://github.com", ...}
+
+Input is NDJSON (one record per line), a JSON array of records, or the
+prototype ``navigation.json`` document. NDJSON and arrays are read
+incrementally; the prototype document is small and is loaded whole.
+
+Records are written in ``executemany`` chunks inside a single transaction
+and upserted rather than skipped: configs by key, categories by slug and
+cards by their category and ``href``. Export writes NDJSON in the same
+shape straight from a streamed query, so neither direction holds the whole
+dataset in memory.
+
+    python -m app.services.dataset import data.ndjson
+    python -m app.services.dataset export > data.ndjson
+"""
+import io
+import json
+import sys
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import Category, NavigationCard, SiteConfig
+from app.services import cache_versions, search
+from app.services.navigation import navigation_snapshot
+from app.services.site_config import site_config_cache
+
+CHUNK_SIZE = 1000
+READ_SIZE = 1 << 16
+MAX_ERRORS = 20
+
+CARD_DEFAULTS = {
+    "subtitle": None,
+    "description": "",
+    "icon": "link",
+    "icon_bg_class": "bg-blue-100",
+    "icon_color_class": "text-blue-500",
+    "order": 0,
+}
+# Keys used by navigation.json and the public payload.
+_CARD_ALIASES = {"iconBgClass": "icon_bg_class", "iconColorClass": "icon_color_class"}
+_WHITESPACE = " \t\r\n"
+
+
+class DatasetError(ValueError):
+    """The input is not a readable dataset."""
+
+
+def format_for(filename: Optional[str]) -> str:
+    name = (filename or "").lower()
+    return "ndjson" if name.endswith((".ndjson", ".jsonl")) else "json"
+
+
+def _text(fp: IO) -> IO[str]:
+    return fp if isinstance(fp, io.TextIOBase) else io.TextIOWrapper(fp, encoding="utf-8")
+
+
+def iter_ndjson(fp: IO[str]) -> Iterator[Any]:
+    for number, line in enumerate(fp, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            raise DatasetError(f"line {number}: {exc}") from None
+
+
+def iter_json_array(fp: IO[str], head: str = "") -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array, reading it in chunks."""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = head, 0, False
+
+    def fill() -> None:
+        nonlocal buffer, pos, eof
+        chunk = fp.read(READ_SIZE)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def skip(chars: str) -> None:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip(_WHITESPACE)
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise DatasetError("expected a JSON array of records")
+    pos += 1
+    while True:
+        skip(_WHITESPACE + ",")
+        if pos >= len(buffer):
+            raise DatasetError("unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+        while True:
+            try:
+                element, pos = decoder.raw_decode(buffer, pos)
+                break
+            except ValueError as exc:
+                if eof:
+                    raise DatasetError(f"invalid JSON: {exc}") from None
+                fill()
+        yield element
+
+
+def _member(container: Dict[str, Any], key: str, kind: type, name: str) -> Any:
+    """``container[key]`` checked to be a JSON object or array; empty when absent."""
+    value = container.get(key)
+    if value is None:
+        return kind()
+    if not isinstance(value, kind):
+        raise DatasetError(f"{name} must be {'an object' if kind is dict else 'an array'}")
+    return value
+
+
+def navigation_records(document: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Records of a prototype ``navigation.json`` document.
+
+    A document of the wrong shape is a DatasetError. Menu items and cards
+    are passed on with whatever fields they have, so an incomplete one is
+    skipped and reported by the importer like any other record.
+    """
+    branding = _member(document, "branding", dict, "branding")
+    for key, value in (("branding_title", branding.get("title")), ("branding_icon", branding.get("icon"))):
+        if value:
+            yield {"type": "config", "key": key, "value": value}
+    placeholder = _member(document, "hero", dict, "hero").get("searchPlaceholder")
+    if placeholder:
+        yield {"type": "config", "key": "hero_search_placeholder", "value": placeholder}
+
+    sidebar = _member(document, "sidebar", dict, "sidebar")
+    for index, item in enumerate(_member(sidebar, "menuItems", list, "sidebar.menuItems")):
+        item = item if isinstance(item, dict) else {}
+        record = {"type": "category", "order": index, "active": item.get("active", False)}
+        for source, key in (("id", "slug"), ("label", "label"), ("icon", "icon")):
+            if source in item:
+                record[key] = item[source]
+        yield record
+    for section in _member(document, "sections", list, "sections"):
+        if not isinstance(section, dict):
+            raise DatasetError("sections must contain objects")
+        for index, card in enumerate(_member(section, "cards", list, "section cards")):
+            record = {"order": index, **(card if isinstance(card, dict) else {}), "type": "card"}
+            if "id" in section:
+                record["category"] = section["id"]
+            yield record
+
+
+def iter_records(fp: IO, format: str = "json") -> Iterator[Any]:
+    fp = _text(fp)
+    if format == "ndjson":
+        return iter_ndjson(fp)
+    head = fp.read(READ_SIZE)
+    if head.lstrip(_WHITESPACE).startswith("{"):
+        try:
+            document = json.loads(head + fp.read())
+        except ValueError as exc:
+            raise DatasetError(f"invalid JSON: {exc}") from None
+        return navigation_records(document)
+    return iter_json_array(fp, head)
+
+
+class DatasetImporter:
+    """Upserts records in chunks on one session; the caller commits.
+
+    Categories are written before any card that follows them so cards can
+    reference a category created earlier in the same stream.
+    """
+
+    def __init__(self, session: Session, chunk_size: int = CHUNK_SIZE) -> None:
+        self.session = session
+        self.chunk_size = chunk_size
+        self.now = datetime.utcnow()
+        self.stats: Dict[str, Any] = {
+            "configs": 0,
+            "categories": {"inserted": 0, "updated": 0},
+            "cards": {"inserted": 0, "updated": 0},
+            "skipped": 0,
+            "errors": [],
+        }
+        self.icons: Set[str] = set()
+        self.classes: Set[str] = set()
+        self._category_ids: Dict[str, int] = dict(session.exec(select(Category.slug, Category.id)).all())
+        self._touched_categories: Set[int] = set()
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._categories: Dict[str, Dict[str, Any]] = {}
+        self._cards: List[Tuple[int, str, Dict[str, Any]]] = []
+        self._count = 0
+
+    def _skip(self, message: str, number: Optional[int] = None) -> None:
+        self.stats["skipped"] += 1
+        if len(self.stats["errors"]) < MAX_ERRORS:
+            self.stats["errors"].append(f"record {number or self._count}: {message}")
+
+    def add(self, record: Any) -> None:
+        self._count += 1
+        kind = record.get("type") if isinstance(record, dict) else None
+        try:
+            if kind == "card":
+                self._add_card(record)
+            elif kind == "category":
+                self._add_category(record)
+            elif kind == "config":
+                self._configs[str(record["key"])] = {
+                    "key": str(record["key"]),
+                    "value": str(record["value"]),
+                    "updated_at": self.now,
+                }
+            else:
+                self._skip(f"unknown record type {kind!r}")
+        except (KeyError, TypeError, ValueError) as exc:
+            self._skip(f"invalid {kind}: {exc!r}")
+
+    def _add_category(self, record: Dict[str, Any]) -> None:
+        slug = str(record["slug"])
+        self._categories[slug] = {
+            "slug": slug,
+            "label": str(record["label"]),
+            "icon": str(record["icon"]),
+            "order": int(record.get("order") or 0),
+            "active": bool(record.get("active", False)),
+            "created_at": self.now,
+            "updated_at": self.now,
+        }
+        self.icons.add(self._categories[slug]["icon"])
+        if len(self._categories) >= self.chunk_size:
+            self._flush_categories()
+
+    def _add_card(self, record: Dict[str, Any]) -> None:
+        record = {_CARD_ALIASES.get(key, key): value for key, value in record.items()}
+        if not record.get("title") or not record.get("href"):
+            raise ValueError("title and href are required")
+        row = {}
+        for field, default in CARD_DEFAULTS.items():
+            value = record.get(field)
+            if value is None:
+                value = default
+            elif field == "order":
+                if isinstance(value, bool) or not isinstance(value, (int, str)):
+                    raise TypeError(f"order must be an integer, not {type(value).__name__}")
+                value = int(value)
+            elif not isinstance(value, str):
+                raise TypeError(f"{field} must be a string, not {type(value).__name__}")
+            row[field] = value
+        row["title"] = str(record["title"])
+        row["href"] = str(record["href"])
+        self._cards.append((self._count, str(record["category"]), row))
+        if len(self._cards) >= self.chunk_size:
+            self._flush_cards()
+
+    def _flush_configs(self) -> None:
+        if not self._configs:
+            return
+        stmt = sqlite_insert(SiteConfig.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+        )
+        self.session.execute(stmt, list(self._configs.values()))
+        self.stats["configs"] += len(self._configs)
+        self._configs = {}
+
+    def _flush_categories(self) -> None:
+        if not self._categories:
+            return
+        rows = list(self._categories.values())
+        stmt = sqlite_insert(Category.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["slug"],
+            set_={
+                column: stmt.excluded[column]
+                for column in ("label", "icon", "order", "active", "updated_at")
+            },
+        )
+        self.session.execute(stmt, rows)
+        for row in rows:
+            outcome = "updated" if row["slug"] in self._category_ids else "inserted"
+            self.stats["categories"][outcome] += 1
+        self._category_ids.update(
+            self.session.exec(
+                select(Category.slug, Category.id).where(Category.slug.in_(list(self._categories)))
+            ).all()
+        )
+        self._touched_categories.update(self._category_ids[slug] for slug in self._categories)
+        self._categories = {}
+
+    def _flush_cards(self) -> None:
+        if not self._cards:
+            return
+        self._flush_categories()
+        rows: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for number, slug, row in self._cards:
+            category_id = self._category_ids.get(slug)
+            if category_id is None:
+                self._skip(f"card {row['title']!r} references unknown category {slug!r}", number)
+                continue
+            rows[(category_id, row["href"])] = {**row, "category_id": category_id, "updated_at": self.now}
+        self._cards = []
+        if not rows:
+            return
+
+        existing = {
+            (category_id, href): card_id
+            for card_id, category_id, href in self.session.exec(
+                select(NavigationCard.id, NavigationCard.category_id, NavigationCard.href).where(
+                    NavigationCard.category_id.in_({key[0] for key in rows}),
+                    NavigationCard.href.in_({key[1] for key in rows}),
+                )
+            ).all()
+        }
+        inserts = [{**row, "created_at": self.now} for key, row in rows.items() if key not in existing]
+        updates = [{**row, "id": existing[key]} for key, row in rows.items() if key in existing]
+        if inserts:
+            self.session.execute(insert(NavigationCard), inserts)
+        if updates:
+            self.session.execute(update(NavigationCard), updates)
+        self.stats["cards"]["inserted"] += len(inserts)
+        self.stats["cards"]["updated"] += len(updates)
+        self._touched_categories.update(key[0] for key in rows)
+        for row in rows.values():
+            self.icons.add(row["icon"])
+            self.classes.update((row["icon_bg_class"], row["icon_color_class"]))
+
+    def finish(self) -> Dict[str, Any]:
+        self._flush_configs()
+        self._flush_categories()
+        self._flush_cards()
+        search.sync_categories(self.session, self._touched_categories)
+        self.session.execute(cache_versions.bump_statement(cache_versions.NAVIGATION))
+        if self.stats["configs"]:
+            self.session.execute(cache_versions.bump_statement(cache_versions.SITE_CONFIG))
+        return self.stats
+
+
+def import_records(records: Iterable[Any], chunk_size: int = CHUNK_SIZE) -> DatasetImporter:
+    """Import a record stream in one transaction and drop the local caches."""
+    with Session(engine) as session:
+        importer = DatasetImporter(session, chunk_size)
+        for record in records:
+            importer.add(record)
+        importer.finish()
+        session.commit()
+    navigation_snapshot.invalidate()
+    site_config_cache.invalidate()
+    return importer
+
+
+def import_file(fp: IO, format: str = "json", chunk_size: int = CHUNK_SIZE) -> DatasetImporter:
+    try:
+        return import_records(iter_records(fp, format), chunk_size)
+    except UnicodeDecodeError as exc:
+        raise DatasetError(f"not UTF-8 text: {exc}") from None
+
+
+def export_records(chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    with Session(engine) as session:
+        for key, value in session.exec(select(SiteConfig.key, SiteConfig.value).order_by(SiteConfig.key)):
+            yield {"type": "config", "key": key, "value": value}
+        categories = session.exec(
+            select(Category.slug, Category.label, Category.icon, Category.order, Category.active)
+            .order_by(Category.order, Category.id)
+        )
+        for slug, label, icon, order, active in categories:
+            yield {"type": "category", "slug": slug, "label": label, "icon": icon, "order": order, "active": active}
+
+        columns = ("title", "subtitle", "description", "icon", "icon_bg_class", "icon_color_class", "href", "order")
+        cards = session.exec(
+            select(Category.slug, *(getattr(NavigationCard, column) for column in columns))
+            .join(Category, Category.id == NavigationCard.category_id)
+            .order_by(Category.order, Category.id, NavigationCard.order, NavigationCard.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for slug, *values in cards:
+            yield {"type": "card", "category": slug, **dict(zip(columns, values))}
+
+
+def export_ndjson(chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """NDJSON text of the whole dataset, ``chunk_size`` records per chunk."""
+    lines: List[str] = []
+    for record in export_records(chunk_size):
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _main(argv: List[str]) -> int:
+    import argparse
+
+    from app.database import create_db_and_tables
+    from app.services import fonts, tailwind
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.dataset")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="upsert records from a JSON or NDJSON file")
+    import_parser.add_argument("path", help="input file, or - for NDJSON on stdin")
+    import_parser.add_argument("--format", choices=("json", "ndjson"))
+    import_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    export_parser = commands.add_parser("export", help="write the dataset as NDJSON")
+    export_parser.add_argument("path", nargs="?", default="-", help="output file, default stdout")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        out = sys.stdout if args.path == "-" else open(args.path, "w", encoding="utf-8")
+        try:
+            for chunk in export_ndjson():
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+
+    create_db_and_tables()
+    search.ensure_index()
+    format = args.format or ("ndjson" if args.path == "-" else format_for(args.path))
+    try:
+        if args.path == "-":
+            importer = import_file(sys.stdin, format, args.chunk_size)
+        else:
+            with open(args.path, "r", encoding="utf-8") as fp:
+                importer = import_file(fp, format, args.chunk_size)
+    except DatasetError as exc:
+        print(f"Import failed: {exc}", file=sys.stderr)
+        return 1
+    tailwind.ensure_classes(importer.classes)
+    fonts.ensure_icons(importer.icons)
+    print(json.dumps(importer.stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,629 @@
+"""Site favicons for the card links, fetched once and served from this origin.
+
+Only hosts that appear in a card href are fetched, so the endpoint is not an
+open proxy. Redirects and icon URLs declared by a homepage are followed hop
+by hop. Connections to any host other than the card's own go only to public
+addresses, checked when connecting and pinned for the connection, so a site
+cannot point the fetcher at this network, not even by changing its DNS
+answer between the check and the connect. On a miss the icon is looked up at
+``/favicon.ico`` and then in the ``<link rel="icon">`` tags of the site's
+homepage through one pooled client; concurrent misses for the same host share a single fetch, and at
+most FAVICON_FETCH_CONCURRENCY fetches run at once. Icons are normalized to
+FAVICON_SIZE-pixel PNGs when Pillow is installed (the ``favicons`` extra);
+without it, raster icons are kept as they are.
+
+Results, including "this site has no icon", are kept in memory and in a
+directory bounded to FAVICON_CACHE_MAX_BYTES, evicting the least recently
+used. After FAVICON_MAX_AGE seconds an icon is revalidated upstream with the
+validators of its source; the stale icon is served meanwhile. Each worker
+keeps its own index of the shared directory, so an icon evicted by one
+worker is simply a miss for the others. Fill the cache ahead of time with
+
+    python -m app.services.favicons --prefetch
+"""
+import argparse
+import asyncio
+import base64
+import contextvars
+import hashlib
+import io
+import ipaddress
+import json
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import anyio
+import httpcore
+import httpx
+
+from app.config import get_settings
+from app.services import health
+from app.services.navigation import NavigationEntry
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "navigator-favicons/0.1"
+# Largest upstream icon downloaded; homepages are read up to this length.
+MAX_DOWNLOAD_BYTES = 256 * 1024
+# Largest icon kept unconverted when Pillow is not installed.
+MAX_RAW_BYTES = 64 * 1024
+# Largest declared image size decoded; a small PNG can claim a huge canvas.
+MAX_SOURCE_PIXELS = 1024 * 1024
+MEMORY_ENTRIES = 1024
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\x00\x00\x01\x00", "image/x-icon"),
+    (b"GIF8", "image/gif"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+def host_of(href: str) -> Optional[str]:
+    """``host[:port]`` of an http(s) URL, lower-cased, without default ports."""
+    try:
+        parts = urlsplit(href)
+        port = parts.port
+    except ValueError:
+        return None
+    # IPv6 literals are left to the icon glyph.
+    if parts.scheme not in ("http", "https") or not parts.hostname or ":" in parts.hostname:
+        return None
+    if port is None or (parts.scheme, port) in (("http", 80), ("https", 443)):
+        return parts.hostname
+    return f"{parts.hostname}:{port}"
+
+
+def allowed_url(url: str) -> bool:
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return False
+    return parts.scheme in ("http", "https") and bool(parts.hostname)
+
+
+async def public_address(hostname: str, port: int) -> str:
+    """An address of ``hostname``, provided all of its addresses are public."""
+    try:
+        addresses = await anyio.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError) as exc:
+        raise httpcore.ConnectError(f"{hostname}: {exc}") from exc
+    ips = [address[4][0].split("%")[0] for address in addresses]
+    if not ips or not all(ipaddress.ip_address(ip).is_global for ip in ips):
+        raise httpcore.ConnectError(f"{hostname} resolves to a non-public address")
+    return ips[0]
+
+
+# ``host_of`` the card whose icon the current task is fetching.
+_card_host: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("favicon_card_host", default=None)
+
+
+class _PublicAddressBackend(httpcore.AsyncNetworkBackend):
+    """Connects to hosts other than the card's own only at the public address it checked.
+
+    TLS and the Host header still use the hostname. Pooled connections to a
+    card host may be reused by a redirect from another card; both were
+    entered by an administrator.
+    """
+
+    def __init__(self) -> None:
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        # Like host_of, either default port counts as the card's, for http -> https redirects.
+        if (host if port in (80, 443) else f"{host}:{port}") != _card_host.get():
+            host = await public_address(host, port)
+        return await self._backend.connect_tcp(
+            host, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options=None) -> httpcore.AsyncNetworkStream:
+        raise httpcore.ConnectError("favicons are not fetched over unix sockets")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class _PublicAddressTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, limits: httpx.Limits) -> None:
+        super().__init__(limits=limits)
+        # httpx does not take a network backend, so swap in a pool that uses ours.
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_PublicAddressBackend(),
+        )
+
+
+def sniff(raw: bytes) -> Optional[str]:
+    for signature, content_type in _SIGNATURES:
+        if raw.startswith(signature):
+            return content_type
+    if raw[:4] == b"RIFF" and raw[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def normalize(raw: bytes, size: int) -> Optional[Tuple[bytes, str]]:
+    """A square ``size`` PNG of the image, or the raster image itself without Pillow.
+
+    Decoding is CPU-bound; callers on the event loop run it in a thread.
+    """
+    if Image is None:
+        content_type = sniff(raw)
+        if content_type is None or len(raw) > MAX_RAW_BYTES:
+            return None
+        return raw, content_type
+    try:
+        with Image.open(io.BytesIO(raw)) as source:
+            # Opening only reads the header. ICO files open at their largest size.
+            if source.width * source.height > MAX_SOURCE_PIXELS:
+                return None
+            image = source.convert("RGBA")
+    except Exception:  # anything Pillow cannot read, including SVG and HTML error pages
+        return None
+    image.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    out = io.BytesIO()
+    canvas.save(out, "PNG", optimize=True)
+    return out.getvalue(), "image/png"
+
+
+class _IconLinks(HTMLParser):
+    """Collects ``<link rel="icon">`` hrefs, smallest declared size first."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.links: List[Tuple[int, str]] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag != "link":
+            return
+        values = {name: value or "" for name, value in attrs}
+        rel = values.get("rel", "").lower().split()
+        href = values.get("href")
+        if not href or "icon" not in rel and "apple-touch-icon" not in rel:
+            return
+        if href.lower().endswith(".svg") or values.get("type", "").lower() == "image/svg+xml":
+            return
+        size = 0
+        for token in values.get("sizes", "").lower().split():
+            width = token.split("x")[0]
+            if width.isdigit():
+                size = max(size, int(width))
+        # Prefer icons at least 32px wide, the smallest of those first.
+        self.links.append((size if size >= 32 else 10_000 - size, href))
+
+
+class FaviconEntry(NamedTuple):
+    host: str
+    # None when the site has no usable icon.
+    body: Optional[bytes]
+    content_type: str
+    etag: str
+    source: Optional[str]
+    upstream_etag: Optional[str]
+    upstream_last_modified: Optional[str]
+    fetched_at: float
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at > settings.FAVICON_MAX_AGE
+
+    def data_uri(self) -> str:
+        return f"data:{self.content_type};base64,{base64.b64encode(self.body).decode('ascii')}"
+
+
+def _entry(host: str, body: Optional[bytes], content_type: str = "", source: Optional[str] = None,
+           upstream_etag: Optional[str] = None, upstream_last_modified: Optional[str] = None) -> FaviconEntry:
+    etag = '"%s"' % hashlib.sha256(body or b"").hexdigest()[:32]
+    return FaviconEntry(host, body, content_type, etag, source, upstream_etag, upstream_last_modified, time.time())
+
+
+class DiskLRU:
+    """Entries as ``<key>.bin`` / ``<key>.json`` pairs, least recently used evicted first.
+
+    Recency is the file modification time, bumped on every read, so the
+    order survives restarts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self.bytes = 0
+
+    def _paths(self, host: str) -> Tuple[str, str]:
+        key = hashlib.sha1(host.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return f"{base}.bin", f"{base}.json"
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            os.makedirs(self.directory, exist_ok=True)
+            files = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    path = os.path.join(self.directory, name)
+                    try:
+                        stat = os.stat(path)
+                        data = os.path.getsize(path[:-5] + ".bin") if os.path.exists(path[:-5] + ".bin") else 0
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, name[:-5], stat.st_size + data))
+            self._index = OrderedDict((key, size) for _, key, size in sorted(files))
+            self.bytes = sum(self._index.values())
+        return self._index
+
+    def get(self, host: str) -> Optional[FaviconEntry]:
+        index = self._load_index()
+        data_path, meta_path = self._paths(host)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            body = None
+            if meta["has_body"]:
+                with open(data_path, "rb") as f:
+                    body = f.read()
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        key = os.path.basename(meta_path)[:-5]
+        if key in index:
+            index.move_to_end(key)
+        return FaviconEntry(
+            host=host,
+            body=body,
+            content_type=meta["content_type"],
+            etag=meta["etag"],
+            source=meta["source"],
+            upstream_etag=meta["upstream_etag"],
+            upstream_last_modified=meta["upstream_last_modified"],
+            fetched_at=meta["fetched_at"],
+        )
+
+    def put(self, entry: FaviconEntry) -> None:
+        index = self._load_index()
+        data_path, meta_path = self._paths(entry.host)
+        meta = {
+            "host": entry.host,
+            "has_body": entry.body is not None,
+            "content_type": entry.content_type,
+            "etag": entry.etag,
+            "source": entry.source,
+            "upstream_etag": entry.upstream_etag,
+            "upstream_last_modified": entry.upstream_last_modified,
+            "fetched_at": entry.fetched_at,
+        }
+        encoded = json.dumps(meta).encode("utf-8")
+        if entry.body is not None:
+            _write_atomic(data_path, entry.body)
+        _write_atomic(meta_path, encoded)
+        key = os.path.basename(meta_path)[:-5]
+        self.bytes -= index.pop(key, 0)
+        index[key] = len(encoded) + len(entry.body or b"")
+        self.bytes += index[key]
+        while self.bytes > self.max_bytes and len(index) > 1:
+            old, size = index.popitem(last=False)
+            self.bytes -= size
+            for suffix in (".bin", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, old + suffix))
+                except OSError:
+                    pass
+
+    def __len__(self) -> int:
+        """Entries indexed so far; the index is loaded by the first ``get`` or ``put``."""
+        return len(self._index or ())
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class FaviconService:
+    def __init__(self, store: DiskLRU, size: int, timeout: float, concurrency: int) -> None:
+        self.store = store
+        self.size = size
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._memory: "OrderedDict[str, FaviconEntry]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Task[FaviconEntry]"] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._hosts: Optional[Tuple[str, Dict[str, str], Dict[str, Dict[int, str]]]] = None
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.coalesced = 0
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.concurrency * 2, max_keepalive_connections=self.concurrency)
+            self._client = httpx.AsyncClient(
+                transport=_PublicAddressTransport(limits),
+                timeout=self.timeout,
+                follow_redirects=False,
+                headers={"User-Agent": USER_AGENT},
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def cached(self, host: str) -> Optional[FaviconEntry]:
+        """The stored entry, fresh or stale, without fetching."""
+        return (await self.cached_many([host])).get(host)
+
+    async def cached_many(self, hosts: List[str]) -> Dict[str, FaviconEntry]:
+        """Stored entries of ``hosts``; those not in memory are read from disk in one thread."""
+        found: Dict[str, FaviconEntry] = {}
+        on_disk = []
+        for host in hosts:
+            entry = self._memory.get(host)
+            if entry is None:
+                on_disk.append(host)
+            else:
+                self._memory.move_to_end(host)
+                found[host] = entry
+        if on_disk:
+            for entry in await anyio.to_thread.run_sync(self._read_stored, on_disk):
+                self._remember(entry)
+                found[entry.host] = entry
+        return found
+
+    def _read_stored(self, hosts: List[str]) -> List[FaviconEntry]:
+        return [entry for entry in map(self.store.get, hosts) if entry is not None]
+
+    def _remember(self, entry: FaviconEntry) -> None:
+        self._memory[entry.host] = entry
+        self._memory.move_to_end(entry.host)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def fetch(self, host: str, origin: str) -> "asyncio.Task[FaviconEntry]":
+        """The fetch of ``host`` in progress, started if there is none."""
+        task = self._inflight.get(host)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.get_running_loop().create_task(self._fetch(host, origin))
+        self._inflight[host] = task
+        task.add_done_callback(lambda _: self._inflight.pop(host, None))
+        return task
+
+    async def get(self, host: str, origin: str) -> FaviconEntry:
+        """The icon of ``host``; a stale one is returned while it is revalidated."""
+        entry = await self.cached(host)
+        if entry is not None:
+            self.hits += 1
+            if entry.stale:
+                self.fetch(host, origin)
+            return entry
+        self.misses += 1
+        return await self.fetch(host, origin)
+
+    async def bundle(self, origins: Dict[str, str], wait: Optional[float]) -> Tuple[Dict[str, FaviconEntry], List[str]]:
+        """Entries for ``origins`` (host -> origin), waiting up to ``wait`` seconds for misses.
+
+        Hosts still being fetched after that are returned as pending; their
+        fetches carry on in the background.
+        """
+        ready: Dict[str, FaviconEntry] = {}
+        missing: Dict[str, "asyncio.Task[FaviconEntry]"] = {}
+        stored = await self.cached_many(list(origins))
+        for host, origin in origins.items():
+            entry = stored.get(host)
+            if entry is None:
+                self.misses += 1
+                missing[host] = self.fetch(host, origin)
+                continue
+            self.hits += 1
+            if entry.stale:
+                self.fetch(host, origin)
+            ready[host] = entry
+        if missing:
+            await asyncio.wait(missing.values(), timeout=wait)
+        pending = []
+        for host, task in missing.items():
+            if task.done():
+                ready[host] = task.result()
+            else:
+                pending.append(host)
+        return ready, pending
+
+    def hosts(self, navigation: NavigationEntry) -> Tuple[Dict[str, str], Dict[str, Dict[int, str]]]:
+        """Origins by host of every card link, and the host of each card by section."""
+        cached = self._hosts
+        if cached is not None and cached[0] == navigation.etag:
+            return cached[1], cached[2]
+        origins: Dict[str, str] = {}
+        sections: Dict[str, Dict[int, str]] = {}
+        for section in navigation.payload["sections"]:
+            cards = sections[section["id"]] = {}
+            for card in section["cards"]:
+                host = host_of(card["href"] or "")
+                if host is not None:
+                    origins.setdefault(host, f"{urlsplit(card['href']).scheme}://{host}")
+                    cards[card["id"]] = host
+        self._hosts = (navigation.etag, origins, sections)
+        return origins, sections
+
+    async def _download(self, host: str, url: str, headers: Dict[str, str],
+                        truncate: bool = False) -> Tuple[Optional[httpx.Response], bytes]:
+        """GET ``url`` for the card host ``host``, following allowed redirects.
+
+        A body over MAX_DOWNLOAD_BYTES is dropped, or with ``truncate`` cut
+        to that length (enough for the ``<head>`` of a homepage).
+        """
+        _card_host.set(host)
+        for _ in range(MAX_REDIRECTS + 1):
+            if not allowed_url(url):
+                logger.debug("Favicon fetch for %s refused %s", host, url)
+                return None, b""
+            async with self._http().stream("GET", url, headers=headers) as response:
+                if response.status_code in REDIRECT_STATUSES and "location" in response.headers:
+                    url = urljoin(str(response.url), response.headers["location"])
+                    continue
+                if response.status_code != 200:
+                    return response, b""
+                data = b""
+                async for chunk in response.aiter_bytes():
+                    data += chunk
+                    if len(data) > MAX_DOWNLOAD_BYTES:
+                        return response, data[:MAX_DOWNLOAD_BYTES] if truncate else b""
+                return response, data
+        return None, b""
+
+    async def _icon(self, host: str, url: str, headers: Dict[str, str]) -> Optional[FaviconEntry]:
+        try:
+            response, raw = await self._download(host, url, headers)
+        except Exception as exc:  # timeouts, connection and TLS errors, bad URLs
+            logger.debug("Favicon %s failed: %s", url, exc)
+            return None
+        return await self._decode(host, response, raw)
+
+    async def _decode(self, host: str, response: Optional[httpx.Response], raw: bytes) -> Optional[FaviconEntry]:
+        normalized = await anyio.to_thread.run_sync(normalize, raw, self.size) if raw else None
+        if normalized is None:
+            return None
+        body, content_type = normalized
+        return _entry(host, body, content_type, str(response.url),
+                      response.headers.get("etag"), response.headers.get("last-modified"))
+
+    async def _discover(self, host: str, origin: str) -> List[str]:
+        """Icon URLs declared by the homepage."""
+        try:
+            response, page = await self._download(host, f"{origin}/", {}, truncate=True)
+        except Exception:
+            return []
+        if not page or "html" not in response.headers.get("content-type", ""):
+            return []
+        parser = _IconLinks()
+        try:
+            parser.feed(page.decode(response.encoding or "utf-8", errors="replace"))
+        except Exception:
+            return []
+        return [urljoin(str(response.url), href) for _, href in sorted(parser.links)]
+
+    async def _fetch(self, host: str, origin: str) -> FaviconEntry:
+        self._http()
+        async with self._semaphore:
+            self.fetches += 1
+            previous = await self.cached(host)
+            entry = None
+            if previous is not None and previous.source:
+                entry = await self._revalidate(previous)
+            if entry is None:
+                entry = await self._icon(host, f"{origin}/favicon.ico", {})
+            if entry is None:
+                for url in (await self._discover(host, origin))[:3]:
+                    entry = await self._icon(host, url, {})
+                    if entry is not None:
+                        break
+            if entry is None:
+                entry = _entry(host, None)
+        self._remember(entry)
+        try:
+            await anyio.to_thread.run_sync(self.store.put, entry)
+        except OSError as exc:
+            logger.warning("Could not store the favicon of %s: %s", host, exc)
+        return entry
+
+    async def _revalidate(self, previous: FaviconEntry) -> Optional[FaviconEntry]:
+        headers = {}
+        if previous.upstream_etag:
+            headers["If-None-Match"] = previous.upstream_etag
+        if previous.upstream_last_modified:
+            headers["If-Modified-Since"] = previous.upstream_last_modified
+        try:
+            response, raw = await self._download(previous.host, previous.source, headers)
+        except Exception as exc:
+            logger.debug("Favicon %s failed: %s", previous.source, exc)
+            return None
+        if response is not None and response.status_code == 304:
+            return previous._replace(fetched_at=time.time())
+        return await self._decode(previous.host, response, raw)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self.store),
+            "disk_bytes": self.store.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+fetcher = FaviconService(
+    DiskLRU(settings.FAVICON_CACHE_DIR, settings.FAVICON_CACHE_MAX_BYTES),
+    size=settings.FAVICON_SIZE,
+    timeout=settings.FAVICON_FETCH_TIMEOUT,
+    concurrency=settings.FAVICON_FETCH_CONCURRENCY,
+)
+health.checker.register_cache("favicons", fetcher.stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the favicon cache, or fill it.")
+    parser.add_argument("--prefetch", action="store_true", help="fetch the icons of every card host now")
+    args = parser.parse_args()
+
+    fetcher.store._load_index()
+    if args.prefetch:
+        from sqlmodel import Session
+
+        from app.database import engine
+        from app.services.navigation import navigation_snapshot
+
+        with Session(engine) as session:
+            origins, _ = fetcher.hosts(navigation_snapshot.get(session))
+
+        async def prefetch() -> Dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                ready, _ = await fetcher.bundle(origins, wait=None)
+            finally:
+                await fetcher.close()
+            return {
+                "hosts": len(origins),
+                "with_icon": sum(1 for entry in ready.values() if entry.body is not None),
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+
+        print(json.dumps(asyncio.run(prefetch())))
+    print(json.dumps(fetcher.stats()))
+
+
+if __name__ == "__main__":
+    main()
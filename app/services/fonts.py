@@ -0,0 +1,303 @@
+"""Font subsetting driven by the icons actually in use.
+
+Material Symbols renders icons through ligatures, so the icon font is cut
+down to the ligature glyphs for the names stored on categories, cards and
+the branding config plus those written into the templates. The text fonts
+are cut down to Latin. Every subset is written as WOFF2 under a
+content-hashed name and referenced from a generated ``fonts.<hash>.css``.
+Templates fall back to ``static/css/fonts.css`` until a build exists.
+Like the Tailwind build, each build bumps the ``assets`` cache version and
+replaced files are deleted STATIC_RETIRED_GRACE seconds later.
+
+Run ``python -m app.services.fonts``; requires ``fonttools[woff]``.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import Category, NavigationCard, SiteConfig
+from app.services import cache_versions, health, static_assets
+from app.services.navigation import POPULAR_SECTION_ICON
+
+try:
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+except ImportError:  # pragma: no cover - optional build dependency
+    subset = None
+    TTFont = None
+
+logger = logging.getLogger(__name__)
+
+FONTS_DIR = os.path.join("static", "fonts")
+OUTPUT_DIR = os.path.join(FONTS_DIR, "dist")
+CSS_DIR = os.path.join("static", "css")
+MANIFEST_PATH = os.path.join(CSS_DIR, "fonts-manifest.json")
+TEMPLATES_DIR = os.path.join("app", "templates")
+ICON_FONT = "MaterialSymbolsOutlined.ttf"
+CSS_PATTERN = re.compile(r"^fonts\.[0-9a-f]+\.css$")
+FONT_PATTERN = re.compile(r".*\.woff2$")
+
+# Icons emitted by code rather than stored or templated: the status
+# indicators (including the page's own "unreachable" state), the "most used"
+# menu item and the default branding icon.
+BUILTIN_ICONS = {"sync", "hub", "error", POPULAR_SECTION_ICON} | health.INDICATOR_ICONS
+
+# Basic Latin, Latin-1 Supplement and General Punctuation.
+LATIN_UNICODES = list(range(0x20, 0x7F)) + list(range(0xA0, 0x100)) + list(range(0x2000, 0x2070))
+
+TEXT_FACES = [
+    ("Inter", 400, "Inter-Regular.ttf"),
+    ("Inter", 500, "Inter-Medium.ttf"),
+    ("Inter", 600, "Inter-SemiBold.ttf"),
+    ("Inter", 700, "Inter-Bold.ttf"),
+    ("Roboto Mono", 400, "RobotoMono-Regular.ttf"),
+    ("Roboto Mono", 700, "RobotoMono-Bold.ttf"),
+]
+
+ICON_CLASS_CSS = """
+.material-symbols-outlined {
+    font-family: 'Material Symbols Outlined';
+    font-weight: normal;
+    font-style: normal;
+    font-size: 24px;
+    line-height: 1;
+    letter-spacing: normal;
+    text-transform: none;
+    display: inline-block;
+    white-space: nowrap;
+    word-wrap: normal;
+    direction: ltr;
+}
+"""
+
+_ICON_NAME = re.compile(r"^[a-z0-9_]+$")
+_TEMPLATE_ICON = re.compile(r'material-symbols-outlined[^"]*"[^>]*>\s*([a-z0-9_]+)\s*<')
+
+_build_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+_manifest: Optional[dict] = None
+
+
+def _normalize_icons(values: Iterable[Optional[str]]) -> Set[str]:
+    icons = set()
+    for value in values:
+        if value:
+            value = value.strip()
+            if _ICON_NAME.match(value):
+                icons.add(value)
+    return icons
+
+
+def collect_template_icons() -> Set[str]:
+    icons: Set[str] = set()
+    for name in os.listdir(TEMPLATES_DIR):
+        if name.endswith(".html"):
+            with open(os.path.join(TEMPLATES_DIR, name), "r", encoding="utf-8") as f:
+                icons.update(_TEMPLATE_ICON.findall(f.read()))
+    return icons
+
+
+def collect_icons(session: Session) -> Set[str]:
+    values: List[Optional[str]] = []
+    values.extend(session.exec(select(Category.icon)).all())
+    values.extend(session.exec(select(NavigationCard.icon)).all())
+    values.extend(
+        session.exec(select(SiteConfig.value).where(SiteConfig.key == "branding_icon")).all()
+    )
+    return _normalize_icons(values) | collect_template_icons() | BUILTIN_ICONS
+
+
+def _ligature_glyphs(font: "TTFont", icons: Set[str]) -> Set[str]:
+    """Resolve icon names to the ligature glyphs that render them."""
+    cmap = font.getBestCmap()
+    wanted: Dict[tuple, str] = {}
+    for icon in icons:
+        try:
+            wanted[tuple(cmap[ord(ch)] for ch in icon)] = icon
+        except KeyError:
+            continue
+
+    glyphs: Set[str] = set()
+    for lookup in font["GSUB"].table.LookupList.Lookup:
+        for table in lookup.SubTable:
+            table = getattr(table, "ExtSubTable", table)
+            ligatures = getattr(table, "ligatures", None)
+            if not ligatures:
+                continue
+            for first, sequences in ligatures.items():
+                for sequence in sequences:
+                    if (first, *sequence.Component) in wanted:
+                        glyphs.add(sequence.LigGlyph)
+    return glyphs
+
+
+def _subset_to_woff2(path: str, unicodes: List[int], glyphs: Iterable[str] = (), layout_closure: bool = True) -> bytes:
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_closure = layout_closure
+    options.name_IDs = ["*"]
+    font = TTFont(path)
+    subsetter = subset.Subsetter(options=options)
+    subsetter.populate(unicodes=unicodes, glyphs=list(glyphs))
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def _write_hashed(directory: str, stem: str, suffix: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f"{stem}.{digest}{suffix}"
+    target = os.path.join(directory, filename)
+    if not os.path.exists(target):
+        tmp_path = target + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+    return filename
+
+
+def _font_face(family: str, weight: int, url: str, display: str) -> str:
+    return (
+        "@font-face {\n"
+        f"    font-family: '{family}';\n"
+        "    font-style: normal;\n"
+        f"    font-weight: {weight};\n"
+        f"    font-display: {display};\n"
+        f"    src: url('{url}') format('woff2');\n"
+        "}\n"
+    )
+
+
+def _read_manifest() -> Optional[dict]:
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest() -> Optional[dict]:
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = _read_manifest()
+    return _manifest
+
+
+def invalidate_manifest() -> None:
+    global _manifest
+    with _manifest_lock:
+        _manifest = None
+
+
+def stylesheet_url() -> str:
+    manifest = load_manifest()
+    return manifest["url"] if manifest else "/static/css/fonts.css"
+
+
+def build_fonts(session: Optional[Session] = None) -> Optional[str]:
+    """Subset every font and publish a matching stylesheet.
+
+    Returns the stylesheet URL, or None when fontTools is not installed.
+    """
+    global _manifest
+    if subset is None:
+        logger.warning("fontTools is not installed; keeping the full TTF fonts")
+        return None
+
+    with _build_lock:
+        if session is None:
+            with Session(engine) as own_session:
+                icons = collect_icons(own_session)
+        else:
+            icons = collect_icons(session)
+
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        css: List[str] = []
+        files: Set[str] = set()
+
+        for family, weight, source in TEXT_FACES:
+            data = _subset_to_woff2(os.path.join(FONTS_DIR, source), LATIN_UNICODES)
+            filename = _write_hashed(OUTPUT_DIR, source.rsplit(".", 1)[0], ".woff2", data)
+            files.add(filename)
+            css.append(_font_face(family, weight, f"/static/fonts/dist/{filename}", "swap"))
+
+        # Icon names are spelled with lowercase letters, digits and "_"; the
+        # ligature glyphs are added explicitly and closure is disabled so
+        # unused ligatures over the same letters are dropped.
+        icon_path = os.path.join(FONTS_DIR, ICON_FONT)
+        icon_font = TTFont(icon_path)
+        ligatures = _ligature_glyphs(icon_font, icons)
+        letters = sorted({ord(ch) for icon in icons for ch in icon})
+        data = _subset_to_woff2(icon_path, letters, ligatures, layout_closure=False)
+        filename = _write_hashed(OUTPUT_DIR, ICON_FONT.rsplit(".", 1)[0], ".woff2", data)
+        files.add(filename)
+        css.append(_font_face("Material Symbols Outlined", 400, f"/static/fonts/dist/{filename}", "block"))
+        css.append(ICON_CLASS_CSS)
+
+        css_filename = _write_hashed(CSS_DIR, "fonts", ".css", "\n".join(css).encode("utf-8"))
+        static_assets.compress_file(os.path.join(CSS_DIR, css_filename))
+
+        # Another worker may have built since this one loaded the manifest.
+        previous = _read_manifest() or {}
+        retired = previous.get("retired", {})
+        now = time.time()
+        for name in [previous.get("file"), *previous.get("fonts", [])]:
+            if name and name != css_filename and name not in files:
+                retired.setdefault(name, now)
+        retired = {
+            **static_assets.remove_retired(CSS_DIR, CSS_PATTERN, {css_filename}, retired),
+            **static_assets.remove_retired(OUTPUT_DIR, FONT_PATTERN, files, retired),
+        }
+        manifest = {
+            "url": f"/static/css/{css_filename}",
+            "file": css_filename,
+            "fonts": sorted(files),
+            "icons": sorted(icons),
+            "retired": retired,
+        }
+        # Other workers read it on their next poll, so never expose a partial file.
+        with open(MANIFEST_PATH + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(MANIFEST_PATH + ".tmp", MANIFEST_PATH)
+        with _manifest_lock:
+            _manifest = manifest
+        cache_versions.bump_now(cache_versions.ASSETS)
+        return manifest["url"]
+
+
+def ensure_icons(icons: Iterable[Optional[str]]) -> None:
+    """Rebuild the font subsets if any of the given icons is missing.
+
+    Called as a background task after category, card and branding writes.
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        return
+    if _normalize_icons(icons) - set(manifest.get("icons", [])):
+        try:
+            build_fonts()
+        except Exception:
+            logger.exception("Font subset rebuild failed")
+
+
+cache_versions.watcher.register(cache_versions.ASSETS, invalidate_manifest)
+
+
+if __name__ == "__main__":
+    url = build_fonts()
+    if url:
+        print(f"Font stylesheet written to {url}")
+    else:
+        print("fontTools is not installed; run `pip install fonttools[woff]`.")
@@ -0,0 +1,230 @@
+"""Liveness and readiness checks behind ``/api/status``.
+
+Liveness does no I/O: a worker that can answer is alive. Readiness runs a
+small query against the database file in the threadpool with a timeout, so
+a locked, missing or corrupt SQLite file shows up as an error rather than a
+hung probe, and adds the database and WAL file sizes, connection pool and
+threadpool usage, the hit ratio of the in-process caches and the uptime.
+
+The report is cached for HEALTH_CACHE_TTL seconds and only one check runs
+at a time per worker, so a high-frequency probe cannot become load itself.
+Caches register a stats callback with ``checker.register_cache``. Services
+that keep their state in the database register a probe with
+``checker.register_probe``; probes run on the readiness connection under the
+same timeout and may report issues.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import anyio
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.pool import QueuePool
+
+from app.config import get_settings
+from app.database import async_engine, engine
+
+settings = get_settings()
+
+VERSION = "0.1.0"
+
+STATUS_OK = "ok"
+STATUS_DEGRADED = "degraded"
+STATUS_ERROR = "error"
+
+# Sidebar indicator per status; None is "not checked yet".
+_INDICATORS = {
+    STATUS_OK: ("circle", "text-green-500", "状态: 正常", "所有系统运行正常"),
+    STATUS_DEGRADED: ("circle", "text-yellow-500", "状态: 降级", "部分系统响应缓慢"),
+    STATUS_ERROR: ("error", "text-red-500", "状态: 异常", "系统不可用"),
+    None: ("circle", "text-gray-400", "状态: 检查中", "正在检查系统状态"),
+}
+# Kept in the icon font subset (see fonts.collect_icons).
+INDICATOR_ICONS = frozenset(icon for icon, *_ in _INDICATORS.values())
+
+
+def sidebar_indicator(report: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """The sidebar status indicator for a readiness report."""
+    status = report["status"] if report else None
+    icon, color_class, text, tooltip = _INDICATORS[status]
+    if report and report["issues"]:
+        tooltip = "；".join(report["issues"])
+    return {"icon": icon, "colorClass": color_class, "text": text, "tooltip": tooltip}
+
+
+def _file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def database_files(bind: Engine) -> Dict[str, Optional[int]]:
+    path = bind.url.database
+    if bind.url.get_backend_name() != "sqlite" or path in (None, "", ":memory:"):
+        return {}
+    return {"file_bytes": _file_size(path), "wal_bytes": _file_size(f"{path}-wal") or 0}
+
+
+def pool_stats(bind: Engine) -> Dict[str, Any]:
+    pool = bind.pool
+    stats: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            capacity=settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW,
+        )
+    return stats
+
+
+Probe = Callable[[Connection], Dict[str, Any]]
+
+
+def _probe_database(bind: Engine, connections: List[Any], probes: Dict[str, Probe]) -> Dict[str, Any]:
+    # schema_version reads the header page and the count walks a b-tree, so
+    # an unreadable or corrupt file fails here; a held lock waits on
+    # busy_timeout and trips the caller's timeout instead.
+    with bind.connect() as connection:
+        connections.append(connection.connection.dbapi_connection)
+        connection.exec_driver_sql("PRAGMA schema_version").scalar()
+        connection.exec_driver_sql("SELECT count(*) FROM cacheversion").scalar()
+        return {name: probe(connection) for name, probe in probes.items()}
+
+
+class HealthChecker:
+    def __init__(self, ttl: float, db_timeout: float) -> None:
+        self.ttl = ttl
+        self.db_timeout = db_timeout
+        self.started_at = datetime.utcnow()
+        self._started = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._probes: Dict[str, Probe] = {}
+        # Startup phase durations, published by app.services.startup.
+        self.startup: Dict[str, float] = {}
+        self._report: Optional[Dict[str, Any]] = None
+        self._checked = 0.0
+
+    def register_cache(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self._caches[name] = stats
+
+    def register_probe(self, name: str, probe: Probe) -> None:
+        """Add a query to the readiness check; an ``issues`` list in its result is reported."""
+        self._probes[name] = probe
+
+    def set_startup(self, timings: Dict[str, float]) -> None:
+        """Publish the startup phase durations.
+
+        The report cached during startup predates them, so it expires now;
+        it stays available as ``last`` until the next check.
+        """
+        self.startup = dict(timings)
+        self._checked = float("-inf")
+
+    @property
+    def last(self) -> Optional[Dict[str, Any]]:
+        """The most recent readiness report, however old; None before the first check."""
+        return self._report
+
+    def uptime(self) -> float:
+        return round(time.monotonic() - self._started, 1)
+
+    def liveness(self) -> Dict[str, Any]:
+        return {"status": STATUS_OK, "uptime_seconds": self.uptime(), "pid": os.getpid()}
+
+    def _fresh(self) -> Optional[Dict[str, Any]]:
+        if self._report is not None and time.monotonic() - self._checked < self.ttl:
+            return self._report
+        return None
+
+    async def report(self) -> Dict[str, Any]:
+        report = self._fresh()
+        if report is not None:
+            return report
+        async with self._lock:
+            report = self._fresh()
+            if report is None:
+                report = await self._check()
+                self._report, self._checked = report, time.monotonic()
+        return report
+
+    async def _check_database(self) -> Dict[str, Any]:
+        connections: List[Any] = []
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"status": STATUS_OK, "probes": {}}
+        try:
+            with anyio.fail_after(self.db_timeout):
+                result["probes"] = await anyio.to_thread.run_sync(
+                    _probe_database, engine, connections, self._probes, abandon_on_cancel=True
+                )
+        except TimeoutError:
+            for connection in connections:
+                # Stop the abandoned query so it does not hold a connection.
+                connection.interrupt()
+            result.update(status=STATUS_ERROR, error="timeout")
+        except Exception as exc:
+            result.update(status=STATUS_ERROR, error=str(exc).splitlines()[0])
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result.update(database_files(engine))
+        return result
+
+    async def _check(self) -> Dict[str, Any]:
+        issues: List[str] = []
+        database = await self._check_database()
+        if database.get("error") == "timeout":
+            issues.append("数据库响应超时")
+        elif database["status"] == STATUS_ERROR:
+            issues.append(f"数据库不可用: {database['error']}")
+        elif database["latency_ms"] > self.db_timeout * 1000 / 2:
+            issues.append(f"数据库响应缓慢（{database['latency_ms']} ms）")
+        probes = database.pop("probes")
+        for probe in probes.values():
+            issues.extend(probe.pop("issues", []))
+
+        pools = {"sync": pool_stats(engine)}
+        if async_engine is not None:
+            pools["async"] = pool_stats(async_engine.sync_engine)
+        for name, stats in pools.items():
+            if stats.get("checked_out", 0) >= stats.get("capacity", float("inf")):
+                issues.append(f"数据库连接池已满（{name}）")
+
+        limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+        threadpool = {
+            "in_use": limiter.borrowed_tokens,
+            "total": limiter.total_tokens,
+            "waiting": limiter.tasks_waiting,
+        }
+        if limiter.tasks_waiting:
+            issues.append(f"线程池繁忙（{limiter.tasks_waiting} 个任务排队）")
+
+        if database["status"] == STATUS_ERROR:
+            status = STATUS_ERROR
+        else:
+            status = STATUS_DEGRADED if issues else STATUS_OK
+        report = {
+            "status": status,
+            "ready": status != STATUS_ERROR,
+            "issues": issues,
+            "timestamp": datetime.utcnow().isoformat(),
+            "version": VERSION,
+            "started_at": self.started_at.isoformat(),
+            "uptime_seconds": self.uptime(),
+            "startup_seconds": self.startup,
+            "checks": {
+                "database": database,
+                "pools": pools,
+                "threadpool": threadpool,
+                "caches": {name: stats() for name, stats in self._caches.items()},
+                **probes,
+            },
+        }
+        report["indicator"] = sidebar_indicator(report)
+        return report
+
+
+checker = HealthChecker(ttl=settings.HEALTH_CACHE_TTL, db_timeout=settings.HEALTH_DB_TIMEOUT)
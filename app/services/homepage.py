@@ -0,0 +1,69 @@
+import hashlib
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+from jinja2 import Environment
+
+from app.services import fonts, tailwind
+from app.services.navigation import NavigationEntry, active_section_id
+
+
+class HomepageEntry(NamedTuple):
+    source_etag: str
+    stylesheets: Tuple[Optional[str], str]
+    body: bytes
+    etag: str
+
+
+class HomepageCache:
+    """Full-document cache for the server-rendered homepage.
+
+    The document is a pure function of the navigation snapshot and the
+    compiled stylesheets, so it is keyed by both and re-rendered only when the
+    data version changes or a stylesheet is rebuilt.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entry: Optional[HomepageEntry] = None
+
+    def current(self, navigation: NavigationEntry) -> Optional[HomepageEntry]:
+        """The cached document if it is still valid for this snapshot."""
+        stylesheets = (tailwind.stylesheet_url(), fonts.stylesheet_url())
+        entry = self._entry
+        if (
+            entry is not None
+            and entry.source_etag == navigation.etag
+            and entry.stylesheets == stylesheets
+        ):
+            return entry
+        return None
+
+    def render(self, env: Environment, navigation: NavigationEntry) -> HomepageEntry:
+        entry = self.current(navigation)
+        if entry is not None:
+            return entry
+        stylesheets = (tailwind.stylesheet_url(), fonts.stylesheet_url())
+
+        # Only the shell and the visible section are inlined; the page fetches
+        # other sections when they are opened. Escaping "<" keeps the inlined
+        # JSON from closing the script element.
+        section = navigation.sections.get(active_section_id(navigation.payload))
+        html = env.get_template("index.html").render(
+            navigation=navigation.payload,
+            navigation_json=navigation.shell.body.decode("utf-8").replace("<", "\\u003c"),
+            section_json=section.body.decode("utf-8").replace("<", "\\u003c") if section else None,
+        )
+        body = html.encode("utf-8")
+        entry = HomepageEntry(
+            source_etag=navigation.etag,
+            stylesheets=stylesheets,
+            body=body,
+            etag='"%s"' % hashlib.sha256(body).hexdigest()[:32],
+        )
+        with self._lock:
+            self._entry = entry
+        return entry
+
+
+homepage_cache = HomepageCache()
@@ -0,0 +1,332 @@
+"""Background checks of the card links.
+
+A sweep checks every distinct http(s) card href whose last check is older
+than LINK_CHECK_MAX_AGE seconds, through one pooled keep-alive client:
+
+- HEAD first, then GET (headers only, the body is never read) when HEAD
+  fails, since some servers refuse or mishandle HEAD;
+- the ETag and Last-Modified of the last response are sent back as
+  If-None-Match / If-Modified-Since, and a 304 counts as reachable;
+- at most LINK_CHECK_CONCURRENCY requests are in flight, LINK_CHECK_PER_HOST
+  per host, and request starts are spaced to LINK_CHECK_RATE per second.
+  Links are queued round-robin across hosts, so a host with thousands of
+  links neither gets hammered nor holds up the others;
+- every request times out after LINK_CHECK_TIMEOUT seconds.
+
+Results are upserted into ``linkstatus`` in batches. A link counts as broken
+after LINK_CHECK_BROKEN_AFTER consecutive failures. When a sweep changes
+which links are broken it bumps the navigation cache version, so every
+worker rebuilds its snapshot with the new card badges; the broken count is
+part of the readiness report and so of the sidebar status indicator.
+
+With LINK_CHECK_ENABLED, one worker (whichever holds a file lock next to the
+database) sweeps every LINK_CHECK_INTERVAL seconds. Sweep by hand with
+
+    python -m app.services.link_health [--all]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import zip_longest
+from typing import IO, Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import anyio
+import httpx
+from sqlalchemy import case, delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, func, select
+
+from app.config import get_settings
+from app.database import engine
+from app.models import LinkStatus, NavigationCard
+from app.services import cache_versions, health, startup
+from app.services.navigation import navigation_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every worker sweeps.
+    fcntl = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "navigator-link-check/0.1"
+# Results written per transaction.
+BATCH_SIZE = 200
+
+
+class Target(NamedTuple):
+    url: str
+    failures: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def is_broken(failures: int) -> bool:
+    return failures >= settings.LINK_CHECK_BROKEN_AFTER
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def interleave(targets: List[Target]) -> List[Target]:
+    """Order targets round-robin by host."""
+    by_host: Dict[str, List[Target]] = defaultdict(list)
+    for target in targets:
+        by_host[_host(target.url)].append(target)
+    return [target for group in zip_longest(*by_host.values()) for target in group if target is not None]
+
+
+class RateLimiter:
+    """Spaces request starts at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def load_targets(force: bool = False) -> List[Target]:
+    """Card hrefs never checked or last checked more than LINK_CHECK_MAX_AGE ago."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.LINK_CHECK_MAX_AGE)
+    with Session(engine) as session:
+        hrefs = session.exec(select(NavigationCard.href).distinct()).all()
+        statuses = {row.url: row for row in session.exec(select(LinkStatus)).all()}
+    targets = []
+    for href in hrefs:
+        if not href.startswith(("http://", "https://")):
+            continue
+        status = statuses.get(href)
+        if status is None:
+            targets.append(Target(href, 0, None, None))
+        elif force or status.checked_at < cutoff:
+            targets.append(Target(href, status.failures, status.etag, status.last_modified))
+    return targets
+
+
+def save_results(rows: List[Dict[str, Any]]) -> None:
+    table = LinkStatus.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["url"],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "url"},
+    )
+    with Session(engine) as session:
+        session.execute(stmt, rows)
+        session.commit()
+
+
+def finish_sweep(changed: bool) -> int:
+    """Drop results for hrefs no card uses any more; bump the navigation version if badges changed."""
+    with Session(engine) as session:
+        removed = session.execute(
+            delete(LinkStatus).where(LinkStatus.url.not_in(select(NavigationCard.href)))
+        ).rowcount
+        if changed or removed:
+            session.execute(cache_versions.bump_statement(cache_versions.NAVIGATION))
+        session.commit()
+    if changed or removed:
+        navigation_snapshot.invalidate()
+    return removed
+
+
+class LinkChecker:
+    def __init__(self, concurrency: int, per_host: int, rate: float, timeout: float) -> None:
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+
+    async def _request(
+        self, client: httpx.AsyncClient, limiter: RateLimiter, method: str, url: str, headers: Dict[str, str]
+    ) -> httpx.Response:
+        await limiter.acquire()
+        # Leaving the block without reading closes the response; for GET
+        # that costs the connection but saves downloading the page.
+        async with client.stream(method, url, headers=headers) as response:
+            return response
+
+    async def check(
+        self, client: httpx.AsyncClient, limiter: RateLimiter, host: asyncio.Semaphore, target: Target
+    ) -> Tuple[Dict[str, Any], str]:
+        """One link; returns its ``linkstatus`` row and the outcome (ok, not_modified, failed, error)."""
+        headers = {}
+        if target.etag:
+            headers["If-None-Match"] = target.etag
+        if target.last_modified:
+            headers["If-Modified-Since"] = target.last_modified
+        response: Optional[httpx.Response] = None
+        error = None
+        started = time.perf_counter()
+        async with host:
+            try:
+                try:
+                    response = await self._request(client, limiter, "HEAD", target.url, headers)
+                except httpx.TimeoutException:
+                    raise
+                except httpx.TransportError:
+                    # Some servers drop the connection on HEAD but answer GET.
+                    response = None
+                if response is None or response.status_code >= 400:
+                    response = await self._request(client, limiter, "GET", target.url, headers)
+            except httpx.TimeoutException:
+                error = "timeout"
+            except Exception as exc:  # connection errors, bad URLs, TLS failures
+                error = f"{type(exc).__name__}: {exc}"[:200]
+        row = {
+            "url": target.url,
+            "status_code": None,
+            "error": error,
+            "failures": target.failures + 1,
+            "etag": target.etag,
+            "last_modified": target.last_modified,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "checked_at": datetime.utcnow(),
+        }
+        if response is None:
+            return row, "error"
+        row["status_code"] = response.status_code
+        if response.status_code == 304:
+            row["failures"] = 0
+            return row, "not_modified"
+        row["etag"] = response.headers.get("etag")
+        row["last_modified"] = response.headers.get("last-modified")
+        if response.status_code < 400:
+            row["failures"] = 0
+            return row, "ok"
+        return row, "failed"
+
+    async def sweep(self, force: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        targets = interleave(await anyio.to_thread.run_sync(load_targets, force))
+        limiter = RateLimiter(self.rate)
+        hosts: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        outcomes: Counter = Counter()
+        pending: List[Dict[str, Any]] = []
+        changed = False
+        queue = iter(targets)
+
+        async def flush() -> None:
+            nonlocal pending
+            batch, pending = pending, []
+            if batch:
+                await anyio.to_thread.run_sync(save_results, batch)
+
+        async def worker(client: httpx.AsyncClient) -> None:
+            nonlocal changed
+            for target in queue:
+                row, outcome = await self.check(client, limiter, hosts[_host(target.url)], target)
+                outcomes[outcome] += 1
+                changed = changed or is_broken(row["failures"]) != is_broken(target.failures)
+                pending.append(row)
+                if len(pending) >= BATCH_SIZE:
+                    await flush()
+
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        ) as client:
+            await asyncio.gather(*(worker(client) for _ in range(min(self.concurrency, len(targets)))))
+        await flush()
+        removed = await anyio.to_thread.run_sync(finish_sweep, changed)
+        return {
+            "checked": len(targets),
+            "hosts": len(hosts),
+            **outcomes,
+            "removed": removed,
+            "badges_changed": changed,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+
+
+checker = LinkChecker(
+    concurrency=settings.LINK_CHECK_CONCURRENCY,
+    per_host=settings.LINK_CHECK_PER_HOST,
+    rate=settings.LINK_CHECK_RATE,
+    timeout=settings.LINK_CHECK_TIMEOUT,
+)
+
+
+def probe(connection: Connection) -> Dict[str, Any]:
+    """Readiness probe: how many links are checked and broken."""
+    checked, broken, last = connection.execute(
+        select(
+            func.count(),
+            func.sum(case((LinkStatus.failures >= settings.LINK_CHECK_BROKEN_AFTER, 1), else_=0)),
+            func.max(LinkStatus.checked_at),
+        ).select_from(LinkStatus)
+    ).one()
+    broken = broken or 0
+    return {
+        "checked": checked,
+        "broken": broken,
+        "last_checked_at": last.isoformat() if isinstance(last, datetime) else last,
+        "issues": [f"{broken} 个链接无法访问"] if broken else [],
+    }
+
+
+if settings.LINK_CHECK_ENABLED:
+    health.checker.register_probe("links", probe)
+
+
+def _try_lock() -> Optional[IO]:
+    if fcntl is None:
+        return open(os.devnull)
+    handle = open(startup.lock_path("linkcheck"), "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+async def run_sweeper() -> None:
+    """Sweep every LINK_CHECK_INTERVAL seconds if this worker holds the sweep lock."""
+    lock = None
+    try:
+        while True:
+            if lock is None:
+                lock = _try_lock()
+            if lock is not None:
+                try:
+                    logger.info("Link sweep: %s", await checker.sweep())
+                except Exception:
+                    logger.exception("Link sweep failed")
+            await asyncio.sleep(settings.LINK_CHECK_INTERVAL)
+    finally:
+        if lock is not None:
+            lock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the card links now.")
+    parser.add_argument("--all", action="store_true", help="recheck links checked within LINK_CHECK_MAX_AGE too")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(checker.sweep(force=args.all))))
+
+
+if __name__ == "__main__":
+    main()
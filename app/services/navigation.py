@@ -0,0 +1,396 @@
+import hashlib
+import heapq
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+
+from sqlalchemy import null
+from sqlmodel import Session, func, select
+
+from app.config import get_settings
+from app.core.serialization import dumps
+from app.models import CacheVersion, Category, LinkStatus, NavigationCard, SiteConfig
+from app.services import cache_versions, health
+from app.services.site_config import ensure_loaded
+
+settings = get_settings()
+
+# Slug of the "most used" section; skipped if a category already uses it.
+POPULAR_SECTION_ID = "most-used"
+POPULAR_SECTION_ICON = "local_fire_department"
+
+
+def _ensure_query_placeholder(url: str) -> str:
+    if not url:
+        return "https://www.google.com/search?q={query}"
+    if "{query}" in url:
+        return url
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}q={{query}}"
+
+
+def _serialize_card(card: NavigationCard, link_failures: Optional[int] = None) -> Dict[str, Any]:
+    data = {
+        # Sent back by the page's click beacon.
+        "id": card.id,
+        "title": card.title,
+        "subtitle": card.subtitle,
+        "description": card.description,
+        "icon": card.icon,
+        "iconBgClass": card.icon_bg_class,
+        "iconColorClass": card.icon_color_class,
+        "href": card.href,
+    }
+    if link_failures is not None and link_failures >= settings.LINK_CHECK_BROKEN_AFTER:
+        # Badge for links the link checker keeps failing to reach.
+        data["linkStatus"] = "broken"
+    return data
+
+
+def build_navigation_payload(session: Session) -> Dict[str, Any]:
+    """Build the public navigation payload.
+
+    Categories and their cards come from a single outer-joined query that is
+    already ordered the way the page renders them, so no per-category lazy
+    loads or Python-side sorting are needed. With the link checker enabled,
+    the same query joins each card's link status.
+    """
+    query = (
+        select(Category, NavigationCard)
+        .join(NavigationCard, NavigationCard.category_id == Category.id, isouter=True)
+        .order_by(Category.order, Category.id, NavigationCard.order, NavigationCard.id)
+    )
+    if settings.LINK_CHECK_ENABLED:
+        query = query.add_columns(LinkStatus.failures).join(
+            LinkStatus, LinkStatus.url == NavigationCard.href, isouter=True
+        )
+    else:
+        query = query.add_columns(null())
+    rows = session.exec(query).all()
+
+    config = ensure_loaded(session)
+
+    menu_items: List[Dict[str, Any]] = []
+    sections: List[Dict[str, Any]] = []
+    current_id: Optional[int] = None
+    card_list: List[Dict[str, Any]] = []
+
+    for cat, card, link_failures in rows:
+        if cat.id != current_id:
+            current_id = cat.id
+            card_list = []
+            menu_items.append({
+                "id": cat.slug,
+                "label": cat.label,
+                "icon": cat.icon,
+                "href": "#",
+                "active": cat.active,
+                "count": 0
+            })
+            sections.append({
+                "id": cat.slug,
+                "type": "grid",
+                "title": cat.label,
+                "cards": card_list
+            })
+        if card is not None:
+            card_list.append(_serialize_card(card, link_failures))
+            menu_items[-1]["count"] += 1
+
+    return {
+        "branding": {
+            "icon": config.branding_icon,
+            "title": config.branding_title
+        },
+        "sidebar": {
+            "menuItems": menu_items,
+            "status": {
+                # Status at build time; the page refreshes it from /api/status.
+                "indicator": health.sidebar_indicator(health.checker.last),
+                "refresh": {
+                    "icon": "sync",
+                    "tooltip": "刚刚更新"
+                }
+            }
+        },
+        "header": {
+            "links": [
+                {
+                    "label": "主站",
+                    "href": "/"
+                }
+            ]
+        },
+        "hero": {
+            "searchPlaceholder": config.search_placeholder,
+            "searchEngine": {
+                "name": config.search_engine_name,
+                "url": _ensure_query_placeholder(config.search_engine_url)
+            }
+        },
+        "sections": sections
+    }
+
+
+def _by_popularity(section: Dict[str, Any], popularity: Dict[int, int]) -> Dict[str, Any]:
+    # Stable sort: cards with equal clicks keep their configured order.
+    cards = sorted(section["cards"], key=lambda card: -popularity.get(card["id"], 0))
+    if all(a is b for a, b in zip(cards, section["cards"])):
+        return section
+    return {**section, "cards": cards}
+
+
+def apply_popularity(payload: Dict[str, Any], popularity: Dict[int, int]) -> Dict[str, Any]:
+    """The payload with a "most used" section and, if configured, cards by clicks.
+
+    ``popularity`` maps card ids to clicks in the popularity window. The
+    input is not modified; unchanged sections are shared with it.
+    """
+    if not popularity:
+        return payload
+    sections = payload["sections"]
+    if settings.CLICK_ORDER_BY_POPULARITY:
+        sections = [_by_popularity(section, popularity) for section in sections]
+    menu_items = payload["sidebar"]["menuItems"]
+    popular = heapq.nlargest(
+        settings.CLICK_POPULAR_LIMIT,
+        (card for section in payload["sections"] for card in section["cards"] if popularity.get(card["id"])),
+        key=lambda card: popularity[card["id"]],
+    )
+    if popular and all(item["id"] != POPULAR_SECTION_ID for item in menu_items):
+        menu_items = menu_items + [{
+            "id": POPULAR_SECTION_ID,
+            "label": "最常用",
+            "icon": POPULAR_SECTION_ICON,
+            "href": "#",
+            "active": False,
+            "count": len(popular)
+        }]
+        sections = sections + [{
+            "id": POPULAR_SECTION_ID,
+            "type": "grid",
+            "title": "最常用",
+            "cards": popular
+        }]
+    return {
+        **payload,
+        "sidebar": {**payload["sidebar"], "menuItems": menu_items},
+        "sections": sections,
+    }
+
+
+def active_section_id(payload: Dict[str, Any]) -> Optional[str]:
+    """The section shown on load: the first active menu item, else the first."""
+    menu_items = payload["sidebar"]["menuItems"]
+    for item in menu_items:
+        if item["active"]:
+            return item["id"]
+    return menu_items[0]["id"] if menu_items else None
+
+
+def _etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+class SerializedPart(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class NavigationEntry(NamedTuple):
+    payload: Dict[str, Any]
+    body: bytes
+    etag: str
+    last_modified: datetime
+    # Everything but the cards, for /api/navigation/shell.
+    shell: SerializedPart
+    # Section slug -> that section alone, for /api/navigation/sections/{slug}.
+    # Each part has its own ETag, so a write to one category leaves the
+    # others' ETags, and their clients' caches, valid.
+    sections: Dict[str, SerializedPart]
+    # The payload as read from the database, before popularity is applied.
+    base: Dict[str, Any]
+    # Ids of the cards shown, for the click beacon.
+    card_ids: FrozenSet[int]
+
+
+def _card_ids(section: Dict[str, Any]) -> List[int]:
+    return [card["id"] for card in section["cards"]]
+
+
+def compose_entry(
+    base: Dict[str, Any],
+    popularity: Dict[int, int],
+    last_modified: datetime,
+    previous: Optional[NavigationEntry] = None,
+) -> NavigationEntry:
+    """Serialize ``base`` with ``popularity`` applied.
+
+    With ``previous`` built from the same base, sections whose cards are in
+    the same order keep their serialized body and ETag, and ``previous``
+    itself is returned if nothing changed. The full body is the shell and
+    the section bodies joined, so no section is serialized twice.
+    """
+    payload = apply_popularity(base, popularity)
+    old_sections = {}
+    if previous is not None:
+        old_sections = {section["id"]: section for section in previous.payload["sections"]}
+    parts: Dict[str, SerializedPart] = {}
+    reused = 0
+    for section in payload["sections"]:
+        old = old_sections.get(section["id"])
+        if old is not None and _card_ids(old) == _card_ids(section):
+            parts[section["id"]] = previous.sections[section["id"]]
+            reused += 1
+        else:
+            body = dumps(section)
+            parts[section["id"]] = SerializedPart(body, _etag(body))
+    shell = dumps({key: value for key, value in payload.items() if key != "sections"})
+    if previous is not None and reused == len(old_sections) == len(parts) and shell == previous.shell.body:
+        return previous
+    # "sections" is the last key of the payload.
+    body = b"".join([
+        shell[:-1],
+        b',"sections":[',
+        b",".join(parts[section["id"]].body for section in payload["sections"]),
+        b"]}",
+    ])
+    return NavigationEntry(
+        payload=payload,
+        body=body,
+        etag=_etag(body),
+        last_modified=last_modified,
+        shell=SerializedPart(shell, _etag(shell)),
+        sections=parts,
+        base=base,
+        card_ids=frozenset(card_id for section in base["sections"] for card_id in _card_ids(section)),
+    )
+
+
+def _latest_update(session: Session) -> Optional[datetime]:
+    row = session.exec(
+        select(
+            select(func.max(Category.updated_at)).scalar_subquery(),
+            select(func.max(NavigationCard.updated_at)).scalar_subquery(),
+            select(func.max(SiteConfig.updated_at)).scalar_subquery(),
+            # Bumped by every navigation write, including deletes.
+            select(CacheVersion.updated_at)
+            .where(CacheVersion.name == cache_versions.NAVIGATION)
+            .scalar_subquery(),
+        )
+    ).first()
+    values = [value for value in (row or ()) if value is not None]
+    return max(values) if values else None
+
+
+class NavigationSnapshot:
+    """Process-local cache of the navigation payload as pre-serialized JSON.
+
+    The snapshot is built lazily on the first read after an invalidation. A
+    generation counter guards against a build that raced with a write: if
+    ``invalidate`` ran while the payload was being built, the result is served
+    once but not stored.
+
+    Each entry carries a strong ETag derived from the body and a
+    Last-Modified taken from the newest ``updated_at`` across categories,
+    cards and configs. Deletes leave no ``updated_at`` behind, so the time of
+    the last ``navigation`` cache version bump is folded in as well; it is
+    read from the database, so every worker derives the same value. The shell and every section
+    are serialized separately in the same build, each with an ETag of its
+    own body.
+
+    Click counts arrive through ``set_popularity`` every few seconds. They
+    do not invalidate the snapshot: the current entry is recomposed from its
+    database payload, re-serializing only the sections whose order changed.
+    The time the counts were flushed is folded into Last-Modified, whether
+    they arrive before or after the build, so workers holding the same counts
+    agree on it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._entry: Optional[NavigationEntry] = None
+        self._built: Optional[float] = None
+        self._popularity: Dict[int, int] = {}
+        self._popularity_at: Optional[datetime] = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def current(self) -> Optional[NavigationEntry]:
+        entry = self._entry
+        # Unlocked counters: approximate under threads, exact enough for stats.
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        built = self._built if self._entry is not None else None
+        lookups = self.hits + self.misses
+        return {
+            "cached": built is not None,
+            "age_seconds": round(time.monotonic() - built, 1) if built is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entry = None
+
+    def _build(self, session: Session) -> NavigationEntry:
+        with self._lock:
+            generation = self._generation
+            popularity = self._popularity
+            popularity_at = self._popularity_at
+        base = build_navigation_payload(session)
+        candidates = [
+            value for value in (_latest_update(session), popularity_at) if value is not None
+        ]
+        entry = compose_entry(base, popularity, max(candidates) if candidates else datetime.utcnow())
+        with self._lock:
+            if generation == self._generation:
+                self._entry = entry
+                self._built = time.monotonic()
+        return entry
+
+    def set_popularity(self, popularity: Dict[int, int], updated_at: Optional[datetime] = None) -> None:
+        """Replace the click counts (card id -> clicks), flushed at ``updated_at``, and recompose the entry."""
+        with self._lock:
+            popularity_at = self._popularity_at
+            if updated_at is not None:
+                popularity_at = max(popularity_at or updated_at, updated_at)
+            if popularity == self._popularity and popularity_at == self._popularity_at:
+                return
+            self._popularity = popularity
+            self._popularity_at = popularity_at
+            generation = self._generation
+            previous = self._entry
+        if previous is None:
+            return
+        last_modified = max(previous.last_modified, popularity_at or previous.last_modified)
+        entry = compose_entry(previous.base, popularity, last_modified, previous)
+        if entry.last_modified != last_modified:
+            # Same order, later flush: only the header moves.
+            entry = entry._replace(last_modified=last_modified)
+        with self._lock:
+            # Dropped if a write or a newer set_popularity got here first.
+            if generation == self._generation and self._entry is previous and self._popularity is popularity:
+                self._entry = entry
+
+    def get(self, session: Session) -> NavigationEntry:
+        entry = self._entry
+        if entry is None:
+            entry = self._build(session)
+        return entry
+
+
+navigation_snapshot = NavigationSnapshot()
+cache_versions.watcher.register(cache_versions.NAVIGATION, navigation_snapshot.invalidate)
+health.checker.register_cache("navigation", navigation_snapshot.stats)
@@ -0,0 +1,217 @@
+"""Full-text search over the navigation cards with an SQLite FTS5 index.
+
+``card_search`` is an FTS5 table keyed by card id that holds the title,
+subtitle, description, href and category label of every card. FTS5's
+``unicode61`` tokenizer splits on spaces and punctuation only, so a run of
+Chinese characters would become one token; text is therefore segmented
+before it is stored, with every CJK character made a token of its own, and
+queries are segmented the same way so a Chinese word becomes a phrase of
+adjacent characters. Latin words are matched as prefixes for
+search-as-you-type; results are ranked with weighted bm25.
+
+The card and category write paths keep the index in sync inside their own
+transaction. ``python -m app.services.search`` rebuilds it from scratch.
+"""
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+TABLE = "card_search"
+COLUMNS = ("title", "subtitle", "description", "href", "category")
+# bm25 weights, in column order: a title hit outranks a description hit.
+WEIGHTS = (10.0, 4.0, 2.0, 1.0, 3.0)
+MAX_TERMS = 8
+
+# Han ideographs (incl. extension A and compatibility) and kana.
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_CJK_CHAR = re.compile(f"[{_CJK}]")
+_CJK_RUN = re.compile(f"[{_CJK}]+")
+_QUERY_TERM = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+
+_CREATE_TABLE = text(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    f"{', '.join(COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+_TABLE_EXISTS = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+_INSERT = text(
+    f"INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)}) "
+    f"VALUES (:id, {', '.join(':' + column for column in COLUMNS)})"
+)
+_DELETE_CARDS = text(f"DELETE FROM {TABLE} WHERE rowid IN :ids").bindparams(
+    bindparam("ids", expanding=True)
+)
+_DELETE_CATEGORIES = text(
+    f"DELETE FROM {TABLE} WHERE rowid IN "
+    "(SELECT id FROM navigationcard WHERE category_id IN :ids)"
+).bindparams(bindparam("ids", expanding=True))
+_SOURCE = (
+    "SELECT c.id, c.title, c.subtitle, c.description, c.href, cat.label AS category "
+    "FROM navigationcard c JOIN category cat ON cat.id = c.category_id"
+)
+# Rank and limit inside the FTS table first so only the returned hits are
+# joined to their card and category rows.
+_SEARCH = text(
+    "SELECT c.id, c.title, c.subtitle, c.description, c.icon, c.icon_bg_class, "
+    "c.icon_color_class, c.href, cat.slug, cat.label, hit.rank AS score "
+    f"FROM (SELECT rowid, rank FROM {TABLE} WHERE {TABLE} MATCH :query "
+    f"AND rank MATCH 'bm25({', '.join(str(weight) for weight in WEIGHTS)})' "
+    "ORDER BY rank LIMIT :limit) AS hit "
+    "JOIN navigationcard c ON c.id = hit.rowid "
+    "JOIN category cat ON cat.id = c.category_id "
+    "ORDER BY hit.rank"
+)
+
+_available: Optional[bool] = None
+
+
+def _spaced(match: "re.Match[str]") -> str:
+    return " %s " % " ".join(match.group())
+
+
+def segment(value: Optional[str]) -> str:
+    """Surround every CJK character with spaces so it is indexed as a token."""
+    return _CJK_RUN.sub(_spaced, value) if value else ""
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Translate user input into an FTS5 MATCH expression.
+
+    Every term must match. CJK runs become phrases of single characters;
+    other words are quoted and matched as prefixes. Returns None when the
+    input has nothing searchable.
+    """
+    terms = []
+    for term in _QUERY_TERM.findall(query)[:MAX_TERMS]:
+        if _CJK_CHAR.match(term):
+            terms.append('"%s"' % " ".join(term))
+        else:
+            terms.append('"%s"*' % term.lower())
+    return " ".join(terms) or None
+
+
+def _rows(session: Session, where: str = "", ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    statement = text(f"{_SOURCE} {where}")
+    params: Dict[str, Any] = {}
+    if ids is not None:
+        statement = statement.bindparams(bindparam("ids", expanding=True))
+        params["ids"] = ids
+    return [
+        {"id": row.id, **{column: segment(getattr(row, column)) for column in COLUMNS}}
+        for row in session.execute(statement, params)
+    ]
+
+
+def _is_available(bind: Connection) -> bool:
+    global _available
+    if _available is None:
+        _available = bind.execute(_TABLE_EXISTS, {"name": TABLE}).first() is not None
+    return _available
+
+
+def available(session: Session) -> bool:
+    return _is_available(session.connection())
+
+
+def ensure_index(bind: Optional[Engine] = None) -> bool:
+    """Create the FTS table if needed and fill it when it was just created.
+
+    Returns False when the SQLite build has no FTS5; search is then disabled
+    and the write paths skip indexing.
+    """
+    global _available
+    bind = bind or engine
+    try:
+        with Session(bind) as session:
+            created = session.execute(_TABLE_EXISTS, {"name": TABLE}).first() is None
+            session.execute(_CREATE_TABLE)
+            _available = True
+            if created:
+                rebuild(session)
+            session.commit()
+    except OperationalError:
+        logger.warning("SQLite FTS5 is not available; card search is disabled")
+        _available = False
+    return _available
+
+
+def rebuild(session: Session) -> int:
+    """Re-index every card. The caller commits."""
+    session.execute(text(f"DELETE FROM {TABLE}"))
+    rows = _rows(session)
+    if rows:
+        session.execute(_INSERT, rows)
+    return len(rows)
+
+
+def sync_cards(session: Session, card_ids: Iterable[Optional[int]]) -> None:
+    """Re-index the given cards; ids that no longer exist are removed.
+
+    Call before commit, after the cards have been added, changed or deleted.
+    """
+    ids = [card_id for card_id in set(card_ids) if card_id is not None]
+    if not ids or not available(session):
+        return
+    session.flush()
+    session.execute(_DELETE_CARDS, {"ids": ids})
+    rows = _rows(session, "WHERE c.id IN :ids", ids)
+    if rows:
+        session.execute(_INSERT, rows)
+
+
+def sync_categories(session: Session, category_ids: Iterable[int]) -> None:
+    """Re-index the cards of categories whose label changed."""
+    ids = list(set(category_ids))
+    if not ids or not available(session):
+        return
+    session.flush()
+    session.execute(_DELETE_CATEGORIES, {"ids": ids})
+    rows = _rows(session, "WHERE c.category_id IN :ids", ids)
+    if rows:
+        session.execute(_INSERT, rows)
+
+
+def remove_categories(session: Session, category_ids: Iterable[int]) -> None:
+    """Drop the index rows of categories about to be deleted with their cards."""
+    ids = list(set(category_ids))
+    if ids and available(session):
+        session.execute(_DELETE_CATEGORIES, {"ids": ids})
+
+
+def search_cards(session: Session, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    match = build_match_query(query)
+    if match is None or not available(session):
+        return []
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "subtitle": row.subtitle,
+            "description": row.description,
+            "icon": row.icon,
+            "iconBgClass": row.icon_bg_class,
+            "iconColorClass": row.icon_color_class,
+            "href": row.href,
+            "section": {"id": row.slug, "title": row.label},
+            "score": round(-row.score, 4),
+        }
+        for row in session.execute(_SEARCH, {"query": match, "limit": limit})
+    ]
+
+
+if __name__ == "__main__":
+    import app.models  # noqa: F401  (register the tables)
+
+    ensure_index()
+    with Session(engine) as session:
+        count = rebuild(session)
+        session.commit()
+    print(f"Indexed {count} cards for search.")
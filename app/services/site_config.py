@@ -0,0 +1,112 @@
+"""Write-through, in-memory cache of the ``SiteConfig`` table.
+
+All keys are loaded with one query on first use and served from memory
+afterwards. ``set`` is called after a committed upsert so the writing worker
+sees its change immediately; other workers reload when the ``site_config``
+version moves (see ``app.services.cache_versions``).
+"""
+import threading
+from typing import Dict, Optional
+
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.database import DBSession
+from app.models import SiteConfig
+from app.services import cache_versions
+
+settings = get_settings()
+
+SEARCH_PLACEHOLDER_KEY = "hero_search_placeholder"
+SEARCH_ENGINE_NAME_KEY = "search_engine_name"
+SEARCH_ENGINE_URL_KEY = "search_engine_url"
+BRANDING_TITLE_KEY = "branding_title"
+BRANDING_ICON_KEY = "branding_icon"
+
+DEFAULTS: Dict[str, str] = {
+    SEARCH_PLACEHOLDER_KEY: "搜索工具、资源...",
+    SEARCH_ENGINE_NAME_KEY: "Google",
+    SEARCH_ENGINE_URL_KEY: settings.GOOGLE_SEARCH_URL or "https://www.google.com/search?q={query}",
+    BRANDING_TITLE_KEY: settings.APP_NAME or "个人导航网站",
+    BRANDING_ICON_KEY: "hub",
+}
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+class SiteConfigCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, str]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._values is not None
+
+    def load(self, session: Session) -> None:
+        rows = session.exec(select(SiteConfig.key, SiteConfig.value)).all()
+        with self._lock:
+            self._values = {key: value for key, value in rows}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._values = None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            if self._values is not None:
+                self._values = {**self._values, key: value}
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        values = self._values or {}
+        if key in values:
+            return values[key]
+        return default if default is not None else DEFAULTS.get(key)
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        value = self.get(key)
+        try:
+            return int(value) if value is not None else default
+        except ValueError:
+            return default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key)
+        return value.strip().lower() in _TRUE_VALUES if value is not None else default
+
+    @property
+    def search_placeholder(self) -> str:
+        return self.get(SEARCH_PLACEHOLDER_KEY)
+
+    @property
+    def search_engine_name(self) -> str:
+        return self.get(SEARCH_ENGINE_NAME_KEY)
+
+    @property
+    def search_engine_url(self) -> str:
+        return self.get(SEARCH_ENGINE_URL_KEY)
+
+    @property
+    def branding_title(self) -> str:
+        return self.get(BRANDING_TITLE_KEY)
+
+    @property
+    def branding_icon(self) -> str:
+        return self.get(BRANDING_ICON_KEY)
+
+
+site_config_cache = SiteConfigCache()
+cache_versions.watcher.register(cache_versions.SITE_CONFIG, site_config_cache.invalidate)
+
+
+def ensure_loaded(session: Session) -> SiteConfigCache:
+    if not site_config_cache.loaded:
+        site_config_cache.load(session)
+    return site_config_cache
+
+
+async def get_site_config(session: DBSession) -> SiteConfigCache:
+    await cache_versions.refresh(session)
+    if not site_config_cache.loaded:
+        await session.run_sync(site_config_cache.load)
+    return site_config_cache
@@ -0,0 +1,167 @@
+"""Process startup: the one-time preflight and the per-worker warm-up.
+
+The preflight creates missing tables and indexes, the search index and the
+initial admin user, and optionally seeds an empty database. It holds an
+exclusive file lock next to the database, so workers that start together run
+it one after another instead of racing on the same rows; after the first,
+every step finds its work done. Run it once before the workers with
+
+    python -m app.services.startup [--seed]
+
+and set STARTUP_PREFLIGHT=false so workers skip it (the Docker entrypoint
+does both). Workers then only open their connections and warm the caches
+(cache versions, site config, click popularity, navigation snapshot and the
+rendered homepage) before accepting requests. Phase durations are kept in
+``timings`` and reported by ``/api/status`` and ``/metrics``.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from jinja2 import Environment
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.core.hashing import password_pool
+from app.database import async_engine, create_db_and_tables, engine
+from app.models import User
+from app.services import cache_versions, clicks, health, search
+from app.services.homepage import homepage_cache
+from app.services.navigation import navigation_snapshot
+from app.services.site_config import site_config_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, the steps are idempotent anyway.
+    fcntl = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Phase name -> seconds, for this process.
+timings: Dict[str, float] = {}
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = round(time.perf_counter() - started, 4)
+
+
+def lock_path(name: str = "startup") -> str:
+    """Path of a lock file shared by the processes using this database."""
+    database = engine.url.database
+    if engine.url.get_backend_name() == "sqlite" and database not in (None, "", ":memory:"):
+        return f"{database}.{name}.lock"
+    return os.path.join(tempfile.gettempdir(), f"navigator.{name}.lock")
+
+
+@contextmanager
+def startup_lock() -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path(), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def ensure_default_admin() -> bool:
+    """Create the initial admin user if missing; returns True when created."""
+    with Session(engine) as session:
+        username = settings.INITIAL_ADMIN_USERNAME
+        if session.exec(select(User.id).where(User.username == username)).first() is not None:
+            return False
+        session.add(User(
+            username=username,
+            hashed_password=password_pool.hash_blocking(settings.INITIAL_ADMIN_PASSWORD),
+            is_superuser=True,
+            is_active=True,
+        ))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Created by a process that does not take the startup lock.
+            session.rollback()
+            return False
+    return True
+
+
+def preflight(seed: bool = False) -> None:
+    with timed("preflight"), startup_lock():
+        create_db_and_tables()
+        search.ensure_index()
+        if seed:
+            from app.services.seed import seed_data
+
+            seed_data()
+        ensure_default_admin()
+
+
+async def open_connections() -> None:
+    """Connect the request engine so the first request skips connection setup."""
+    with timed("connect"):
+        if async_engine is not None:
+            async with async_engine.connect() as connection:
+                await connection.exec_driver_sql("SELECT 1")
+        else:
+            with engine.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+
+
+def warm_caches(env: Optional[Environment] = None) -> None:
+    with timed("warm"), Session(engine) as session:
+        # Record the current versions first, or the first poll of a request
+        # would discard everything built here.
+        cache_versions.watcher.poll(session)
+        site_config_cache.load(session)
+        if settings.CLICK_TRACKING_ENABLED:
+            clicks.recorder.refresh_popularity(session)
+        entry = navigation_snapshot.get(session)
+        if env is not None and settings.SSR_HOMEPAGE:
+            homepage_cache.render(env, entry)
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was created (Linux only), covering interpreter start and imports."""
+    try:
+        with open("/proc/self/stat") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(uptime - started_ticks / os.sysconf("SC_CLK_TCK"), 2)
+
+
+def mark_ready() -> None:
+    age = process_age()
+    if age is not None:
+        timings["process_to_ready"] = age
+    health.checker.set_startup(timings)
+    logger.info("Worker %s ready: %s", os.getpid(), timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prepare the database before starting the workers.")
+    parser.add_argument("--seed", action="store_true", help="import the prototype data into an empty database")
+    args = parser.parse_args()
+
+    preflight(seed=args.seed)
+    password_pool.shutdown()
+    print(f"Preflight finished in {timings['preflight']:.2f}s.")
+
+
+if __name__ == "__main__":
+    main()
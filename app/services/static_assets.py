@@ -0,0 +1,268 @@
+"""Fingerprinted, precompressed static asset serving.
+
+Templates reference assets through ``asset_url("vendor/vue.js")``, which
+returns ``/static/vendor/vue-<hash>.js``. ``AssetFiles`` maps such names back
+to the file on disk and serves them with a one-year immutable Cache-Control;
+names whose hash no longer matches the file are served uncached. Files that
+are already content-hashed by a build step (``tailwind.<hash>.css``, the
+font subsets) are treated as immutable as-is.
+
+Text assets are precompressed next to the original as ``.br`` (when the
+optional ``brotli`` package is installed) and ``.gz``, and the best variant
+accepted by the client is served. Run ``python -m app.services.static_assets``
+at build time or from the entrypoint; ``STATIC_PRECOMPRESS_ON_STARTUP``
+also does it in the app's startup.
+"""
+import gzip
+import hashlib
+import os
+import re
+import stat
+import threading
+import time
+from mimetypes import guess_type
+from typing import Dict, List, Optional, Set, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional build dependency
+    brotli = None
+
+settings = get_settings()
+
+STATIC_DIR = "static"
+STATIC_PREFIX = "/static/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+COMPRESSIBLE_SUFFIXES = (".js", ".css", ".json", ".svg", ".html", ".txt", ".ttf", ".otf")
+MIN_COMPRESS_SIZE = 1024
+# Empty sibling recording that a variant came out no smaller than the file.
+INCOMPRESSIBLE_MARKER = ".skip"
+
+_FINGERPRINTED = re.compile(r"^(?P<stem>.+)-(?P<digest>[0-9a-f]{12})(?P<ext>\.[A-Za-z0-9]+)$")
+_BUILD_HASHED = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+
+_digest_lock = threading.Lock()
+_digests: Dict[str, Tuple[int, int, str]] = {}
+
+
+def _file_digest(full_path: str) -> Optional[str]:
+    """Content hash of a file, cached by mtime and size."""
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return None
+    cached = _digests.get(full_path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    sha = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()[:12]
+    with _digest_lock:
+        _digests[full_path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def asset_url(path: str) -> str:
+    """Return the fingerprinted URL of a file under ``static/``.
+
+    Accepts either a path relative to the static root or a ``/static/`` URL.
+    Unknown files are returned unchanged so a missing asset still 404s
+    visibly instead of raising while rendering.
+    """
+    relative = path[len(STATIC_PREFIX):] if path.startswith(STATIC_PREFIX) else path.lstrip("/")
+    if _BUILD_HASHED.search(relative):
+        return STATIC_PREFIX + relative
+    digest = _file_digest(os.path.join(STATIC_DIR, relative))
+    if digest is None:
+        return STATIC_PREFIX + relative
+    stem, ext = os.path.splitext(relative)
+    return f"{STATIC_PREFIX}{stem}-{digest}{ext}"
+
+
+def compress_file(full_path: str) -> None:
+    st = os.stat(full_path)
+    with open(full_path, "rb") as f:
+        data = None
+        variants = [(".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append((".br", lambda raw: brotli.compress(raw, quality=11)))
+        for suffix, compress in variants:
+            target = full_path + suffix
+            marker = target + INCOMPRESSIBLE_MARKER
+            if any(
+                os.path.exists(done) and os.stat(done).st_mtime_ns >= st.st_mtime_ns
+                for done in (target, marker)
+            ):
+                continue
+            if data is None:
+                data = f.read()
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                open(marker, "wb").close()
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            if os.path.exists(marker):
+                os.remove(marker)
+            tmp_path = target + ".tmp"
+            with open(tmp_path, "wb") as out:
+                out.write(compressed)
+            os.replace(tmp_path, target)
+
+
+def remove_file(full_path: str) -> None:
+    """Remove an asset together with its precompressed variants."""
+    for suffix in ("", ".gz", ".br", ".gz" + INCOMPRESSIBLE_MARKER, ".br" + INCOMPRESSIBLE_MARKER):
+        if os.path.exists(full_path + suffix):
+            os.remove(full_path + suffix)
+
+
+def remove_retired(
+    directory: str, pattern: "re.Pattern", current: Set[str], retired: Dict[str, float]
+) -> Dict[str, float]:
+    """Delete build outputs that have been out of use for STATIC_RETIRED_GRACE seconds.
+
+    ``retired`` maps outputs superseded by a build to when that happened;
+    outputs not listed (from an interrupted or concurrent build) count from
+    their modification time. Other workers keep linking an output until they
+    reload the manifest, and pages rendered with it stay cached a while
+    longer, so it is not deleted as soon as it is replaced. Returns the
+    retired outputs still kept.
+    """
+    cutoff = time.time() - settings.STATIC_RETIRED_GRACE
+    kept = {}
+    for name in os.listdir(directory):
+        if not pattern.match(name) or name in current:
+            continue
+        path = os.path.join(directory, name)
+        since = retired.get(name)
+        if since is None:
+            try:
+                since = os.path.getmtime(path)
+            except OSError:
+                continue
+        if since < cutoff:
+            remove_file(path)
+        elif name in retired:
+            kept[name] = since
+    return kept
+
+
+def precompress(directory: str = STATIC_DIR) -> List[str]:
+    """Write ``.gz``/``.br`` siblings for text assets that lack fresh ones.
+
+    A variant that would not be smaller is recorded with an empty ``.skip``
+    marker instead, so the file is not compressed again on the next run.
+    """
+    processed = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            full_path = os.path.join(root, name)
+            if os.path.getsize(full_path) < MIN_COMPRESS_SIZE:
+                continue
+            compress_file(full_path)
+            processed.append(full_path)
+    return processed
+
+
+def _accepted_encodings(headers: Headers) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in headers.get("accept-encoding", "").split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles with fingerprint resolution and precompressed variants."""
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def _resolve(self, path: str) -> Tuple[str, Optional[bool]]:
+        """Map a request path to a file path.
+
+        The flag is True for a fingerprint that matches the file, False for a
+        stale fingerprint and None for a plain name.
+        """
+        directory, name = os.path.split(path)
+        match = _FINGERPRINTED.match(name)
+        if match:
+            logical = os.path.join(directory, match["stem"] + match["ext"])
+            full_path, stat_result = self.lookup_path(logical)
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return logical, _file_digest(full_path) == match["digest"]
+        if _BUILD_HASHED.search(name):
+            return path, True
+        return path, None
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        logical, fingerprint = await anyio.to_thread.run_sync(self._resolve, path)
+        headers = Headers(scope=scope)
+        accepted = _accepted_encodings(headers)
+
+        response: Optional[Response] = None
+        _, original = await anyio.to_thread.run_sync(self.lookup_path, logical)
+        for coding, suffix in self.ENCODINGS:
+            if original is None or accepted.get(coding, accepted.get("*", 0.0)) <= 0.0:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, logical + suffix
+            )
+            # A variant older than its source is stale and must not be served.
+            if (
+                stat_result
+                and stat.S_ISREG(stat_result.st_mode)
+                and stat_result.st_mtime_ns >= original.st_mtime_ns
+            ):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Encoding"] = coding
+                media_type = self.media_type_for(logical)
+                if media_type:
+                    response.headers["Content-Type"] = media_type
+                break
+
+        if response is None:
+            response = await super().get_response(logical, scope)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        if fingerprint:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        elif fingerprint is False:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @staticmethod
+    def media_type_for(path: str) -> Optional[str]:
+        media_type = guess_type(path)[0]
+        if media_type and media_type.startswith("text/"):
+            media_type += "; charset=utf-8"
+        return media_type
+
+
+if __name__ == "__main__":
+    files = precompress()
+    print(f"Precompressed {len(files)} static assets.")
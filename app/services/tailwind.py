@@ -0,0 +1,176 @@
+"""Build-time Tailwind CSS compilation.
+
+Scans the Jinja templates plus the colour classes stored on navigation cards
+and compiles them into one minified, content-hashed stylesheet with the
+Tailwind standalone CLI. Templates link that file when it exists and fall
+back to the in-browser runtime otherwise.
+
+Run ``python -m app.services.tailwind`` after deploying template changes.
+Each build bumps the ``assets`` cache version so every worker reloads the
+manifest; replaced stylesheets are deleted STATIC_RETIRED_GRACE seconds later.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Iterable, Optional, Set
+
+from sqlmodel import Session, select
+
+from app.config import get_settings
+from app.database import engine
+from app.models import NavigationCard
+from app.services import cache_versions, static_assets
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CONFIG_PATH = "tailwind.config.js"
+INPUT_PATH = os.path.join("app", "assets", "tailwind.css")
+CLASSES_PATH = os.path.join("build", "tailwind", "classes.txt")
+OUTPUT_DIR = os.path.join("static", "css")
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "tailwind-manifest.json")
+OUTPUT_PREFIX = "tailwind."
+OUTPUT_PATTERN = re.compile(r"^tailwind\.[0-9a-f]+\.css$")
+
+_build_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+_manifest: Optional[dict] = None
+
+
+def collect_database_classes(session: Session) -> Set[str]:
+    rows = session.exec(
+        select(NavigationCard.icon_bg_class, NavigationCard.icon_color_class)
+    ).all()
+    classes: Set[str] = set()
+    for bg_class, color_class in rows:
+        for value in (bg_class, color_class):
+            if value:
+                classes.update(value.split())
+    return classes
+
+
+def _read_manifest() -> Optional[dict]:
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_manifest() -> Optional[dict]:
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = _read_manifest()
+    return _manifest
+
+
+def invalidate_manifest() -> None:
+    global _manifest
+    with _manifest_lock:
+        _manifest = None
+
+
+def stylesheet_url() -> Optional[str]:
+    """URL of the compiled stylesheet, or None to use the runtime script."""
+    manifest = load_manifest()
+    return manifest["url"] if manifest else None
+
+
+def build_stylesheet(session: Optional[Session] = None) -> Optional[str]:
+    """Compile the stylesheet and publish it under a content-hashed name.
+
+    Returns the new stylesheet URL, or None when the Tailwind CLI is not
+    available.
+    """
+    global _manifest
+    cli = shutil.which(settings.TAILWIND_CLI)
+    if cli is None:
+        logger.warning("Tailwind CLI %r not found; keeping the runtime script", settings.TAILWIND_CLI)
+        return None
+
+    with _build_lock:
+        if session is None:
+            with Session(engine) as own_session:
+                classes = collect_database_classes(own_session)
+        else:
+            classes = collect_database_classes(session)
+
+        os.makedirs(os.path.dirname(CLASSES_PATH), exist_ok=True)
+        with open(CLASSES_PATH, "w", encoding="utf-8") as f:
+            f.write("\n".join(sorted(classes)))
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".css", dir=OUTPUT_DIR)
+        os.close(fd)
+        try:
+            subprocess.run(
+                [cli, "-c", CONFIG_PATH, "-i", INPUT_PATH, "-o", tmp_path, "--minify"],
+                check=True,
+                capture_output=True,
+                timeout=settings.TAILWIND_BUILD_TIMEOUT,
+            )
+            with open(tmp_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:12]
+            filename = f"{OUTPUT_PREFIX}{digest}.css"
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(OUTPUT_DIR, filename))
+            static_assets.compress_file(os.path.join(OUTPUT_DIR, filename))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # Another worker may have built since this one loaded the manifest.
+        previous = _read_manifest() or {}
+        retired = previous.get("retired", {})
+        if previous.get("file") and previous["file"] != filename:
+            retired[previous["file"]] = time.time()
+        manifest = {
+            "url": f"/static/css/{filename}",
+            "file": filename,
+            "classes": sorted(classes),
+            "retired": static_assets.remove_retired(OUTPUT_DIR, OUTPUT_PATTERN, {filename}, retired),
+        }
+        # Other workers read it on their next poll, so never expose a partial file.
+        with open(MANIFEST_PATH + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(MANIFEST_PATH + ".tmp", MANIFEST_PATH)
+        with _manifest_lock:
+            _manifest = manifest
+        cache_versions.bump_now(cache_versions.ASSETS)
+        return manifest["url"]
+
+
+def ensure_classes(classes: Iterable[Optional[str]]) -> None:
+    """Rebuild the stylesheet if any of the given classes is not compiled in.
+
+    Called as a background task after card writes, so admins can pick new
+    colour classes without a redeploy.
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        return
+    known = set(manifest.get("classes", []))
+    wanted = {name for value in classes if value for name in value.split()}
+    if wanted - known:
+        try:
+            build_stylesheet()
+        except (OSError, subprocess.SubprocessError):
+            logger.exception("Tailwind stylesheet rebuild failed")
+
+
+cache_versions.watcher.register(cache_versions.ASSETS, invalidate_manifest)
+
+
+if __name__ == "__main__":
+    url = build_stylesheet()
+    if url:
+        print(f"Tailwind stylesheet written to {url}")
+    else:
+        print("Tailwind CLI not found; set TAILWIND_CLI to the standalone binary path.")
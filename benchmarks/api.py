@@ -0,0 +1,413 @@
+"""Latency and throughput of the API hot paths against a synthetic dataset.
+
+    python -m benchmarks.api --categories 20 --cards 50 --configs 20
+    python -m benchmarks.api --mode uvicorn --workers 4 --concurrency 32
+    python -m benchmarks.api --compare build/benchmarks/old.json build/benchmarks/new.json
+
+Seeds a fresh database with ``--categories`` x ``--cards`` cards and
+``--configs`` site configs through the models, then drives each scenario
+(navigation, conditional navigation, navigation shell, one navigation
+section, homepage, card listing, click beacon, login and authenticated card
+create/update/delete) with ``--concurrency`` concurrent requests. ``inprocess`` mode calls the ASGI app directly through httpx;
+``uvicorn`` mode starts ``--workers`` uvicorn workers on a local port and
+measures over HTTP.
+
+Queries per request are read from the ``/metrics`` endpoint before and
+after each scenario, so they cover every worker. Results are printed as one
+JSON line per scenario and written with the commit, settings and dataset
+size to ``--output`` (default ``build/benchmarks/api-<commit>-<mode>.json``).
+``--compare`` prints the p95 and throughput change between two result files.
+Run from the repository root.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-password"
+METRICS_TOKEN = "bench-metrics"
+METRICS_HEADERS = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+# Routes whose query counts are read from /metrics, per scenario.
+ROUTES = {
+    "navigation": ("GET", "/api/navigation"),
+    "navigation_304": ("GET", "/api/navigation"),
+    "navigation_shell": ("GET", "/api/navigation/shell"),
+    "navigation_section": ("GET", "/api/navigation/sections/{slug}"),
+    "homepage": ("GET", "/"),
+    "cards_list": ("GET", "/api/cards/"),
+    "cards_keyset": ("GET", "/api/cards/"),
+    "click": ("POST", "/api/clicks/{card_id}"),
+    "login": ("POST", "/api/auth/token"),
+    "admin_create": ("POST", "/api/cards/"),
+    "admin_update": ("PUT", "/api/cards/{card_id}"),
+    "admin_delete": ("DELETE", "/api/cards/{card_id}"),
+}
+
+
+def configure_environment(database_path: str, metrics_dir: str) -> Dict[str, str]:
+    """Settings for the app under test; must be applied before ``app`` is imported."""
+    env = {
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "INITIAL_ADMIN_USERNAME": ADMIN_USERNAME,
+        "INITIAL_ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "METRICS_ENABLED": "true",
+        "METRICS_TOKEN": METRICS_TOKEN,
+        "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+        "STATIC_PRECOMPRESS_ON_STARTUP": "false",
+        "DEBUG": "false",
+    }
+    os.environ.update(env)
+    return env
+
+
+def seed(categories: int, cards: int, configs: int) -> None:
+    from sqlmodel import Session
+
+    from app.core.security import get_password_hash
+    from app.database import create_db_and_tables, engine
+    from app.models import Category, NavigationCard, SiteConfig, User
+    from app.services import search
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        # Created here so concurrently starting workers find it.
+        session.add(User(
+            username=ADMIN_USERNAME,
+            hashed_password=get_password_hash(ADMIN_PASSWORD),
+            is_superuser=True,
+            is_active=True,
+        ))
+        session.add_all(
+            SiteConfig(key=f"bench_config_{i}", value=f"value {i}", description="benchmark")
+            for i in range(configs)
+        )
+        category_rows = [
+            Category(slug=f"cat-{c}", label=f"分类 {c}", icon="hub", order=c) for c in range(categories)
+        ]
+        session.add_all(category_rows)
+        session.flush()
+        for category in category_rows:
+            session.add_all(
+                NavigationCard(
+                    category_id=category.id,
+                    title=f"Card {category.order}-{i}",
+                    subtitle="subtitle",
+                    description="description " * 4,
+                    icon="public",
+                    icon_bg_class="bg-blue-100",
+                    icon_color_class="text-blue-500",
+                    href=f"https://example.com/{category.order}/{i}",
+                    order=i,
+                )
+                for i in range(cards)
+            )
+        session.commit()
+    search.ensure_index()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def query_totals(client: httpx.AsyncClient) -> Dict[Tuple[str, str], Tuple[float, float, float]]:
+    """(method, route) -> (requests, queries, db seconds) from /metrics."""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    response = await client.get("/metrics", headers=METRICS_HEADERS)
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for family in text_string_to_metric_families(response.text):
+        if family.name not in ("http_request_db_queries", "http_request_db_seconds"):
+            continue
+        for sample in family.samples:
+            key = (sample.labels.get("method"), sample.labels.get("route"))
+            entry = totals.setdefault(key, [0.0, 0.0, 0.0])
+            if family.name == "http_request_db_queries" and sample.name.endswith("_count"):
+                entry[0] = sample.value
+            elif family.name == "http_request_db_queries" and sample.name.endswith("_sum"):
+                entry[1] = sample.value
+            elif sample.name.endswith("_sum"):
+                entry[2] = sample.value
+    return {key: tuple(value) for key, value in totals.items()}
+
+
+async def drive(
+    client: httpx.AsyncClient, request: Callable[[int], Any], total: int, concurrency: int
+) -> Tuple[List[float], int, float]:
+    """Issue ``total`` requests from ``concurrency`` workers; returns latencies, errors, wall time."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            response = await request(index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_scenarios(client: httpx.AsyncClient, args) -> List[Dict[str, Any]]:
+    token = (
+        await client.post("/api/auth/token", data={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+    ).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    etag = (await client.get("/api/navigation")).headers["etag"]
+    section = (await client.get("/api/navigation/shell")).json()["sidebar"]["menuItems"][0]["id"]
+    created: List[int] = []
+
+    async def create(index: int):
+        response = await client.post(
+            "/api/cards/",
+            json={
+                "category_id": 1,
+                "title": f"Bench {index}",
+                "description": "benchmark card",
+                "icon": "star",
+                "icon_bg_class": "bg-blue-100",
+                "icon_color_class": "text-blue-500",
+                "href": f"https://bench.example.com/{index}",
+            },
+            headers=auth,
+        )
+        if response.status_code == 200:
+            created.append(response.json()["id"])
+        return response
+
+    scenarios: List[Tuple[str, Callable[[int], Any], int, int]] = [
+        ("navigation", lambda i: client.get("/api/navigation"), args.requests, args.concurrency),
+        (
+            "navigation_304",
+            lambda i: client.get("/api/navigation", headers={"If-None-Match": etag}),
+            args.requests,
+            args.concurrency,
+        ),
+        ("navigation_shell", lambda i: client.get("/api/navigation/shell"), args.requests, args.concurrency),
+        (
+            "navigation_section",
+            lambda i: client.get(f"/api/navigation/sections/{section}"),
+            args.requests,
+            args.concurrency,
+        ),
+        ("homepage", lambda i: client.get("/"), args.requests, args.concurrency),
+        ("cards_list", lambda i: client.get("/api/cards/", params={"limit": 100}), args.requests, args.concurrency),
+        (
+            "cards_keyset",
+            lambda i: client.get("/api/cards/", params={"cursor": "", "limit": 100}),
+            args.requests,
+            args.concurrency,
+        ),
+        ("click", lambda i: client.post(f"/api/clicks/{i % args.cards + 1}"), args.requests, args.concurrency),
+        # bcrypt dominates and the password pool sheds load past its queue limit.
+        (
+            "login",
+            lambda i: client.post(
+                "/api/auth/token", data={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+            ),
+            args.login_requests,
+            min(args.concurrency, 4),
+        ),
+        ("admin_create", create, args.write_requests, args.concurrency),
+        (
+            "admin_update",
+            lambda i: client.put(
+                f"/api/cards/{created[i % len(created)]}", json={"title": f"Bench {i} updated"}, headers=auth
+            ),
+            args.write_requests,
+            args.concurrency,
+        ),
+        (
+            "admin_delete",
+            lambda i: client.delete(f"/api/cards/{created[i]}", headers=auth),
+            args.write_requests,
+            args.concurrency,
+        ),
+    ]
+
+    results = []
+    for name, request, total, concurrency in scenarios:
+        if args.scenarios and name not in args.scenarios:
+            continue
+        if name in ("admin_update", "admin_delete") and len(created) < total:
+            continue
+        for index in range(min(args.warmup, total)):
+            if not name.startswith("admin_") and name != "login":
+                await request(index)
+        before = await query_totals(client)
+        latencies, errors, elapsed = await drive(client, request, total, concurrency)
+        after = await query_totals(client)
+        key = ROUTES[name]
+        requests_before, queries_before, seconds_before = before.get(key, (0.0, 0.0, 0.0))
+        requests_after, queries_after, seconds_after = after.get(key, (0.0, 0.0, 0.0))
+        observed = requests_after - requests_before
+        latencies.sort()
+        result = {
+            "scenario": name,
+            "requests": total,
+            "concurrency": concurrency,
+            "errors": errors,
+            "rps": round(total / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "queries_per_request": round((queries_after - queries_before) / observed, 2) if observed else None,
+            "db_ms_per_request": round((seconds_after - seconds_before) * 1000 / observed, 3) if observed else None,
+        }
+        print(json.dumps(result))
+        results.append(result)
+    return results
+
+
+async def run_inprocess(args) -> List[Dict[str, Any]]:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_scenarios(client, args)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(args, env: Dict[str, str]) -> List[Dict[str, Any]]:
+    port = args.port or _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log",
+        ],
+        env={**os.environ, **env},
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/api/status/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("uvicorn did not become ready")
+                await asyncio.sleep(0.2)
+            return await run_scenarios(client, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path, encoding="utf-8") as f:
+        old = {row["scenario"]: row for row in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = {row["scenario"]: row for row in json.load(f)["results"]}
+
+    def change(before: float, after: float) -> Optional[float]:
+        return round((after - before) / before * 100, 1) if before else None
+
+    for name, row in new.items():
+        base = old.get(name)
+        if base is None:
+            continue
+        print(json.dumps({
+            "scenario": name,
+            "p95_ms": [base["p95_ms"], row["p95_ms"]],
+            "p95_change_pct": change(base["p95_ms"], row["p95_ms"]),
+            "rps": [base["rps"], row["rps"]],
+            "rps_change_pct": change(base["rps"], row["rps"]),
+            "queries_per_request": [base["queries_per_request"], row["queries_per_request"]],
+        }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--port", type=int, default=0, help="uvicorn port (default: a free port)")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=50, help="cards per category")
+    parser.add_argument("--configs", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per read scenario")
+    parser.add_argument("--write-requests", type=int, default=200, help="requests per admin write scenario")
+    parser.add_argument("--login-requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", nargs="*", choices=sorted(ROUTES), help="run only these scenarios")
+    parser.add_argument("--output", help="result file (default: build/benchmarks/api-<commit>-<mode>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_dir = os.path.join(tmp, "metrics")
+        os.makedirs(metrics_dir)
+        env = configure_environment(os.path.join(tmp, "bench.db"), metrics_dir)
+        seed(args.categories, args.cards, args.configs)
+
+        from app.config import get_settings
+
+        settings = get_settings()
+        if args.mode == "inprocess":
+            results = asyncio.run(run_inprocess(args))
+        else:
+            results = asyncio.run(run_uvicorn(args, env))
+
+    commit = current_commit()
+    document = {
+        "benchmark": "api",
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "mode": args.mode,
+        "workers": args.workers if args.mode == "uvicorn" else 1,
+        "database_async": settings.DATABASE_ASYNC,
+        "dataset": {
+            "categories": args.categories,
+            "cards": args.categories * args.cards,
+            "configs": args.configs,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join("build", "benchmarks", f"api-{commit or 'unknown'}-{args.mode}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Cold start of uvicorn workers against an existing database.
+
+    python -m benchmarks.cold_start --workers 4 --runs 5
+
+Seeds a database once, then starts ``--workers`` uvicorn workers ``--runs``
+times in each startup mode and measures, from the moment the server process
+is spawned:
+
+- ``first_ready_s``: the first successful ``/api/status/live``;
+- ``all_ready_s``: every worker has finished its startup (read from the
+  ``app_startup_seconds`` metric, one series per worker);
+- ``first_homepage_ms`` / ``first_navigation_ms``: latency of the first
+  requests, which pay for any cache not warmed at startup;
+- the slowest worker's duration of every startup phase.
+
+Modes: ``lock`` (every worker runs the preflight under the file lock, the
+default), ``preflight`` (``python -m app.services.startup`` runs first and
+workers skip it; its duration is reported as ``preflight_s``), ``no_warm``
+(preflight, but caches are built by the first requests) and ``preload``
+(gunicorn with ``gunicorn.conf.py``: the app is imported and the preflight
+run once in the master, then workers are forked).
+Medians are printed as one JSON line per mode and written to ``--output``.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.api import METRICS_HEADERS, _free_port, configure_environment, current_commit, seed
+
+MODES = {
+    "lock": {"STARTUP_PREFLIGHT": "true", "STARTUP_WARM_CACHES": "true"},
+    "preflight": {"STARTUP_PREFLIGHT": "false", "STARTUP_WARM_CACHES": "true"},
+    "no_warm": {"STARTUP_PREFLIGHT": "false", "STARTUP_WARM_CACHES": "false"},
+    "preload": {"STARTUP_PREFLIGHT": "true", "STARTUP_WARM_CACHES": "true"},
+}
+
+
+def server_command(mode: str, port: int, workers: int) -> List[str]:
+    if mode == "preload":
+        return [
+            sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning",
+        ]
+    return [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+    ]
+
+
+def startup_phases(text: str) -> Dict[str, Dict[str, float]]:
+    """pid -> phase -> seconds from the app_startup_seconds metric."""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    workers: Dict[str, Dict[str, float]] = {}
+    for family in text_string_to_metric_families(text):
+        if family.name == "app_startup_seconds":
+            for sample in family.samples:
+                workers.setdefault(sample.labels.get("pid", "0"), {})[sample.labels["phase"]] = sample.value
+    return workers
+
+
+def run_once(mode: str, args, env: Dict[str, str], metrics_dir: str) -> Dict[str, Any]:
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    env = {**os.environ, **env, **MODES[mode]}
+    result: Dict[str, Any] = {}
+    if mode in ("preflight", "no_warm"):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "app.services.startup"], env=env, check=True, capture_output=True)
+        result["preflight_s"] = time.perf_counter() - started
+
+    port = _free_port()
+    spawned = time.perf_counter()
+    server = subprocess.Popen(server_command(mode, port, args.workers), env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                try:
+                    if client.get("/api/status/live").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.perf_counter() - spawned > args.timeout:
+                    raise SystemExit(f"server did not start in mode {mode}")
+                time.sleep(0.005)
+            result["first_ready_s"] = time.perf_counter() - spawned
+
+            for name, path in (("first_homepage_ms", "/"), ("first_navigation_ms", "/api/navigation")):
+                started = time.perf_counter()
+                client.get(path)
+                result[name] = (time.perf_counter() - started) * 1000
+
+            while True:
+                workers = startup_phases(client.get("/metrics", headers=METRICS_HEADERS).text)
+                ready = [phases for phases in workers.values() if "process_to_ready" in phases]
+                if len(ready) >= args.workers:
+                    break
+                if time.perf_counter() - spawned > args.timeout:
+                    raise SystemExit(f"only {len(ready)} of {args.workers} workers started in mode {mode}")
+                time.sleep(0.02)
+            result["all_ready_s"] = time.perf_counter() - spawned
+            for phases in ready:
+                for phase, seconds in phases.items():
+                    key = f"worker_{phase}_s"
+                    result[key] = max(result.get(key, 0.0), seconds)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=50, help="cards per category")
+    parser.add_argument("--configs", type=int, default=20)
+    parser.add_argument("--modes", nargs="*", choices=sorted(MODES), default=list(MODES))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="result file (default: build/benchmarks/cold-start-<commit>.json)")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics_dir = os.path.join(tmp, "metrics")
+        os.makedirs(metrics_dir)
+        env = configure_environment(os.path.join(tmp, "bench.db"), metrics_dir)
+        seed(args.categories, args.cards, args.configs)
+        for mode in args.modes:
+            runs = [run_once(mode, args, env, metrics_dir) for _ in range(args.runs)]
+            summary: Dict[str, Any] = {"mode": mode, "workers": args.workers, "runs": args.runs}
+            for key in runs[0]:
+                value = statistics.median(run[key] for run in runs if key in run)
+                summary[key] = round(value, 1 if key.endswith("_ms") else 3)
+            print(json.dumps(summary))
+            results.append(summary)
+
+    commit = current_commit()
+    output = args.output or os.path.join("build", "benchmarks", f"cold-start-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "cold_start", "commit": commit, "results": results}, f, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Favicon proxy against local stub sites.
+
+    python -m benchmarks.favicons --cards 100 --hosts 40
+
+Starts ``--hosts`` stub servers on 127.0.0.1 (each port is a separate host)
+and creates one section of ``--cards`` cards spread across them. Most stubs
+serve ``/favicon.ico``; ``--declared`` of them only declare an icon in a
+``<link rel="icon">`` tag of their homepage and ``--bare`` have no icon at
+all. Every icon answers conditional requests. Then it runs, in process:
+
+- ``coalesced``: ``--concurrency`` simultaneous requests for one uncached
+  host, which must reach the stub once;
+- ``bundle_cold`` / ``bundle_warm`` / ``bundle_304``: the section's icon
+  bundle on an empty cache, from the cache, and revalidated by its ETag;
+- ``single_warm``: the same icons requested one by one, for comparison;
+- ``revalidate``: every cached icon treated as stale, which must cost the
+  stubs only 304s.
+
+Results are printed as JSON lines and written to ``--output`` (default
+``build/benchmarks/favicons-<commit>.json``).
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.api import current_commit, percentile
+
+ETAG = '"icon-v1"'
+# 1x1 PNG, used when Pillow is not installed.
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c63f8cfc0f01f0005000201a5c3bf7a0000000049454e44ae426082"
+)
+
+
+def icon_bytes() -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        return TINY_PNG
+    out = io.BytesIO()
+    Image.new("RGBA", (64, 64), (30, 120, 220, 255)).save(out, "ICO", sizes=[(16, 16), (32, 32), (64, 64)])
+    return out.getvalue()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, kind: str, icon: bytes) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.kind = kind
+        self.icon = icon
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Dict[str, str] = {}) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        server = self.server
+        icon_path = "/favicon.ico" if server.kind == "ico" else "/static/icon.ico"
+        with server.lock:
+            key = "304" if self.headers.get("If-None-Match") == ETAG else self.path
+            server.requests[key] = server.requests.get(key, 0) + 1
+        if self.path == "/" and server.kind == "declared":
+            page = b'<html><head><link rel="icon" sizes="64x64" href="/static/icon.ico"></head></html>'
+            self._send(200, page, {"Content-Type": "text/html; charset=utf-8"})
+        elif self.path == icon_path and server.kind != "bare":
+            if self.headers.get("If-None-Match") == ETAG:
+                self._send(304, headers={"ETag": ETAG})
+            else:
+                self._send(200, server.icon, {"Content-Type": "image/x-icon", "ETag": ETAG})
+        else:
+            self._send(404)
+
+
+def seed(servers: List[StubServer], cards: int) -> None:
+    from sqlmodel import Session
+
+    from app.database import create_db_and_tables, engine
+    from app.models import Category, NavigationCard
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        category = Category(slug="sites", label="站点", icon="public", order=0)
+        session.add(category)
+        session.flush()
+        session.add_all(
+            NavigationCard(
+                category_id=category.id,
+                title=f"Site {i}",
+                description="favicon",
+                icon="public",
+                icon_bg_class="bg-blue-100",
+                icon_color_class="text-blue-500",
+                href=f"http://127.0.0.1:{servers[i % len(servers)].server_port}/page/{i}",
+                order=i,
+            )
+            for i in range(cards)
+        )
+        session.commit()
+
+
+def upstream(servers: List[StubServer]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for server in servers:
+        with server.lock:
+            for key, count in server.requests.items():
+                totals[key] = totals.get(key, 0) + count
+            server.requests.clear()
+    return totals
+
+
+async def timed(client: httpx.AsyncClient, path: str, repeat: int, headers: Dict[str, str] = {}) -> Dict[str, Any]:
+    latencies = []
+    response = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+    }
+
+
+async def run(args, servers: List[StubServer]) -> List[Dict[str, Any]]:
+    from app.main import app
+    from app.services import favicons
+    from app.services.favicons import fetcher
+
+    results = []
+
+    def report(name: str, **values: Any) -> None:
+        result = {"scenario": name, **values, "upstream": upstream(servers)}
+        print(json.dumps(result))
+        results.append(result)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            host = f"127.0.0.1:{servers[0].server_port}"
+            started = time.perf_counter()
+            responses = await asyncio.gather(
+                *(client.get(f"/api/favicons/{host}") for _ in range(args.concurrency))
+            )
+            report(
+                "coalesced",
+                requests=args.concurrency,
+                ok=sum(1 for response in responses if response.status_code == 200),
+                seconds=round(time.perf_counter() - started, 3),
+            )
+
+            path = "/api/favicons/sections/sites"
+            report("bundle_cold", **await timed(client, path, 1))
+            warm = await timed(client, path, args.repeat)
+            report("bundle_warm", **warm)
+            etag = (await client.get(path)).headers["etag"]
+            report("bundle_304", **await timed(client, path, args.repeat, {"If-None-Match": etag}))
+
+            hosts = sorted(set((await client.get(path)).json()["cards"].values()))
+            upstream(servers)
+            single = []
+            for name in hosts:
+                started = time.perf_counter()
+                await client.get(f"/api/favicons/{name}")
+                single.append(time.perf_counter() - started)
+            single.sort()
+            report(
+                "single_warm",
+                requests=len(hosts),
+                p50_ms=round(percentile(single, 0.50) * 1000, 2),
+                total_ms=round(sum(single) * 1000, 2),
+            )
+
+            # Every cached icon is now due for revalidation; the bundle serves
+            # them stale and revalidates in the background.
+            favicons.settings.FAVICON_MAX_AGE = 0
+            started = time.perf_counter()
+            await client.get(path)
+            while fetcher.stats()["in_flight"]:
+                await asyncio.sleep(0.01)
+            report("revalidate", seconds=round(time.perf_counter() - started, 3))
+            results.append({"scenario": "cache", **fetcher.stats()})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=100)
+    parser.add_argument("--hosts", type=int, default=40)
+    parser.add_argument("--declared", type=int, default=5, help="hosts that declare their icon in the homepage")
+    parser.add_argument("--bare", type=int, default=5, help="hosts without an icon")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="result file (default: build/benchmarks/favicons-<commit>.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "FAVICONS_ENABLED": "true",
+            "FAVICON_CACHE_DIR": os.path.join(tmp, "favicons"),
+            "FAVICON_FETCH_TIMEOUT": "2",
+            # The cold bundle waits for every icon.
+            "FAVICON_BUNDLE_WAIT": "30",
+            "METRICS_ENABLED": "false",
+            "STATIC_PRECOMPRESS_ON_STARTUP": "false",
+        })
+        icon = icon_bytes()
+        kinds = ["declared"] * args.declared + ["bare"] * args.bare
+        kinds = ["ico"] * (args.hosts - len(kinds)) + kinds
+        servers = [StubServer(kind, icon) for kind in kinds]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        seed(servers, args.cards)
+        results = asyncio.run(run(args, servers))
+        for server in servers:
+            server.shutdown()
+
+    by_name = {result["scenario"]: result for result in results}
+    checks = {
+        "coalesced": by_name["coalesced"]["upstream"].get("/favicon.ico") == 1,
+        "bundle_warm": not by_name["bundle_warm"]["upstream"],
+        "bundle_304": by_name["bundle_304"]["status"] == 304,
+        "revalidate": set(by_name["revalidate"]["upstream"]) <= {"304", "/", "/favicon.ico"},
+    }
+    if not all(checks.values()):
+        raise SystemExit(f"unexpected result: {checks}")
+
+    commit = current_commit()
+    output = args.output or os.path.join("build", "benchmarks", f"favicons-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "favicons", "commit": commit, "settings": vars(args), "results": results}, f, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Link checker sweeps against local stub HTTP servers.
+
+    python -m benchmarks.link_check --links 10000 --hosts 50 --rate 100
+
+Starts ``--hosts`` stub servers on 127.0.0.1 (each port is a separate host
+to the checker) and creates ``--links`` cards spread across them. Most
+links answer with an ETag and Last-Modified and honour conditional
+requests; ``--no-head`` of them refuse HEAD with 405, ``--missing`` answer
+404 and ``--slow`` answer after the checker's timeout. Then it runs:
+
+- ``cold``: the first sweep;
+- ``revalidate``: a forced second sweep, where the healthy links should
+  answer 304 and the failing ones reach LINK_CHECK_BROKEN_AFTER.
+
+Each sweep reports its duration, links per second and outcomes, and the
+stubs report the highest number of concurrent requests any one host saw,
+which must not exceed ``--per-host``. Results are printed as JSON lines and
+written to ``--output`` (default ``build/benchmarks/link-check-<commit>.json``).
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from benchmarks.api import current_commit
+
+ETAG = '"stub-v1"'
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, slow_seconds: float) -> None:
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.slow_seconds = slow_seconds
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests: Dict[str, int] = {}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the checker's connection pool is exercised.
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _respond(self, status: int, headers: Dict[str, str] = {}) -> None:
+        body = b"" if self.command == "HEAD" or status == 304 else b"stub page\n" * 50
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _handle(self) -> None:
+        server = self.server
+        kind = self.path.strip("/").split("/")[0]
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            key = f"{self.command} {kind}"
+            server.requests[key] = server.requests.get(key, 0) + 1
+        try:
+            if kind == "missing":
+                self._respond(404)
+            elif kind == "nohead" and self.command == "HEAD":
+                self._respond(405)
+            elif kind == "slow":
+                time.sleep(server.slow_seconds)
+                self._respond(200)
+            elif self.headers.get("If-None-Match") == ETAG:
+                self._respond(304, {"ETag": ETAG})
+            else:
+                self._respond(200, {"ETag": ETAG, "Last-Modified": LAST_MODIFIED})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+
+def start_stubs(count: int, slow_seconds: float) -> List[StubServer]:
+    servers = []
+    for _ in range(count):
+        server = StubServer(slow_seconds)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def link_kinds(args) -> List[str]:
+    kinds = ["nohead"] * args.no_head + ["missing"] * args.missing + ["slow"] * args.slow
+    return kinds + ["ok"] * (args.links - len(kinds))
+
+
+def seed_links(servers: List[StubServer], kinds: List[str]) -> None:
+    from sqlmodel import Session
+
+    from app.database import create_db_and_tables, engine
+    from app.models import Category, NavigationCard
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        category = Category(slug="links", label="链接", icon="link", order=0)
+        session.add(category)
+        session.flush()
+        session.add_all(
+            NavigationCard(
+                category_id=category.id,
+                title=f"Link {i}",
+                description="link check",
+                icon="public",
+                icon_bg_class="bg-blue-100",
+                icon_color_class="text-blue-500",
+                href=f"http://127.0.0.1:{servers[i % len(servers)].server_port}/{kind}/{i}",
+                order=i,
+            )
+            for i, kind in enumerate(kinds)
+        )
+        session.commit()
+
+
+def broken_links() -> int:
+    from sqlmodel import Session, select
+
+    from app.database import engine
+    from app.models import LinkStatus
+    from app.services.link_health import is_broken
+
+    with Session(engine) as session:
+        failures = session.exec(select(LinkStatus.failures)).all()
+    return sum(1 for value in failures if is_broken(value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--no-head", type=int, default=50, help="links that answer HEAD with 405")
+    parser.add_argument("--missing", type=int, default=50, help="links that answer 404")
+    parser.add_argument("--slow", type=int, default=10, help="links slower than --timeout")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=200.0, help="request starts per second, 0 for no limit")
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--output", help="result file (default: build/benchmarks/link-check-<commit>.json)")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "LINK_CHECK_ENABLED": "true",
+            "LINK_CHECK_CONCURRENCY": str(args.concurrency),
+            "LINK_CHECK_PER_HOST": str(args.per_host),
+            "LINK_CHECK_RATE": str(args.rate),
+            "LINK_CHECK_TIMEOUT": str(args.timeout),
+            # Failing links are broken after both sweeps.
+            "LINK_CHECK_BROKEN_AFTER": "2",
+            "METRICS_ENABLED": "false",
+        })
+        from app.services.link_health import checker
+
+        servers = start_stubs(args.hosts, slow_seconds=args.timeout * 2)
+        kinds = link_kinds(args)
+        seed_links(servers, kinds)
+        for name, force in (("cold", False), ("revalidate", True)):
+            for server in servers:
+                server.max_in_flight = 0
+            stats = asyncio.run(checker.sweep(force=force))
+            result = {
+                "sweep": name,
+                "links": args.links,
+                "hosts": args.hosts,
+                **stats,
+                "links_per_second": round(stats["checked"] / stats["seconds"], 1),
+                "max_per_host": max(server.max_in_flight for server in servers),
+                "broken": broken_links(),
+            }
+            print(json.dumps(result))
+            results.append(result)
+        requests: Dict[str, int] = {}
+        for server in servers:
+            for key, count in server.requests.items():
+                requests[key] = requests.get(key, 0) + count
+            server.shutdown()
+
+    expected_broken = args.missing + args.slow
+    if results[-1]["broken"] != expected_broken or results[-1]["max_per_host"] > args.per_host:
+        raise SystemExit(f"unexpected result: {results[-1]} (expected {expected_broken} broken)")
+
+    commit = current_commit()
+    output = args.output or os.path.join("build", "benchmarks", f"link-check-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(
+            {"benchmark": "link_check", "commit": commit, "settings": vars(args), "results": results,
+             "stub_requests": requests},
+            f,
+            indent=2,
+        )
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
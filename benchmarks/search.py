@@ -0,0 +1,115 @@
+"""Latency of ``/api/search`` queries against a large synthetic card set.
+
+    python -m benchmarks.search --cards 50000
+
+Seeds a fresh database with ``--cards`` cards whose text mixes Chinese and
+Latin words drawn from a synthetic vocabulary of ``--words`` words per
+script, builds the FTS5 index and runs a query mix (Latin prefixes and
+words, Chinese words, mixed queries and misses) ``--rounds`` times. A small
+vocabulary makes every term match a large share of the cards, which is the
+worst case for bm25 ranking. Prints one JSON line per query kind with
+p50/p95/p99 latency and the index build time.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel
+
+from app.database import create_app_engine
+from app.models import Category, NavigationCard
+from app.services import search
+
+# Character and syllable pools the synthetic vocabulary is drawn from.
+CHARS_ZH = [chr(code) for code in range(0x4E00, 0x4E00 + 800)]
+SYLLABLES = ["ka", "lo", "mi", "ta", "ren", "sen", "do", "ri", "vex", "pol", "nu", "zar", "qi", "fen", "tor", "lu"]
+
+
+def vocabulary(rng: random.Random, size: int):
+    zh = sorted({rng.choice(CHARS_ZH) + rng.choice(CHARS_ZH) for _ in range(size)})
+    en = sorted({"".join(rng.choice(SYLLABLES) for _ in range(3)) for _ in range(size)})
+    return zh, en
+
+
+def seed(engine, categories: int, cards: int, words: int) -> dict:
+    rng = random.Random(42)
+    zh, en = vocabulary(rng, words)
+    with Session(engine) as session:
+        for c in range(categories):
+            session.add(Category(slug=f"cat-{c}", label=f"{rng.choice(zh)}{c}", icon="hub", order=c))
+        session.commit()
+        session.execute(
+            NavigationCard.__table__.insert(),
+            [
+                {
+                    "category_id": i % categories + 1,
+                    "title": f"{rng.choice(en).title()} {rng.choice(zh)}",
+                    "subtitle": rng.choice(zh) + rng.choice(zh),
+                    "description": "".join(rng.choice(zh) for _ in range(6)) + " " + " ".join(rng.choice(en) for _ in range(4)),
+                    "icon": "public",
+                    "icon_bg_class": "bg-blue-100",
+                    "icon_color_class": "text-blue-500",
+                    "href": f"https://{rng.choice(en)}{i}.example.com/",
+                    "order": i // categories,
+                }
+                for i in range(cards)
+            ],
+        )
+        session.commit()
+    return {
+        "latin_prefix": [word[:3] for word in rng.sample(en, 6)],
+        "latin_word": rng.sample(en, 6),
+        "chinese": rng.sample(zh, 6),
+        "mixed": [f"{a} {b}" for a, b in zip(rng.sample(en, 4), rng.sample(zh, 4))],
+        "miss": ["zzzz", "𠀀𠀁"],
+    }
+
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--words", type=int, default=2000, help="synthetic vocabulary size per script")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_app_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        queries_by_kind = seed(engine, args.categories, args.cards, args.words)
+
+        started = time.perf_counter()
+        search.ensure_index(engine)
+        print(json.dumps({"cards": args.cards, "index_build_s": round(time.perf_counter() - started, 2)}))
+
+        with Session(engine) as session:
+            for kind, queries in queries_by_kind.items():
+                latencies = []
+                hits = 0
+                for _ in range(args.rounds):
+                    for query in queries:
+                        started = time.perf_counter()
+                        hits += len(search.search_cards(session, query, args.limit))
+                        latencies.append(time.perf_counter() - started)
+                latencies.sort()
+                print(json.dumps({
+                    "kind": kind,
+                    "queries": len(latencies),
+                    "avg_hits": round(hits / len(latencies), 1),
+                    "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                    "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                    "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                }))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
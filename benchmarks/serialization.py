@@ -0,0 +1,137 @@
+"""Cost per 1000 cards of the card list response, before and after the fast path.
+
+    python -m benchmarks.serialization --cards 1000 --repeat 50
+
+Seeds ``--cards`` cards into a temporary database and times each way of
+turning them into a response body, reported per 1000 cards:
+
+- ``response_model``: ORM entities validated and serialized through
+  ``List[NavigationCardRead]`` by FastAPI, then encoded by ``JSONResponse``
+  (what ``GET /api/cards/`` did before);
+- ``columns_stdlib`` / ``columns_orjson``: column tuples turned into dicts
+  and encoded by ``app.core.serialization`` with either encoder (orjson only
+  when installed).
+
+Each includes the query, and the bodies must be byte-identical. Results
+are printed as JSON lines and written to ``--output`` (default
+``build/benchmarks/serialization-<commit>.json``).
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.api import current_commit, percentile
+
+
+def seed(cards: int) -> None:
+    from sqlmodel import Session
+
+    from app.database import create_db_and_tables, engine
+    from app.models import Category, NavigationCard
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        category = Category(slug="bench", label="基准", icon="speed", order=0)
+        session.add(category)
+        session.flush()
+        session.add_all(
+            NavigationCard(
+                category_id=category.id,
+                title=f"Card {i}",
+                subtitle="副标题",
+                description="用于序列化基准测试的卡片描述。" * 3,
+                icon="public",
+                icon_bg_class="bg-blue-100",
+                icon_color_class="text-blue-500",
+                href=f"https://example.com/{i}",
+                order=i,
+            )
+            for i in range(cards)
+        )
+        session.commit()
+
+
+def measure(name: str, body: Callable[[], bytes], cards: int, repeat: int) -> Dict[str, Any]:
+    body()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(body())
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    scale = 1000 / cards * 1000
+    return {
+        "path": name,
+        "cards": cards,
+        "bytes": size,
+        "p50_ms_per_1000": round(percentile(timings, 0.50) * scale, 3),
+        "p95_ms_per_1000": round(percentile(timings, 0.95) * scale, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--output", help="result file (default: build/benchmarks/serialization-<commit>.json)")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "METRICS_ENABLED": "false",
+        })
+        from fastapi.responses import JSONResponse
+        from fastapi.routing import serialize_response
+        from fastapi.utils import create_response_field
+        from sqlmodel import Session, select
+
+        from app.core import serialization
+        from app.database import engine
+        from app.models import NavigationCard, NavigationCardRead
+        from app.routers.cards import CARD_COLUMNS
+
+        seed(args.cards)
+        field = create_response_field(name="Response_read_cards", type_=List[NavigationCardRead])
+        ordered = (NavigationCard.order, NavigationCard.id)
+
+        def response_model() -> bytes:
+            with Session(engine) as session:
+                cards = session.exec(select(NavigationCard).order_by(*ordered)).all()
+            content = asyncio.run(serialize_response(field=field, response_content=cards, is_coroutine=True))
+            return JSONResponse(content).body
+
+        def columns() -> bytes:
+            with Session(engine) as session:
+                rows = session.exec(select(*CARD_COLUMNS.columns).order_by(*ordered)).all()
+            return serialization.FastJSONResponse(CARD_COLUMNS.dicts(rows)).body
+
+        if response_model() != columns():
+            raise SystemExit("the fast path changed the response body")
+        orjson = serialization.orjson
+        paths = [("response_model", response_model, None), ("columns_stdlib", columns, None)]
+        if orjson is not None:
+            paths.append(("columns_orjson", columns, orjson))
+        for name, body, encoder in paths:
+            serialization.orjson = encoder
+            results.append(measure(name, body, args.cards, args.repeat))
+            print(json.dumps(results[-1]))
+        serialization.orjson = orjson
+        engine.dispose()
+
+    commit = current_commit()
+    output = args.output or os.path.join("build", "benchmarks", f"serialization-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "serialization", "commit": commit, "settings": vars(args), "results": results}, f,
+                  indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
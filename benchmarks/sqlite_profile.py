@@ -0,0 +1,132 @@
+"""Read throughput under a concurrent write load, with and without the
+SQLite performance profile from ``app.database``.
+
+    python -m benchmarks.sqlite_profile --readers 8 --seconds 10
+
+Each run uses a fresh database seeded with ``--categories`` x ``--cards``
+rows. Reader threads rebuild the navigation payload in a loop while one
+writer thread updates a card every ``--write-interval`` seconds; the script
+prints one JSON line per mode with reads/s, read latency, writes/s and lock
+errors.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel
+
+from app.database import create_app_engine
+from app.models import Category, NavigationCard, SiteConfig
+from app.services.navigation import build_navigation_payload
+
+
+def seed(engine, categories: int, cards: int) -> None:
+    with Session(engine) as session:
+        session.add(SiteConfig(key="branding_title", value="Benchmark"))
+        for c in range(categories):
+            session.add(Category(slug=f"cat-{c}", label=f"分类 {c}", icon="hub", order=c))
+        session.commit()
+        session.execute(
+            NavigationCard.__table__.insert(),
+            [
+                {
+                    "category_id": c + 1,
+                    "title": f"Card {c}-{i}",
+                    "subtitle": "subtitle",
+                    "description": "description " * 4,
+                    "icon": "public",
+                    "icon_bg_class": "bg-blue-100",
+                    "icon_color_class": "text-blue-500",
+                    "href": f"https://example.com/{c}/{i}",
+                    "order": i,
+                }
+                for c in range(categories)
+                for i in range(cards)
+            ],
+        )
+        session.commit()
+
+
+def run(profile: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_app_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", sqlite_profile=profile)
+        SQLModel.metadata.create_all(engine)
+        seed(engine, args.categories, args.cards)
+
+        stop = threading.Event()
+        counters = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def bump(key):
+            with lock:
+                counters[key] += 1
+
+        def reader():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with Session(engine) as session:
+                        build_navigation_payload(session)
+                    bump("reads")
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                except OperationalError:
+                    bump("read_errors")
+
+        def writer():
+            card_id = 0
+            total = args.categories * args.cards
+            while not stop.is_set():
+                card_id = card_id % total + 1
+                try:
+                    with Session(engine) as session:
+                        card = session.get(NavigationCard, card_id)
+                        card.title = f"Updated {time.time()}"
+                        session.add(card)
+                        session.commit()
+                    bump("writes")
+                except OperationalError:
+                    bump("write_errors")
+                stop.wait(args.write_interval)
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    return {
+        "profile": "tuned" if profile else "default",
+        "reads_per_sec": round(counters["reads"] / args.seconds, 1),
+        "read_p99_ms": round(p99 * 1000, 2),
+        "writes_per_sec": round(counters["writes"] / args.seconds, 1),
+        "read_errors": counters["read_errors"],
+        "write_errors": counters["write_errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--write-interval", type=float, default=0.005)
+    args = parser.parse_args()
+    for profile in (False, True):
+        print(json.dumps(run(profile, args)))
+
+
+if __name__ == "__main__":
+    main()
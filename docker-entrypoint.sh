@@ -3,6 +3,7 @@ set -euo pipefail
 
 DB_URL="${DATABASE_URL:-sqlite:///./navigator.db}"
 DB_PATH=""
+PREFLIGHT_ARGS=()
 
 if [[ "$DB_URL" == sqlite:* ]]; then
   DB_PATH="${DB_URL#sqlite:///}"
@@ -12,8 +13,34 @@ if [[ "$DB_URL" == sqlite:* ]]; then
   mkdir -p "$(dirname "$DB_PATH")"
   if [[ ! -f "$DB_PATH" ]]; then
     echo "[entrypoint] Initializing database at $DB_PATH"
-    python -m app.services.seed
+    PREFLIGHT_ARGS+=(--seed)
   fi
 fi
 
+# Schema, search index and admin user, once for all workers.
+python -m app.services.startup "${PREFLIGHT_ARGS[@]}"
+export STARTUP_PREFLIGHT="${STARTUP_PREFLIGHT:-false}"
+
+# Compile the Tailwind stylesheet. Without the CLI every page would load the
+# in-browser runtime, so a missing CLI is an error unless explicitly allowed.
+if ! command -v "${TAILWIND_CLI:-tailwindcss}" > /dev/null; then
+  if [[ "${TAILWIND_OPTIONAL:-false}" != "true" ]]; then
+    echo "[entrypoint] Tailwind CLI '${TAILWIND_CLI:-tailwindcss}' not found; set TAILWIND_CLI or TAILWIND_OPTIONAL=true" >&2
+    exit 1
+  fi
+  echo "[entrypoint] Tailwind CLI not found; pages use the in-browser runtime" >&2
+fi
+python -m app.services.tailwind
+# Subset the fonts to the glyphs in use.
+python -m app.services.fonts
+# Write .br/.gz variants of the static assets.
+python -m app.services.static_assets
+export STATIC_PRECOMPRESS_ON_STARTUP="${STATIC_PRECOMPRESS_ON_STARTUP:-false}"
+
+# Metric files of previous runs would be summed into the new ones.
+if [[ -n "${PROMETHEUS_MULTIPROC_DIR:-}" ]]; then
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 exec "$@"
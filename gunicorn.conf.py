@@ -0,0 +1,49 @@
+"""Gunicorn settings for the preload mode.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The master imports the application once and forks the uvicorn workers from
+it, so a worker starts without paying for the imports. The preflight
+(schema, search index, admin user) runs once in the master before the fork
+unless STARTUP_PREFLIGHT=false says it already ran; workers then only open
+their own connections and warm their caches in the lifespan.
+"""
+import os
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Read before the app is imported; workers always skip the preflight.
+_run_preflight = os.getenv("STARTUP_PREFLIGHT", "true").lower() not in ("0", "false", "no", "off")
+os.environ["STARTUP_PREFLIGHT"] = "false"
+
+
+def on_starting(server):
+    from app.core.hashing import password_pool
+    from app.database import engine
+    from app.services import startup
+
+    if _run_preflight:
+        startup.preflight()
+    # Nothing the workers inherit may hold a connection or a thread.
+    password_pool.shutdown()
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    from app.database import async_engine, engine
+
+    # Drop any pooled connection copied from the master without closing it
+    # underneath the master.
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,28 @@
+/** Build-time Tailwind configuration, see app/services/tailwind.py. */
+module.exports = {
+  content: [
+    "./app/templates/**/*.html",
+    "./build/tailwind/classes.txt",
+  ],
+  theme: {
+    extend: {
+      colors: {
+        primary: "#63B3ED",
+        "background-light": "#F7FAFC",
+        "card-light": "#FFFFFF",
+        "text-light": "#2D3748",
+        "subtle-light": "#718096",
+        "border-light": "#E2E8F0",
+      },
+      fontFamily: {
+        sans: ["Inter", "sans-serif"],
+        mono: ["Roboto Mono", "monospace"],
+      },
+      borderRadius: {
+        DEFAULT: "0.5rem",
+        'lg': '0.75rem',
+        'xl': '1rem'
+      },
+    },
+  },
+};
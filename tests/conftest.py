@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when app modules are imported, so point them at a
+# throwaway database first.
+_tmp = tempfile.mkdtemp(prefix="navigator-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    "METRICS_ENABLED": "false",
+    "STARTUP_PREFLIGHT": "false",
+})
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.database import create_db_and_tables
+    from app.main import app
+    from app.services import search
+
+    create_db_and_tables()
+    search.ensure_index()
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    from sqlmodel import Session, select
+
+    from app.core.security import get_password_hash
+    from app.database import engine
+    from app.models import User
+
+    with Session(engine) as session:
+        if session.exec(select(User).where(User.username == "test-admin")).first() is None:
+            session.add(User(username="test-admin", hashed_password=get_password_hash("admin-pass"), is_superuser=True))
+            session.commit()
+    response = client.post("/api/auth/token", data={"username": "test-admin", "password": "admin-pass"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
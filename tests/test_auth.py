@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.security import settings
+
+
+def _token(client, username, password):
+    response = client.post("/api/auth/token", data={"username": username, "password": password})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(params=[False, True], ids=["lookup", "embedded-claims"])
+def embed_claims(request, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_EMBED_CLAIMS", request.param)
+    return request.param
+
+
+@pytest.fixture
+def user(client, admin_headers, embed_claims):
+    username = f"revoked-{'claims' if embed_claims else 'lookup'}"
+    response = client.post(
+        "/api/users/",
+        json={"username": username, "password": "old-pass", "is_active": True, "is_superuser": True},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    user = response.json()
+    headers = _token(client, username, "old-pass")
+    # Within the cache TTL and the claims max age, so a revocation must not wait for either.
+    assert client.get("/api/users/", headers=headers).status_code == 200
+    yield user, headers
+    client.delete(f"/api/users/{user['id']}", headers=admin_headers)
+
+
+def test_password_change_revokes_existing_tokens(client, admin_headers, user):
+    user, headers = user
+    response = client.put(f"/api/users/{user['id']}", json={"password": "new-pass"}, headers=admin_headers)
+    assert response.status_code == 200
+
+    assert client.get("/api/users/", headers=headers).status_code == 401
+    assert client.get("/api/users/", headers=_token(client, user["username"], "new-pass")).status_code == 200
+
+
+def test_deleted_user_tokens_stop_authorizing(client, admin_headers, user):
+    user, headers = user
+    assert client.delete(f"/api/users/{user['id']}", headers=admin_headers).status_code == 200
+
+    assert client.get("/api/users/", headers=headers).status_code == 401
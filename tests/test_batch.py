@@ -0,0 +1,96 @@
+import pytest
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import NavigationCard
+
+MISSING_ID = 10_000_000
+
+
+@pytest.fixture(scope="module")
+def category_id(client, admin_headers):
+    response = client.post(
+        "/api/categories/", json={"slug": "batch-test", "label": "批量测试", "icon": "build"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _card(category_id, href, **fields):
+    return {
+        "category_id": category_id,
+        "title": "Batch",
+        "description": "测试",
+        "icon": "public",
+        "icon_bg_class": "bg-blue-100",
+        "icon_color_class": "text-blue-500",
+        "href": href,
+        "order": 0,
+        **fields,
+    }
+
+
+def _cards(*hrefs):
+    with Session(engine) as session:
+        cards = session.exec(select(NavigationCard).where(NavigationCard.href.in_(hrefs))).all()
+    return {card.href: card for card in cards}
+
+
+def test_atomic_batch_with_a_bad_item_writes_nothing(client, admin_headers, category_id):
+    hrefs = ["https://atomic.example/1", "https://atomic.example/2"]
+    response = client.post("/api/cards/batch?atomic=true", json=[
+        _card(category_id, hrefs[0]),
+        _card(MISSING_ID, "https://atomic.example/bad"),
+        _card(category_id, hrefs[1]),
+    ], headers=admin_headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == [{"index": 1, "ok": False, "detail": "Category not found"}]
+    assert _cards(*hrefs) == {}
+
+
+def test_batch_reports_each_item(client, admin_headers, category_id):
+    hrefs = ["https://partial.example/1", "https://partial.example/2"]
+    response = client.post("/api/cards/batch", json=[
+        _card(category_id, hrefs[0]),
+        _card(MISSING_ID, "https://partial.example/bad"),
+        _card(category_id, hrefs[1]),
+    ], headers=admin_headers)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [(result["index"], result["ok"]) for result in results] == [(0, True), (1, False), (2, True)]
+    assert results[1]["detail"] == "Category not found"
+    created = _cards(*hrefs)
+    assert [result["id"] for result in results if result["ok"]] == [created[href].id for href in hrefs]
+
+    response = client.post(
+        "/api/cards/batch/delete?atomic=true", json={"ids": [created[hrefs[0]].id, MISSING_ID]}, headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert len(_cards(*hrefs)) == 2
+
+
+def test_reorder_sets_positions_and_reports_bad_ids(client, admin_headers, category_id):
+    hrefs = ["https://reorder.example/1", "https://reorder.example/2"]
+    response = client.post(
+        "/api/cards/batch", json=[_card(category_id, href) for href in hrefs], headers=admin_headers
+    )
+    first, second = (result["id"] for result in response.json())
+
+    response = client.put(
+        "/api/cards/reorder?atomic=true", json={"ids": [second, MISSING_ID, first]}, headers=admin_headers
+    )
+    assert response.status_code == 400
+    assert {card.order for card in _cards(*hrefs).values()} == {0}
+
+    response = client.put(
+        "/api/cards/reorder", json={"ids": [second, MISSING_ID, first, second]}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert [(result["ok"], result.get("detail")) for result in response.json()] == [
+        (True, None), (False, "Card not found"), (True, None), (False, "Duplicate id"),
+    ]
+    cards = _cards(*hrefs)
+    # Positions come from the full list, so the skipped id leaves a gap.
+    assert (cards[hrefs[1]].order, cards[hrefs[0]].order) == (0, 2)
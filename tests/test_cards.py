@@ -0,0 +1,42 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def category_id(client, admin_headers):
+    response = client.post(
+        "/api/categories/", json={"slug": "cards-test", "label": "卡片测试", "icon": "build"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    category_id = response.json()["id"]
+    for i in range(3):
+        response = client.post("/api/cards/", json={
+            "category_id": category_id,
+            "title": f"Card {i}",
+            "description": "测试",
+            "icon": "public",
+            "icon_bg_class": "bg-blue-100",
+            "icon_color_class": "text-blue-500",
+            "href": f"https://cards-test.example/{i}",
+            "order": i,
+        }, headers=admin_headers)
+        assert response.status_code == 200
+    return category_id
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": -1},
+    {"limit": 0},
+    {"limit": 501},
+    {"skip": -1},
+    {"cursor": "", "limit": 0},
+    {"cursor": "", "limit": 10_000},
+])
+def test_card_list_rejects_out_of_range_paging(client, params):
+    assert client.get("/api/cards/", params=params).status_code == 422
+
+
+def test_card_list_honours_limit(client, category_id):
+    listed = client.get("/api/cards/", params={"category_id": category_id, "limit": 2})
+    assert len(listed.json()) == 2
+    page = client.get("/api/cards/", params={"category_id": category_id, "cursor": "", "limit": 2}).json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
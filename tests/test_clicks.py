@@ -0,0 +1,25 @@
+from app.services.clicks import recorder
+
+
+def test_only_cards_in_the_navigation_are_counted(client, admin_headers, monkeypatch):
+    response = client.post(
+        "/api/categories/", json={"slug": "clicks-test", "label": "点击测试", "icon": "build"}, headers=admin_headers
+    )
+    response = client.post("/api/cards/", json={
+        "category_id": response.json()["id"],
+        "title": "Clicked",
+        "description": "测试",
+        "icon": "public",
+        "icon_bg_class": "bg-blue-100",
+        "icon_color_class": "text-blue-500",
+        "href": "https://clicks-test.example",
+        "order": 0,
+    }, headers=admin_headers)
+    card_id = response.json()["id"]
+    recorded = []
+    monkeypatch.setattr(recorder, "record", lambda card_id: recorded.append(card_id) and False)
+
+    for clicked in (card_id, card_id + 10_000, -1):
+        assert client.post(f"/api/clicks/{clicked}").status_code == 204
+
+    assert recorded == [card_id]
@@ -0,0 +1,95 @@
+import io
+import json
+
+import pytest
+from sqlmodel import Session, select
+
+from app.database import create_db_and_tables, engine
+from app.models import NavigationCard
+from app.services import search
+from app.services.dataset import CARD_DEFAULTS, DatasetError, import_file, import_records
+
+
+@pytest.fixture(autouse=True)
+def database():
+    create_db_and_tables()
+    search.ensure_index()
+
+
+def _card(href, **fields):
+    return {"type": "card", "category": "tools", "title": "Tool", "href": href, **fields}
+
+
+def test_null_and_missing_optional_card_fields_use_defaults():
+    importer = import_records([
+        {"type": "category", "slug": "tools", "label": "工具", "icon": "build"},
+        _card("https://null.example", description=None, icon=None, subtitle=None, order=None),
+        _card("https://missing.example"),
+    ])
+
+    assert importer.stats["cards"]["inserted"] == 2
+    assert importer.stats["skipped"] == 0
+    with Session(engine) as session:
+        cards = session.exec(
+            select(NavigationCard).where(NavigationCard.href.in_(["https://null.example", "https://missing.example"]))
+        ).all()
+    assert len(cards) == 2
+    for card in cards:
+        assert card.description == CARD_DEFAULTS["description"]
+        assert card.icon == CARD_DEFAULTS["icon"]
+        assert card.subtitle is None
+        assert card.order == 0
+
+
+def test_wrongly_typed_card_fields_are_skipped_not_fatal():
+    importer = import_records([
+        {"type": "category", "slug": "tools", "label": "工具", "icon": "build"},
+        _card("https://list.example", description=["not", "text"]),
+        _card("https://order.example", order="first"),
+        _card("https://ok.example", description="fine"),
+    ])
+
+    assert importer.stats["skipped"] == 2
+    assert len(importer.stats["errors"]) == 2
+    assert importer.stats["cards"]["inserted"] + importer.stats["cards"]["updated"] == 1
+
+
+def _document(**fields):
+    return io.BytesIO(json.dumps(fields).encode("utf-8"))
+
+
+def test_incomplete_prototype_records_are_skipped():
+    importer = import_file(_document(
+        sidebar={"menuItems": [
+            {"id": "proto", "label": "原型", "icon": "build"},
+            {"id": "no-label", "icon": "build"},
+            "not an item",
+        ]},
+        sections=[
+            {"id": "proto", "cards": [{"title": "Proto", "href": "https://proto.example"}]},
+            {"cards": [{"title": "Orphan", "href": "https://orphan.example"}]},
+        ],
+    ))
+
+    assert importer.stats["categories"]["inserted"] + importer.stats["categories"]["updated"] == 1
+    assert importer.stats["cards"]["inserted"] + importer.stats["cards"]["updated"] == 1
+    assert importer.stats["skipped"] == 3
+
+
+@pytest.mark.parametrize("upload", [
+    _document(sidebar=[{"id": "x", "label": "x", "icon": "x"}]),
+    _document(sections={"id": "x"}),
+    io.BytesIO('[{"type": "config", "key": "k", "value": "'.encode("utf-8") + "値".encode("shift_jis") + b'"}]'),
+])
+def test_malformed_uploads_are_dataset_errors(upload):
+    with pytest.raises(DatasetError):
+        import_file(upload)
+
+
+def test_malformed_upload_is_a_bad_request(client, admin_headers):
+    response = client.post(
+        "/api/dataset/import",
+        files={"file": ("data.json", b'{"sidebar": []}', "application/json")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
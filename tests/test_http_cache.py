@@ -0,0 +1,50 @@
+import time
+from datetime import datetime
+
+from sqlmodel import Session
+
+from app.core.http_cache import http_date
+from app.database import engine
+from app.services import cache_versions
+
+STALE = http_date(datetime(2000, 1, 1))
+FUTURE = http_date(datetime(2999, 1, 1))
+
+
+def test_matching_etag_wins_over_a_stale_if_modified_since(client):
+    etag = client.get("/api/navigation").headers["etag"]
+
+    response = client.get("/api/navigation", headers={"If-None-Match": etag, "If-Modified-Since": STALE})
+
+    assert response.status_code == 304
+
+
+def test_mismatched_etag_wins_over_a_fresh_if_modified_since(client):
+    response = client.get("/api/navigation", headers={"If-None-Match": '"other"', "If-Modified-Since": FUTURE})
+
+    assert response.status_code == 200
+    assert response.content
+
+
+def test_if_modified_since_alone(client):
+    last_modified = client.get("/api/navigation").headers["last-modified"]
+
+    assert client.get("/api/navigation", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/api/navigation", headers={"If-Modified-Since": STALE}).status_code == 200
+
+
+def test_last_modified_follows_deletes(client, admin_headers):
+    created = [
+        client.post(
+            "/api/categories/", json={"slug": slug, "label": "缓存测试", "icon": "build"}, headers=admin_headers
+        ).json()
+        for slug in ("http-cache-kept", "http-cache-deleted")
+    ]
+    # Last-Modified has whole seconds; let the delete land in a later one.
+    time.sleep(1)
+    assert client.delete(f"/api/categories/{created[1]['id']}", headers=admin_headers).status_code == 200
+
+    # A delete leaves no updated_at behind; the navigation cache version row records it.
+    with Session(engine) as session:
+        _, deleted_at = cache_versions.current(session, cache_versions.NAVIGATION)
+    assert client.get("/api/navigation").headers["last-modified"] == http_date(deleted_at)
@@ -0,0 +1,23 @@
+import os
+
+from app.services import static_assets
+
+
+def test_incompressible_assets_are_not_recompressed(tmp_path, monkeypatch):
+    font = tmp_path / "icons.ttf"
+    font.write_bytes(os.urandom(4096))
+    static_assets.precompress(str(tmp_path))
+
+    assert not (tmp_path / "icons.ttf.gz").exists()
+    assert (tmp_path / "icons.ttf.gz.skip").exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("compressed again")
+
+    monkeypatch.setattr(static_assets.gzip, "compress", fail)
+    if static_assets.brotli is not None:
+        monkeypatch.setattr(static_assets.brotli, "compress", fail)
+    static_assets.precompress(str(tmp_path))
+
+    static_assets.remove_file(str(font))
+    assert list(tmp_path.iterdir()) == []